@@ -1,18 +1,32 @@
 from flask import Flask, request, jsonify, render_template, session, redirect, url_for, Response
-import boto3
+from aws_clients import get_client, get_resource
 import datetime as dt
 from datetime import datetime, timedelta, timezone
 import pytz
-from boto3.dynamodb.conditions import Key
-from shapely.geometry import Point
+from boto3.dynamodb.conditions import Key, Attr
 import logging
 import os
-import bcrypt
+import password_hashing
 from io import BytesIO, StringIO
 import csv
 import math
+import zlib
+import json
+import base64
 import os
-from collections import defaultdict
+from dynamo_scan import scan_all, scan_pages, query_pages, build_projection
+import attendance_rollups
+from attendance_aggregation import AttendanceAggregator, AttendanceColumns, GRANULARITIES
+from data_version import DataVersion
+from response_cache import ResponseCache
+from student_directory import StudentDirectory
+from concurrent.futures import ThreadPoolExecutor
+from geofence import load_geofence
+from face_matcher import build_matcher
+from recognition_cache import cached_matcher
+import image_preprocessing
+from event_bus import EventBus
+from notifications import NotificationDispatcher, TwilioTransport, InMemoryTransport
 
 now = datetime.now()        # Uses the class
 mod_now = dt.datetime.now() # Uses the module's class explicitly
@@ -25,21 +39,117 @@ logging.basicConfig(level=logging.INFO)
 # ----------------------
 # AWS Configuration
 # ----------------------
-dynamodb = boto3.resource("dynamodb")
+dynamodb = get_resource("dynamodb")
 students_table = dynamodb.Table("Students-Table")
 teachers_table = dynamodb.Table("Teachers-Table")
+# Attendance records. Secondary indexes:
+#   student_id-index: hash "student_id", range "date" (history, duplicate checks)
+#   date-index: hash "date", range "id", projection ALL (per-date exports, absentee
+#   marking; both fall back to a filtered scan without it)
 attendance_table = dynamodb.Table("attendance")  # For attendance records
+rollups_table = dynamodb.Table(attendance_rollups.ROLLUPS_TABLE_NAME)  # Per-day attendance counts
 
-s3 = boto3.client("s3")
-rekognition = boto3.client("rekognition")
-ses = boto3.client("ses", region_name="us-east-1")  # Update region as needed
+s3 = get_client("s3")
+rekognition = get_client("rekognition")
+ses = get_client("ses", region_name="us-east-1")  # Update region as needed
 S3_BUCKET = "ruthvik-bucket-mumbai"
 REKOGNITION_COLLECTION = "students-collection"
 
+# Upload normalisation applied before images go to S3 or face search
+UPLOAD_MAX_EDGE = int(os.environ.get("UPLOAD_MAX_EDGE", "1280"))
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(500 * 1024)))
+UPLOAD_CROP_FACES = os.environ.get("UPLOAD_CROP_FACES", "0") == "1"
+
+# Face search backend: Rekognition by default, FACE_MATCHER=local for the on-box index.
+# Results for identical or near-identical uploads are cached (RECOGNITION_CACHE=0 disables).
+face_matcher = cached_matcher(build_matcher(rekognition, REKOGNITION_COLLECTION, s3))
+
+# Attributes read by the attendance views; projecting them keeps scan pages small.
+ATTENDANCE_FIELDS = ["id", "student_id", "timestamp", "date", "status"]
+# The class statistics shards (class_statistics.py) share the attendance table and carry a
+# date but no status; scans over attendance records skip them with this filter.
+ATTENDANCE_RECORD_FILTER = Attr("status").exists()
+# Attendance history page size for the student dashboard and /attendance_history
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_PAGE_SIZE = 100
+
 CAMPUS_LAT = 17.384    # Example campus latitude
 CAMPUS_LON = 78.456    # Example campus longitude
 ALLOWED_RADIUS_KM = 200.0
 
+# Campus and building zones, prepared once. CAMPUS_GEOFENCE_FILE points at a JSON list of
+# zones; without it the single circle above is used.
+campus_geofence = load_geofence(
+    os.environ.get("CAMPUS_GEOFENCE_FILE"),
+    default_center=(CAMPUS_LAT, CAMPUS_LON),
+    default_radius_km=ALLOWED_RADIUS_KM
+)
+
+# Shared pool for fanning out independent DynamoDB calls within a request
+db_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("DB_EXECUTOR_WORKERS", "16")))
+
+# Background SMS delivery. NOTIFICATION_TRANSPORT=memory keeps messages in-process (tests/dev).
+notifier = NotificationDispatcher(
+    InMemoryTransport() if os.environ.get("NOTIFICATION_TRANSPORT") == "memory" else TwilioTransport(),
+    workers=int(os.environ.get("NOTIFICATION_WORKERS", "2")),
+    queue_size=int(os.environ.get("NOTIFICATION_QUEUE_SIZE", "1000")),
+    spool_dir=os.environ.get("NOTIFICATION_SPOOL_DIR", "notification_spool")
+)
+
+# Watermark that advances on every attendance write; keys the dashboard aggregates
+data_version = DataVersion(rollups_table, ttl_seconds=int(os.environ.get("DATA_VERSION_TTL_SECONDS", "5")))
+
+# Columnar aggregates for /dashboard_data. Unfiltered trends come from the day rollups;
+# student and class filters need the attendance records themselves.
+day_aggregator = AttendanceAggregator(
+    lambda version: AttendanceColumns.from_day_counts(attendance_rollups.daily_counts(rollups_table))
+)
+record_aggregator = AttendanceAggregator(
+    lambda version: AttendanceColumns.from_pages(
+        scan_pages(attendance_table, projection=["id", "student_id", "date", "status"]),
+        classes_for=lambda student_ids: {
+            student_id: profile.get("class") for student_id, profile in student_directory.get_many(student_ids).items()
+        }
+    ),
+    min_reload_seconds=int(os.environ.get("RECORD_AGGREGATE_MIN_RELOAD_SECONDS", "60"))
+)
+
+# Rendered dashboard responses with ETags, keyed by the data version, so
+# polls between writes are answered with a 304 or a stored body
+response_cache = ResponseCache(
+    data_version,
+    max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+    max_age=int(os.environ.get("RESPONSE_CACHE_MAX_AGE", "0"))
+)
+
+# Fan-out of attendance marks to live dashboards (see /attendance_stream)
+attendance_events = EventBus()
+
+# Cached student profiles (name, phone, class), warmed by start_background_services()
+student_directory = StudentDirectory(
+    students_table,
+    dynamodb,
+    ttl_seconds=int(os.environ.get("STUDENT_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.environ.get("STUDENT_CACHE_MAX_ENTRIES", "50000")),
+    negative_ttl_seconds=int(os.environ.get("STUDENT_CACHE_NEGATIVE_TTL_SECONDS", "10"))
+)
+
+# ----------------------
+# Background Services
+# ----------------------
+# Started by the entry point (python app.py, or wsgi.py under a WSGI server) rather than
+# at import, so importing the app never scans DynamoDB or starts worker threads.
+_background_started = False
+
+def start_background_services():
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    password_hashing.tune()  # bcrypt autotune probes run here, not on the first login
+    notifier.start()
+    student_directory.warm_in_background()
+
 # ----------------------
 # Helper Functions
 # ----------------------
@@ -48,58 +158,84 @@ def get_request_data():
         return request.get_json()
     else:
         return request.form
-    
-    from shapely.geometry import Point
-
-def is_within_campus(lat, lon, campus_lat, campus_lon, radius_km):
-    # Convert radius from kilometers to degrees (approximate conversion)
-    buffer_radius = radius_km / 111.0  
-    
-    campus_center = Point(campus_lon, campus_lat)  # (x, y) order
-    user_point = Point(lon, lat)
-    
-    # campus_center.buffer(buffer_radius) creates a circular polygon around the campus center.
-    return user_point.within(campus_center.buffer(buffer_radius))
 
-def send_sms(phone_number, message):
+def is_within_campus(lat, lon):
+    # True if the point falls inside any configured campus or building zone
+    return campus_geofence.contains(lat, lon)
+
+def prepare_face_image(file_data):
+    # Normalise an uploaded face image (EXIF rotation, downscale, bounded JPEG, optional face crop).
+    # Returns (bytes, is_jpeg); is_jpeg is False when the upload could not be decoded and
+    # is passed through unchanged.
+    normalised, report = image_preprocessing.normalise_upload(
+        file_data,
+        max_edge=UPLOAD_MAX_EDGE,
+        max_bytes=UPLOAD_MAX_BYTES,
+        crop_faces=UPLOAD_CROP_FACES
+    )
+    logging.info(
+        "Upload normalised: %d -> %d bytes (%d saved) in %.1f ms",
+        report["bytes_in"], report["bytes_out"], report["bytes_saved"], report["elapsed_ms"]
+    )
+    return normalised, report["format"] == "JPEG"
+
+def marked_since(student_id, start_date_str, end_date_str, since):
+    # True if the student's most recent attendance record is newer than `since`
+    response = attendance_table.query(
+        IndexName="student_id-index",  # Ensure this index exists
+        KeyConditionExpression=Key("student_id").eq(student_id) & Key("date").between(start_date_str, end_date_str),
+        ScanIndexForward=False,  # Sort in descending order (latest first)
+        Limit=1  # Only fetch the most recent attendance record
+    )
+    last_attendance = response.get("Items", [])
+    if not last_attendance:
+        return False
+    last_timestamp = datetime.strptime(last_attendance[0]["timestamp"], "%Y-%m-%dT%H:%M:%S.%f%z")
+    return last_timestamp > since
+
+def encode_cursor(last_key):
+    # Opaque, URL-safe pagination cursor for a DynamoDB LastEvaluatedKey
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, sort_keys=True).encode()).decode()
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
     try:
-        # Import and load necessary environment variables
-        from twilio.rest import Client
-        import os
-        from dotenv import load_dotenv
-
-        # Load environment variables from .env file
-        load_dotenv()
-        
-        # Retrieve Twilio credentials
-        TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-        TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-        TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")  # Or Messaging Service SID if using one
-
-        # Validate that the Twilio credentials are loaded
-        if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER):
-            logging.error("Twilio credentials are missing. Ensure that .env is correctly configured.")
-            return
-
-        # Initialize the Twilio client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-
-        # Log the SMS sending attempt
-        logging.info(f"Attempting to send SMS to {phone_number}")
-
-        # Send the SMS
-        message_response = client.messages.create(
-            to=phone_number,
-            from_=TWILIO_PHONE_NUMBER,  # Replace with 'messaging_service_sid' if using that
-            body=message
-        )
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_key, dict):
+        raise ValueError("Invalid cursor")
+    return last_key
+
+def attendance_history_page(student_id, limit, cursor=None):
+    # One page of a student's attendance, newest first, from the student_id GSI.
+    # Returns (records, next_cursor); next_cursor is None on the last page.
+    projection, names = build_projection(ATTENDANCE_FIELDS)
+    kwargs = {
+        "IndexName": "student_id-index",
+        "KeyConditionExpression": Key("student_id").eq(student_id),
+        "ProjectionExpression": projection,
+        "ExpressionAttributeNames": names,
+        "ScanIndexForward": False,
+        "Limit": limit
+    }
+    start_key = decode_cursor(cursor)
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    response = attendance_table.query(**kwargs)
+    return response.get("Items", []), encode_cursor(response.get("LastEvaluatedKey"))
 
-        # Log the successful SMS response
-        logging.info(f"SMS sent successfully to {phone_number}. Message SID: {message_response.sid}")
+def fetch_students(student_ids):
+    # Student profiles keyed by student ID, served from the in-memory directory
+    return student_directory.get_many(student_ids)
 
-    except Exception as e:
-        # Log any errors encountered
-        logging.error(f"Failed to send SMS to {phone_number}: {e}")
+def send_sms(phone_number, message):
+    # Hand the SMS to the background dispatcher; delivery and retries happen off-request.
+    logging.info(f"Queueing SMS to {phone_number}")
+    notifier.enqueue(phone_number, message)
 
 
 # ----------------------
@@ -126,7 +262,7 @@ def register(role):
         user_id = request.form["id"]
         email = request.form["email"]
         password = request.form["password"]
-        hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        hashed_pw = password_hashing.hash_password(password)  # Runs on the bcrypt process pool
 
         if role == "student":
             user_class = request.form["class"]
@@ -148,47 +284,56 @@ def register(role):
                 logging.error("Uploaded file is empty.")
                 return jsonify({"message": "Uploaded file is empty."}), 400
 
-            # Save the face image to S3
-            filename = f"faces/{user_id}_capture.png"
+            # Downscale and re-encode before any network call
+            file_data, is_jpeg = prepare_face_image(file_data)
+
+            # Save the face image to S3; an upload that was not re-encoded keeps its own
+            # extension and content type
+            if is_jpeg:
+                extension, content_type = ".jpg", "image/jpeg"
+            else:
+                extension = os.path.splitext(face_image_file.filename or "")[1].lower()
+                if not extension[1:].isalnum():
+                    extension = ".png"
+                content_type = face_image_file.mimetype or "application/octet-stream"
+            filename = f"faces/{user_id}_capture{extension}"
             try:
-                s3.put_object(Bucket=S3_BUCKET, Key=filename, Body=file_data)
+                s3.put_object(Bucket=S3_BUCKET, Key=filename, Body=file_data, ContentType=content_type)
             except Exception as s3_error:
                 logging.error("S3 upload error: %s", s3_error, exc_info=True)
                 return jsonify({"message": "Failed to upload image to S3."}), 500
 
             s3_url = f"https://{S3_BUCKET}.s3.amazonaws.com/{filename}"
 
-            # Index the face into Rekognition’s collection
+            # Index the face into the matcher's collection (Rekognition by default)
             try:
-                rekognition_response = rekognition.index_faces(
-                    CollectionId=REKOGNITION_COLLECTION,
-                    Image={"S3Object": {"Bucket": S3_BUCKET, "Name": filename}},
-                    ExternalImageId=user_id,  # Use student ID as ExternalImageId
-                    DetectionAttributes=["DEFAULT"]
+                face_records = face_matcher.index(
+                    {"S3Object": {"Bucket": S3_BUCKET, "Name": filename}},
+                    user_id  # Use student ID as ExternalImageId
                 )
+                face_matcher.persist()
             except Exception as index_error:
                 logging.error("Error indexing face with Rekognition: %s", index_error, exc_info=True)
                 return jsonify({"message": "Failed to index face in Rekognition."}), 500
 
-            # Check if Rekognition detected a valid face
-            face_records = rekognition_response.get("FaceRecords", [])
+            # Check if a valid face was detected
             if not face_records:
                 return jsonify({"message": "Face not found in the uploaded image. Please try again with a clear photo of your face."}), 400
 
             # Save student data into DynamoDB with IST timestamp
-            students_table.put_item(
-                Item={
-                    "id": user_id,
-                    "name": request.form["name"],
-                    "email": email,
-                    "class": user_class,
-                    "phone_number": phone_number,
-                    "password_hash": hashed_pw,
-                    "username": request.form["name"],
-                    "face_image_url": s3_url,
-                    "registered_at": current_ist_time.strftime("%Y-%m-%d %H:%M:%S %Z")
-                }
-            )
+            student_item = {
+                "id": user_id,
+                "name": request.form["name"],
+                "email": email,
+                "class": user_class,
+                "phone_number": phone_number,
+                "password_hash": hashed_pw,
+                "username": request.form["name"],
+                "face_image_url": s3_url,
+                "registered_at": current_ist_time.strftime("%Y-%m-%d %H:%M:%S %Z")
+            }
+            students_table.put_item(Item=student_item)
+            student_directory.put(student_item)  # Write-through so the new profile is served immediately
             logging.info(f"Student registered: {user_id} at {current_ist_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
             return jsonify({"message": "Student registration successful!", "s3_url": s3_url})
 
@@ -229,21 +374,33 @@ def login(role):
         password = request.form["password"]
 
         if role == "student":
-            response = students_table.get_item(Key={"id": user_id})
-            if "Item" not in response:
-                return render_template("login.html", role=role, error="Invalid credentials.")
-            user = response["Item"]
+            user_table = students_table
         elif role == "teacher":
-            response = teachers_table.get_item(Key={"id": user_id})
-            if "Item" not in response:
-                return render_template("login.html", role=role, error="Invalid credentials.")
-            user = response["Item"]
+            user_table = teachers_table
         else:
             return render_template("login.html", role=role, error="Invalid role.")
 
-        if not bcrypt.checkpw(password.encode(), user["password_hash"].encode()):
+        response = user_table.get_item(Key={"id": user_id})
+        if "Item" not in response:
+            return render_template("login.html", role=role, error="Invalid credentials.")
+        user = response["Item"]
+
+        # bcrypt runs on a dedicated process pool, not on this request thread
+        if not password_hashing.verify_password(password, user["password_hash"]):
             return render_template("login.html", role=role, error="Invalid credentials.")
 
+        # Transparently upgrade hashes made with an older work factor
+        if password_hashing.needs_rehash(user["password_hash"]):
+            password_hashing.rehash_in_background(
+                password,
+                lambda new_hash: user_table.update_item(
+                    Key={"id": user_id},
+                    UpdateExpression="SET password_hash = :h",
+                    ExpressionAttributeValues={":h": new_hash}
+                ),
+                db_executor
+            )
+
         session["user_id"] = user_id
         session["role"] = role
         session["username"] = user["username"]
@@ -276,27 +433,25 @@ def teacher_dashboard():
     
     username = session.get("username")
     
-    # Fetch attendance data for trends (e.g., count of 'Present' per date)
-    attendance_response = attendance_table.scan()
-    records = attendance_response.get("Items", [])
-    trends = {}
-    for record in records:
-        if record.get("status") == "Present":
-            date = record.get("date")
-            trends[date] = trends.get(date, 0) + 1
-    
-    # Sort trends data by date
-    sorted_trends = sorted(trends.items())
-    trend_labels = [date for date, count in sorted_trends]
-    attendance_counts = [count for date, count in sorted_trends]
+    def render():
+        # Fetch attendance trends (count of 'Present' per date) from the day rollups
+        trends = attendance_rollups.daily_counts(rollups_table)
+        
+        # Sort trends data by date
+        sorted_trends = sorted(trends.items())
+        trend_labels = [date for date, count in sorted_trends]
+        attendance_counts = [count for date, count in sorted_trends]
+        
+        # Render template with trend data
+        return render_template(
+            "teacher_dashboard.html", 
+            username=username, 
+            trend_labels=trend_labels, 
+            attendance_counts=attendance_counts
+        )
     
-    # Render template with trend data
-    return render_template(
-        "teacher_dashboard.html", 
-        username=username, 
-        trend_labels=trend_labels, 
-        attendance_counts=attendance_counts
-    )
+    # The page greets the teacher by name, so the cached body varies by username
+    return response_cache.respond(render, vary=(username,))
 
 # ----------------------
 # Student Dashboard
@@ -310,52 +465,20 @@ def student_dashboard():
     student_id = session.get("user_id")
     app.logger.info("Student id from session: %s", student_id)
 
-    # Calculate the current month's start and end dates
-    now = datetime.now()  # current time
-
-    start_date = datetime(now.year, now.month, 1)
-    if now.month == 12:
-        start_of_next_month = datetime(now.year + 1, 1, 1)
-    else:
-        start_of_next_month = datetime(now.year, now.month + 1, 1)
-    # Ensure timedelta is imported: from datetime import timedelta
-    end_date = start_of_next_month - timedelta(days=1)
-    start_date_str = start_date.strftime("%Y-%m-%d")
-    end_date_str = end_date.strftime("%Y-%m-%d")
-
-    app.logger.info("Date range - Start: %s, End: %s", start_date_str, end_date_str)
-
-    # Query using the index (Option 1)
+    # This month's count is one small rollup item; the history list is its first page.
+    # Both reads are independent of how long the student's history is.
+    month = datetime.now(timezone.utc).strftime("%Y-%m")  # Marks are dated in UTC
+    count_future = db_executor.submit(attendance_rollups.student_month_count, rollups_table, student_id, month)
     try:
-        response = attendance_table.query(
-            IndexName="student_id-index",  # Ensure this index exists
-            KeyConditionExpression=Key("student_id").eq(student_id) & Key("date").between(start_date_str, end_date_str)
-        )
-        attendance_records = response.get("Items", [])
+        attendance_records, next_cursor = attendance_history_page(student_id, HISTORY_PAGE_SIZE)
     except Exception as e:
-        logging.error("Error querying attendance table with index: %s", e)
-        attendance_records = []
-
-    # Backup query using the table's primary keys (Option 2)
+        logging.error("Error querying attendance history for %s: %s", student_id, e)
+        attendance_records, next_cursor = [], None
     try:
-        if not attendance_records:  # Only query without the index if the above fails
-            response = attendance_table.query(
-                KeyConditionExpression=Key("id").eq(student_id) & Key("date").between(start_date_str, end_date_str)
-            )
-            attendance_records = response.get("Items", [])
+        present_count = count_future.result()
     except Exception as e:
-        logging.error("Error querying attendance table with primary keys: %s", e)
-        attendance_records = []
-
-    # Count 'present' records for the current month
-    present_count = 1
-    for record in attendance_records:
-        try:
-            record_date = datetime.strptime(record.get("date", "0001-01-01"), "%Y-%m-%d")
-            if record.get("status", "").lower() == "present" and record_date.month == now.month:
-                present_count += 1
-        except Exception as e:
-            logging.error("Error processing record %s: %s", record, e)
+        logging.error("Error reading monthly attendance rollup for %s: %s", student_id, e)
+        present_count = 0
 
     chart_data = {
         "labels": ["This Month"],
@@ -365,6 +488,7 @@ def student_dashboard():
     return render_template("student_dashboard.html",
                            username=username,
                            attendance_records=attendance_records,
+                           next_cursor=next_cursor,
                            chart_data=chart_data)
 
 # ----------------------
@@ -404,7 +528,7 @@ def mark_attendance():
             return jsonify({"message": "Invalid geolocation data."}), 400
 
         # Validate the user is on campus.
-        if not is_within_campus(user_lat, user_lon, CAMPUS_LAT, CAMPUS_LON, ALLOWED_RADIUS_KM):
+        if not is_within_campus(user_lat, user_lon):
             return jsonify({"message": "You are not on campus. Attendance cannot be marked."}), 403
 
         # Read the uploaded file.
@@ -413,87 +537,120 @@ def mark_attendance():
         if not file_data:
             return jsonify({"message": "Uploaded file is empty."}), 400
 
-        # Use AWS Rekognition to search for matching faces.
+        # Downscale and re-encode before any network call
+        file_data, _ = prepare_face_image(file_data)
+
+        # Search the face collection (AWS Rekognition or the local index) for matching faces.
         try:
-            search_response = rekognition.search_faces_by_image(
-                CollectionId=REKOGNITION_COLLECTION,
-                Image={"Bytes": file_data},
-                FaceMatchThreshold=80,
-                MaxFaces=10  # Allow up to 10 face matches
+            face_matches = face_matcher.search(
+                {"Bytes": file_data},
+                threshold=80,
+                max_faces=10,  # Allow up to 10 face matches
+                scope=session.get("user_id")  # Near-duplicate cache hits only for this student
             )
         except Exception as rekognition_error:
             logging.error("Error during Rekognition search: %s", rekognition_error, exc_info=True)
             return jsonify({"message": "Error during face search. Please try again."}), 500
 
-        if not search_response.get("FaceMatches"):
+        if not face_matches:
             return jsonify({"message": "No registered faces matched in the image."}), 401
 
-        recognized_students = set()  # To store unique recognized student IDs
         logged_in_student_id = session.get("user_id")
 
-        # Iterate over all matched faces
-        for face_match in search_response["FaceMatches"]:
+        # Unique recognised student IDs, in match order
+        recognized_students = []
+        for face_match in face_matches:
             student_id = face_match["Face"].get("ExternalImageId")
             if student_id and student_id not in recognized_students:  # Only update once per student ID
-                # Check if the student marked attendance within the last hour
-                response = attendance_table.query(
-                    IndexName="student_id-index",  # Ensure this index exists
-                    KeyConditionExpression=Key("student_id").eq(student_id) & Key("date").between(start_date_str, end_date_str),
-                    ScanIndexForward=False,  # Sort in descending order (latest first)
-                    Limit=1  # Only fetch the most recent attendance record
-                )
-                last_attendance = response.get("Items", [])
-                if last_attendance:
-                    last_timestamp = datetime.strptime(
-                        last_attendance[0]["timestamp"], "%Y-%m-%dT%H:%M:%S.%f%z"
-                    )
-                    if last_timestamp > one_hour_ago:
-                        # Customized error message for attendance within 1 hour
-                        return jsonify({
-                            "message": "You have already marked attendance. Please try again after 1 hour."
-                        }), 403
-
-                # Mark attendance for the recognized student
-                timestamp = current_time.isoformat()
-                date = current_time.strftime("%Y-%m-%d")
-                attendance_item = {
+                recognized_students.append(student_id)
+
+        if not recognized_students:
+            return jsonify({"message": "No registered faces matched in the image."}), 401
+
+        # Run the last-hour checks (one GSI query per student, concurrently) while the
+        # student profiles are fetched with a single BatchGetItem.
+        recent_futures = [
+            db_executor.submit(marked_since, student_id, start_date_str, end_date_str, one_hour_ago)
+            for student_id in recognized_students
+        ]
+        students_future = db_executor.submit(fetch_students, recognized_students)
+        if any(future.result() for future in recent_futures):
+            # Customized error message for attendance within 1 hour
+            return jsonify({
+                "message": "You have already marked attendance. Please try again after 1 hour."
+            }), 403
+        students = students_future.result()
+
+        # Mark attendance for every recognised student with BatchWriteItem
+        timestamp = current_time.isoformat()
+        date = current_time.strftime("%Y-%m-%d")
+        with attendance_table.batch_writer() as batch:
+            for student_id in recognized_students:
+                batch.put_item(Item={
                     "id": f"{student_id}_{timestamp}",
                     "student_id": student_id,
                     "timestamp": timestamp,
                     "date": date,
                     "status": "Present"
-                }
-                attendance_table.put_item(Item=attendance_item)
-                recognized_students.add(student_id)  # Add to the set to prevent duplicate updates
-
-                # Update attendance count for the student
-                student_response = students_table.get_item(Key={"id": student_id})
-                if "Item" in student_response:
-                    student = student_response["Item"]
-                    current_count = student.get("attendance_count", 0)  # Defaults to 0 if no count exists
-                    updated_count = current_count + 1  # Increment the count
-                    students_table.update_item(
-                        Key={"id": student_id},
-                        UpdateExpression="SET attendance_count = :count",
-                        ExpressionAttributeValues={":count": updated_count}
-                    )
-
-                    # Send SMS notification to the student
-                    phone_number = student.get("phone_number")
-                    student_name = student.get("name")
-                    if phone_number and phone_number.isdigit() and len(phone_number) == 10:
-                        formatted_phone_number = f"+91{phone_number}"
-                        message = f"Hi {student_name}, your attendance has been successfully marked on {date} at {current_time.strftime('%H:%M:%S')}."
-                        send_sms(formatted_phone_number, message)
-
-
-        # Check if no students were recognized
-        if not recognized_students:
-            return jsonify({"message": "No registered faces matched in the image."}), 401
+                })
+
+        # Atomically increment attendance counts and the per-day rollup, concurrently.
+        # The attendance rows are already written, so a failed counter is logged like the
+        # day rollup below rather than failing the request.
+        count_futures = [
+            (f"attendance count for {student_id}", db_executor.submit(
+                students_table.update_item,
+                Key={"id": student_id},
+                UpdateExpression="ADD attendance_count :one",
+                ExpressionAttributeValues={":one": 1}
+            ))
+            for student_id in recognized_students if student_id in students
+        ]
+        # Per-student monthly counters behind the student dashboard
+        count_futures += [
+            (f"monthly rollup for {student_id}",
+             db_executor.submit(attendance_rollups.record_student_mark, rollups_table, student_id, date))
+            for student_id in recognized_students
+        ]
+        present_today = None
+        try:
+            # Keep the per-day dashboard rollup in step with the attendance table
+            present_today = attendance_rollups.record_marks(rollups_table, date, len(recognized_students))
+        except Exception as rollup_error:
+            logging.error("Failed to update attendance rollup for %s: %s", date, rollup_error)
+        for description, future in count_futures:
+            try:
+                future.result()
+            except Exception as count_error:
+                logging.error("Failed to update %s on %s: %s", description, date, count_error)
+
+        # Push the marks to live dashboards
+        for student_id in recognized_students:
+            attendance_events.publish("attendance_marked", {
+                "student_id": student_id,
+                "name": students.get(student_id, {}).get("name"),
+                "date": date,
+                "timestamp": timestamp
+            })
+        if present_today is not None:
+            attendance_events.publish("present_count", {"date": date, "present_count": present_today})
+        data_version.bump()
+
+        # Send SMS notifications to the students
+        for student_id in recognized_students:
+            student = students.get(student_id)
+            if not student:
+                continue
+            phone_number = student.get("phone_number")
+            student_name = student.get("name")
+            if phone_number and phone_number.isdigit() and len(phone_number) == 10:
+                formatted_phone_number = f"+91{phone_number}"
+                message = f"Hi {student_name}, your attendance has been successfully marked on {date} at {current_time.strftime('%H:%M:%S')}."
+                send_sms(formatted_phone_number, message)
 
         return jsonify({
             "message": "Attendance marked successfully for all recognized students.",
-            "marked_students": list(recognized_students)
+            "marked_students": recognized_students
         })
 
     except Exception as e:
@@ -513,17 +670,24 @@ def attendance_summary():
     # Get today's date in UTC
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     
+    # The page is keyed by today's date as well, so it rolls over at midnight UTC
+    return response_cache.respond(lambda: render_attendance_summary(today), vary=(today,))
+
+def render_attendance_summary(today):
     # Retrieve all attendance records
-    response = attendance_table.scan()
-    records = response.get("Items", [])
+    records = scan_all(attendance_table, projection=ATTENDANCE_FIELDS + ["name"],
+                       filter_expression=ATTENDANCE_RECORD_FILTER)
     
-    # Augment records with the student's name
-    student_response = students_table.scan()
-    student_mapping = {student["id"].lower(): student.get("name", "N/A") for student in student_response.get("Items", [])}
+    # Augment records with the student's name from the student directory; IDs match
+    # case-insensitively, as they always have here
+    students = student_directory.get_many(
+        (record["student_id"] for record in records if record.get("student_id") and not record.get("name")),
+        ignore_case=True
+    )
     
     for record in records:
-        student_id = record.get("student_id", "").lower()
-        record["name"] = record.get("name") or student_mapping.get(student_id, "N/A")
+        student = students.get(record.get("student_id", ""), {})
+        record["name"] = record.get("name") or student.get("name", "N/A")
     
     # Aggregate attendance counts per date
     summary = {}
@@ -556,30 +720,88 @@ def export_attendance():
     if "user_id" not in session or session.get("role") != "teacher":
         return redirect(url_for("login", role="teacher"))
     
-    response = attendance_table.scan()
-    records = response.get("Items", [])
-    
-    si = StringIO()
-    csv_writer = csv.writer(si)
-    header = ["id", "student_id", "timestamp", "date", "status"]
-    csv_writer.writerow(header)
-    for record in records:
-        csv_writer.writerow([
-            record.get("id", ""),
-            record.get("student_id", ""),
-            record.get("timestamp", ""),
-            record.get("date", ""),
-            record.get("status", "")
-        ])
-    output = si.getvalue()
-    si.close()
-    
+    # Optional filters: ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&student_id=...
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    student_id = request.args.get("student_id")
+    # Compress only when asked for (?gzip=1) and the client can decode it
+    use_gzip = request.args.get("gzip") == "1" and request.accept_encodings["gzip"] > 0
+
+    headers = {"Content-disposition": "attachment; filename=attendance_records.csv"}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+
     return Response(
-        output,
+        generate_attendance_csv(attendance_pages(start_date, end_date, student_id), use_gzip),
         mimetype="text/csv",
-        headers={"Content-disposition": "attachment; filename=attendance_records.csv"}
+        headers=headers
     )
 
+def attendance_pages(start_date=None, end_date=None, student_id=None):
+    # A single student's history comes from the student_id GSI; everything else is a
+    # parallel scan with the date filter evaluated inside DynamoDB.
+    if student_id:
+        condition = Key("student_id").eq(student_id)
+        if start_date and end_date:
+            condition = condition & Key("date").between(start_date, end_date)
+        elif start_date:
+            condition = condition & Key("date").gte(start_date)
+        elif end_date:
+            condition = condition & Key("date").lte(end_date)
+        projection, names = build_projection(ATTENDANCE_FIELDS)
+        return query_pages(
+            attendance_table,
+            IndexName="student_id-index",
+            KeyConditionExpression=condition,
+            ProjectionExpression=projection,
+            ExpressionAttributeNames=names
+        )
+
+    record_filter = ATTENDANCE_RECORD_FILTER
+    if start_date and end_date:
+        record_filter = record_filter & Attr("date").between(start_date, end_date)
+    elif start_date:
+        record_filter = record_filter & Attr("date").gte(start_date)
+    elif end_date:
+        record_filter = record_filter & Attr("date").lte(end_date)
+    return scan_pages(attendance_table, projection=ATTENDANCE_FIELDS, filter_expression=record_filter)
+
+def generate_attendance_csv(pages, use_gzip=False, flush_bytes=64 * 1024):
+    # Write CSV rows page by page as the scan advances, yielding roughly flush_bytes at
+    # a time so only the current page and one output chunk are ever held in memory.
+    compressor = zlib.compressobj(wbits=31) if use_gzip else None  # wbits=31 -> gzip container
+    si = StringIO()
+    csv_writer = csv.writer(si)
+
+    def drain(final=False):
+        data = si.getvalue().encode()
+        si.seek(0)
+        si.truncate(0)
+        if compressor:
+            data = compressor.compress(data)
+            if final:
+                data += compressor.flush()
+        return data
+
+    csv_writer.writerow(ATTENDANCE_FIELDS)
+    for page in pages:
+        for record in page:
+            csv_writer.writerow([
+                record.get("id", ""),
+                record.get("student_id", ""),
+                record.get("timestamp", ""),
+                record.get("date", ""),
+                record.get("status", "")
+            ])
+        if si.tell() >= flush_bytes:
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    chunk = drain(final=True)
+    if chunk:
+        yield chunk
+
 # ----------------------
 # 7. Logout Endpoint
 # ----------------------
@@ -589,48 +811,107 @@ def logout_user():
     session.clear()
     return redirect(url_for('login', role=role))
 
+# ----------------------
+# 8. Cache and Dispatcher Metrics
+# ----------------------
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "student_directory": student_directory.snapshot_stats(),
+        "notifications": dict(notifier.stats),
+        "upload_normalisation": image_preprocessing.snapshot_stats(),
+        "password_hashing": password_hashing.snapshot_stats(),
+        "attendance_events": dict(attendance_events.stats, subscribers=attendance_events.subscriber_count()),
+        "recognition_cache": face_matcher.snapshot_stats() if hasattr(face_matcher, "snapshot_stats") else {},
+        "response_cache": response_cache.snapshot_stats()
+    })
+
+# ----------------------
+# 9. Live Attendance Feed (Teacher-only, Server-Sent Events)
+# ----------------------
+@app.route("/attendance_stream", methods=["GET"])
+def attendance_stream():
+    # Streams "attendance_marked" and "present_count" events as students are marked, so
+    # open dashboards update without polling. Each open stream holds one worker thread;
+    # run behind a threaded or async worker class in production.
+    if "user_id" not in session or session.get("role") != "teacher":
+        return redirect(url_for("login", role="teacher"))
+
+    return Response(
+        attendance_events.stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ----------------------
+# 10. Attendance History API (cursor-paginated)
+# ----------------------
+@app.route("/attendance_history", methods=["GET"])
+def attendance_history():
+    # Students page through their own history; teachers pass ?student_id=.
+    # ?limit=N (max 100) and ?cursor=<next_cursor from the previous page>.
+    if "user_id" not in session:
+        return jsonify({"message": "Login required."}), 401
+    if session.get("role") == "teacher":
+        student_id = request.args.get("student_id")
+        if not student_id:
+            return jsonify({"message": "student_id is required."}), 400
+    else:
+        student_id = session["user_id"]
+
+    try:
+        limit = min(max(int(request.args.get("limit", HISTORY_PAGE_SIZE)), 1), HISTORY_MAX_PAGE_SIZE)
+        records, next_cursor = attendance_history_page(student_id, limit, request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"message": "Invalid limit or cursor."}), 400
+    except Exception as e:
+        logging.error("Error reading attendance history for %s: %s", student_id, e)
+        return jsonify({"message": "Failed to load attendance history."}), 500
+
+    return jsonify({"records": records, "next_cursor": next_cursor})
+
 @app.route("/dashboard_data", methods=["GET"])
 def dashboard_data():
+    # ?range=daily|weekly|monthly (weekly labels are ISO weeks, e.g. "2025-W05"),
+    # optional ?start_date=&end_date= window and ?student_id= or ?class= filters.
+    time_range = request.args.get("range", "daily")  # Default to daily if no range is provided
+    if time_range not in GRANULARITIES:
+        return jsonify({"error": "range must be daily, weekly or monthly"}), 400
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    student_id = request.args.get("student_id")
+    class_name = request.args.get("class")
     try:
-        # Step 1: Retrieve all attendance records from the database
-        response = attendance_table.scan()  # Replace with your table scan logic
-        records = response.get("Items", [])
-
-        # Step 2: Get the requested time range (daily, weekly, monthly) from query parameters
-        time_range = request.args.get("range", "daily")  # Default to daily if no range is provided
-
-        # Step 3: Aggregate attendance data based on the requested range
-        attendance_summary = defaultdict(int)
-        for record in records:
-            if record.get("status") == "Present":  # Filter records for "Present" status
-                attendance_date = record.get("date")  # Expected format: 'YYYY-MM-DD'
-
-                if time_range == "daily":
-                    # Aggregate by exact date (daily)
-                    attendance_summary[attendance_date] += 1
-                elif time_range == "weekly":
-                    # Aggregate by ISO week number
-                    week_number = datetime.strptime(attendance_date, "%Y-%m-%d").isocalendar()[1]
-                    attendance_summary[f"Week {week_number}"] += 1
-                elif time_range == "monthly":
-                    # Aggregate by month (YYYY-MM format)
-                    month = attendance_date[:7]  # Extract 'YYYY-MM'
-                    attendance_summary[month] += 1
-
-        # Step 4: Sort aggregated data for proper chart rendering
-        sorted_keys = sorted(attendance_summary.keys())  # E.g., ['2025-04-23', '2025-04-24', ...] for daily
-        trend_labels = sorted_keys
-        attendance_trend = [attendance_summary[key] for key in sorted_keys]
-
-        # Step 5: Return aggregated data as JSON
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameters: {e}"}), 400
+
+    aggregator = record_aggregator if (student_id or class_name) else day_aggregator
+
+    def render():
+        # Aggregates are memoised per data version as well, so a response cache miss
+        # for a new parameter combination still reuses the loaded columns
+        trend_labels, attendance_trend = aggregator.aggregate(
+            data_version.version(), time_range, start_date, end_date, student_id, class_name
+        )
+
         return jsonify({
-            "trendLabels": trend_labels,  # Dates, weeks, or months
+            "trendLabels": trend_labels,  # Dates, ISO weeks, or months
             "attendanceTrend": attendance_trend  # Number of students marked "Present" for each period
         })
 
+    try:
+        # While a record reload is throttled the body reflects an older version; vary on
+        # it so that body is not cached (or ETagged) as the current data
+        served = aggregator.served_version(data_version.version())
+        return response_cache.respond(render, vary=(served,))
+
     except Exception as e:
         app.logger.error(f"Error in /dashboard_data: {e}")
         return jsonify({"error": "Failed to load data"}), 500
 
 if __name__ == "__main__":
+    start_background_services()
     app.run(debug=True)
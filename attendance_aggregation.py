@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+# ----------------------
+# Columnar Attendance Data
+# ----------------------
+# Attendance is held as parallel NumPy arrays: one datetime64[D] date, one int8 status
+# code, one student index and a weight per row. Rows loaded from attendance records have
+# weight 1; rows built from the day rollups carry that day's present count as the weight.
+# Statuses match exactly, as the day rollups do: only "Present" counts as present, so
+# filtered and unfiltered trends reconcile.
+STATUS_CODES = {"Present": 0, "Absent": 1}
+OTHER_STATUS = 2
+GRANULARITIES = ("daily", "weekly", "monthly")
+
+
+class AttendanceColumns:
+    def __init__(self, dates, statuses, student_index=None, students=None, student_classes=None, weights=None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.statuses = np.asarray(statuses, dtype=np.int8)
+        self.student_index = (np.asarray(student_index, dtype=np.int32) if student_index is not None
+                              else np.full(len(self.dates), -1, dtype=np.int32))
+        self.students = list(students or [])
+        self.student_lookup = {student: i for i, student in enumerate(self.students)}
+        self.weights = np.asarray(weights, dtype=np.int64) if weights is not None else None
+        self._bin_keys = {}
+        # Class of each student, as an index into self.classes (-1 when unknown)
+        classes = sorted({c for c in (student_classes or {}).values() if c})
+        self.classes = classes
+        class_lookup = {name: i for i, name in enumerate(classes)}
+        self.student_class = np.array(
+            [class_lookup.get((student_classes or {}).get(student), -1) for student in self.students],
+            dtype=np.int32
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def bin_keys(self, granularity):
+        # Integer bin key per row (day, ISO-week Monday or month number), computed once
+        # per granularity and kept with the columns
+        if granularity not in self._bin_keys:
+            if granularity == "daily":
+                keys = self.dates.astype(np.int64)
+            elif granularity == "weekly":
+                keys = iso_week_starts(self.dates)
+            elif granularity == "monthly":
+                keys = self.dates.astype("datetime64[M]").astype(np.int64)
+            else:
+                raise ValueError(f"Unknown granularity: {granularity}")
+            self._bin_keys[granularity] = keys
+        return self._bin_keys[granularity]
+
+    @classmethod
+    def from_day_counts(cls, counts):
+        # {"YYYY-MM-DD": present_count} from attendance_rollups.daily_counts
+        dates = list(counts.keys())
+        return cls(dates, np.zeros(len(dates), dtype=np.int8), weights=[counts[d] for d in dates])
+
+    @classmethod
+    def from_pages(cls, pages, classes_for=None):
+        # Attendance records page by page (e.g. dynamo_scan.scan_pages with projection
+        # id/student_id/date/status). Each page is converted to arrays as it arrives.
+        # classes_for(student_ids) -> {student_id: class} resolves the class filter.
+        students = {}
+        date_chunks, status_chunks, student_chunks = [], [], []
+        for page in pages:
+            dates, statuses, student_ids = [], [], []
+            for record in page:
+                if not record.get("date") or "status" not in record:
+                    continue  # Class statistics items share the table
+                dates.append(record["date"])
+                statuses.append(STATUS_CODES.get(record["status"], OTHER_STATUS))
+                student_id = record.get("student_id") or record.get("id")
+                student_ids.append(students.setdefault(student_id, len(students)))
+            if dates:
+                date_chunks.append(np.array(dates, dtype="datetime64[D]"))
+                status_chunks.append(np.array(statuses, dtype=np.int8))
+                student_chunks.append(np.array(student_ids, dtype=np.int32))
+
+        student_classes = classes_for(list(students)) if classes_for and students else {}
+        if not date_chunks:
+            return cls([], [], [], [], student_classes)
+        return cls(np.concatenate(date_chunks), np.concatenate(status_chunks),
+                   np.concatenate(student_chunks), list(students), student_classes)
+
+
+# ----------------------
+# Vectorised Binning
+# ----------------------
+def iso_week_starts(dates):
+    # Monday of each date's ISO week. Day 0 (1970-01-01) was a Thursday.
+    days = dates.astype(np.int64)
+    return days - (days + 3) % 7
+
+
+def iso_week_label(week_start):
+    # "YYYY-Www": the ISO year is the year of the week's Thursday
+    thursday = np.datetime64(int(week_start) + 3, "D")
+    year = thursday.astype("datetime64[Y]")
+    week = (thursday - year.astype("datetime64[D]")).astype(int) // 7 + 1
+    return f"{int(str(year)):04d}-W{week:02d}"
+
+
+def histogram(keys, weights, granularity):
+    # Bin integer keys from AttendanceColumns.bin_keys; returns (labels, counts) for
+    # non-empty bins, in chronological order
+    if len(keys) == 0:
+        return [], []
+    offset = keys.min()
+    counts = np.bincount(keys - offset, weights=weights, minlength=1)
+    bins = np.nonzero(counts)[0]
+    values = counts[bins].astype(np.int64).tolist()
+    keys = bins + offset
+
+    if granularity == "daily":
+        labels = [str(d) for d in keys.astype("datetime64[D]")]
+    elif granularity == "weekly":
+        labels = [iso_week_label(k) for k in keys]
+    else:
+        labels = [str(m) for m in keys.astype("datetime64[M]")]
+    return labels, values
+
+
+def aggregate(columns, granularity="daily", start_date=None, end_date=None,
+              student_id=None, class_name=None, status="Present"):
+    mask = columns.statuses == STATUS_CODES.get(status, OTHER_STATUS)
+    if start_date:
+        mask &= columns.dates >= np.datetime64(start_date, "D")
+    if end_date:
+        mask &= columns.dates <= np.datetime64(end_date, "D")
+    if student_id:
+        if student_id not in columns.student_lookup:
+            return [], []
+        mask &= columns.student_index == columns.student_lookup[student_id]
+    if class_name:
+        if class_name not in columns.classes:
+            return [], []
+        in_class = columns.student_class == columns.classes.index(class_name)
+        mask &= (columns.student_index >= 0) & in_class[np.maximum(columns.student_index, 0)]
+
+    keys = columns.bin_keys(granularity)
+    weights = columns.weights[mask] if columns.weights is not None else None
+    return histogram(keys[mask], weights, granularity)
+
+
+# ----------------------
+# Memoised Aggregator
+# ----------------------
+class AttendanceAggregator:
+    # Loads columns lazily through `loader(version)` and memoises both the columns and
+    # each aggregate per loaded version. A new version drops everything cached for the
+    # old one on the next call. With min_reload_seconds, columns are reloaded at most that
+    # often, so a busy write period does not trigger a reload per mark; until then the
+    # old columns are served under their own version (see served_version), so nothing
+    # derived from them is mistaken for the newer data. Concurrent requests for a version
+    # that is not loaded yet share one load: the first runs the loader, the rest wait on it.
+    def __init__(self, loader, max_results=256, min_reload_seconds=0):
+        self.loader = loader
+        self.max_results = max_results
+        self.min_reload_seconds = min_reload_seconds
+        self._version = None
+        self._columns = None
+        self._loaded_at = 0.0
+        self._results = OrderedDict()
+        self._loading = {}  # version -> Future of (columns, version) for loads in flight
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "hits": 0, "misses": 0}
+
+    def _throttled(self, version):
+        # Caller holds the lock
+        return (self._columns is not None and self._version != version
+                and time.monotonic() - self._loaded_at < self.min_reload_seconds)
+
+    def served_version(self, version):
+        # Version of the data a request at `version` is answered from: the loaded
+        # columns' version while a reload is throttled, otherwise `version` itself.
+        # Response caches key on this so a throttled answer is not stored as current.
+        with self._lock:
+            return self._version if self._throttled(version) else version
+
+    def columns(self, version):
+        # Returns (columns, loaded_version)
+        with self._lock:
+            if self._columns is not None and (self._version == version or self._throttled(version)):
+                return self._columns, self._version
+            pending = self._loading.get(version)
+            if pending is not None:
+                leader = False
+            else:
+                pending = self._loading[version] = Future()
+                leader = True
+        if not leader:
+            return pending.result()
+
+        try:
+            columns = self.loader(version)
+        except Exception as e:
+            with self._lock:
+                del self._loading[version]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[version]
+            self.stats["loads"] += 1
+            # A slower load of an older version must not replace a newer one
+            if self._version is None or version >= self._version:
+                self._version, self._columns = version, columns
+                self._loaded_at = time.monotonic()
+                self._results.clear()
+        pending.set_result((columns, version))
+        return columns, version
+
+    def aggregate(self, version, granularity="daily", start_date=None, end_date=None,
+                  student_id=None, class_name=None, status="Present"):
+        columns, loaded_version = self.columns(version)
+        key = (loaded_version, granularity, start_date, end_date, student_id, class_name, status)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._results[key]
+        result = aggregate(columns, granularity, start_date, end_date, student_id, class_name, status)
+        with self._lock:
+            self.stats["misses"] += 1
+            if self._version == loaded_version:
+                self._results[key] = result
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        return result
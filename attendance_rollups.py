@@ -0,0 +1,113 @@
+import logging
+import sys
+from collections import defaultdict
+
+from boto3.dynamodb.conditions import Key, Attr
+
+from aws_clients import get_resource
+from dynamo_scan import scan_items
+
+# ----------------------
+# Rollup Table Layout
+# ----------------------
+# One small item per day holding the number of "Present" marks for that date:
+#   kind = "day", period = "YYYY-MM-DD", present_count = N
+# Weekly and monthly buckets are derived from the day items on read
+# (see attendance_aggregation).
+# One item per student per month for the student dashboard:
+#   kind = "student#<student_id>", period = "YYYY-MM", present_count = N
+ROLLUPS_TABLE_NAME = "attendance-rollups"
+DAY_KIND = "day"
+STUDENT_KIND_PREFIX = "student#"
+
+
+def student_kind(student_id):
+    return f"{STUDENT_KIND_PREFIX}{student_id}"
+
+
+def record_marks(rollups_table, date, present=1):
+    # Atomically add `present` marks to the day's rollup and return the new count.
+    response = rollups_table.update_item(
+        Key={"kind": DAY_KIND, "period": date},
+        UpdateExpression="ADD present_count :p",
+        ExpressionAttributeValues={":p": present},
+        ReturnValues="UPDATED_NEW"
+    )
+    return int(response.get("Attributes", {}).get("present_count", present))
+
+
+def record_student_mark(rollups_table, student_id, date, present=1):
+    # Atomically add to the student's monthly count; `date` is YYYY-MM-DD.
+    rollups_table.update_item(
+        Key={"kind": student_kind(student_id), "period": date[:7]},
+        UpdateExpression="ADD present_count :p",
+        ExpressionAttributeValues={":p": present}
+    )
+
+
+def student_month_count(rollups_table, student_id, month):
+    # Present marks for one student in one month (YYYY-MM); a single small GetItem.
+    response = rollups_table.get_item(
+        Key={"kind": student_kind(student_id), "period": month},
+        ProjectionExpression="present_count"
+    )
+    return int(response.get("Item", {}).get("present_count", 0))
+
+
+def daily_counts(rollups_table, start_date=None, end_date=None):
+    # Return {date: present_count} for every day rollup, optionally within a date range.
+    condition = Key("kind").eq(DAY_KIND)
+    if start_date and end_date:
+        condition = condition & Key("period").between(start_date, end_date)
+    elif start_date:
+        condition = condition & Key("period").gte(start_date)
+    elif end_date:
+        condition = condition & Key("period").lte(end_date)
+
+    kwargs = {"KeyConditionExpression": condition}
+    counts = {}
+    while True:
+        response = rollups_table.query(**kwargs)
+        for item in response.get("Items", []):
+            counts[item["period"]] = int(item.get("present_count", 0))
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return counts
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+# ----------------------
+# Backfill
+# ----------------------
+def backfill(attendance_table, rollups_table):
+    # Rebuild every day and student-month rollup from the attendance table. Values are
+    # written with SET semantics (put_item), so running the backfill twice gives the same
+    # result. Run it before enabling write-through, or while no attendance is being marked.
+    counts = defaultdict(int)
+    student_counts = defaultdict(int)
+    for record in scan_items(attendance_table, projection=["date", "student_id"],
+                             filter_expression=Attr("status").eq("Present")):
+        if record.get("date"):
+            counts[record["date"]] += 1
+            if record.get("student_id"):
+                student_counts[(record["student_id"], record["date"][:7])] += 1
+
+    with rollups_table.batch_writer() as batch:
+        for date, count in counts.items():
+            batch.put_item(Item={"kind": DAY_KIND, "period": date, "present_count": count})
+        for (student_id, month), count in student_counts.items():
+            batch.put_item(Item={"kind": student_kind(student_id), "period": month, "present_count": count})
+
+    logging.info("Backfilled %d day rollups and %d student-month rollups", len(counts), len(student_counts))
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("Usage: python attendance_rollups.py backfill")
+        sys.exit(1)
+
+    dynamodb = get_resource("dynamodb")
+    result = backfill(dynamodb.Table("attendance"), dynamodb.Table(ROLLUPS_TABLE_NAME))
+    print(f"Backfilled {len(result)} days, {sum(result.values())} present marks.")
@@ -0,0 +1,49 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# ----------------------
+# Shared AWS Client Factory
+# ----------------------
+# One boto3 session per process, and one client/resource per (service, region), so
+# credential resolution, endpoint setup and TLS connections are reused across calls.
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50"))
+MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "5"))
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+    tcp_keepalive=True
+)
+
+session = boto3.session.Session()
+_clients = {}
+_resources = {}
+# boto3 sessions are not thread-safe when creating clients, so creation is serialised
+_lock = threading.Lock()
+
+
+def get_client(service, region_name=None):
+    key = (service, region_name)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = session.client(service, region_name=region_name, config=CLIENT_CONFIG)
+                _clients[key] = client
+    return client
+
+
+def get_resource(service, region_name=None):
+    key = (service, region_name)
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                resource = session.resource(service, region_name=region_name, config=CLIENT_CONFIG)
+                _resources[key] = resource
+    return resource
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ----------------------
+# Rate Limiting
+# ----------------------
+class TokenBucket:
+    # Allows `rate` acquisitions per second on average with bursts of up to `burst`.
+    # A rate of 0 disables limiting (e.g. for the local embedding matcher).
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# ----------------------
+# Checkpoint Manifest
+# ----------------------
+class CheckpointManifest:
+    # Append-only JSON-lines log of processed objects: {"key", "etag", "user_id"}.
+    # A key is skipped on the next run only if its ETag is unchanged, so replaced images
+    # are reprocessed. Lines are flushed as they are written; a torn last line from a
+    # crash is ignored on load. user_id is kept for auditing only: students are
+    # de-duplicated within one run and one date, never across runs.
+    def __init__(self, path):
+        self.path = path
+        self.etags = {}
+        self.users = set()  # (date, user_id) marked during this run
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.etags[entry["key"]] = entry["etag"]
+        self._handle = open(path, "a") if path else None
+
+    def done(self, key, etag):
+        return self.etags.get(key) == etag
+
+    def claim_user(self, user_id):
+        # True the first time a user is seen in this run for today's date (the date
+        # mark_attendance writes under)
+        claim = (time.strftime("%Y-%m-%d"), user_id)
+        with self._lock:
+            if claim in self.users:
+                return False
+            self.users.add(claim)
+            return True
+
+    def release_user(self, user_id):
+        with self._lock:
+            self.users.discard((time.strftime("%Y-%m-%d"), user_id))
+
+    def record(self, key, etag, user_id=None):
+        with self._lock:
+            self.etags[key] = etag
+            if self._handle:
+                self._handle.write(json.dumps({"key": key, "etag": etag, "user_id": user_id}) + "\n")
+                self._handle.flush()
+
+    def close(self):
+        if self._handle:
+            self._handle.close()
+
+
+# ----------------------
+# Stage Counters
+# ----------------------
+class StageStats:
+    # Per-stage item counts and busy seconds, e.g. list / throttle / recognise / mark.
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds=0.0, count=1):
+        with self._lock:
+            self.counts[stage] += count
+            self.seconds[stage] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "elapsed_seconds": round(elapsed, 2),
+                "stages": {
+                    stage: {
+                        "count": self.counts[stage],
+                        "seconds": round(self.seconds[stage], 2),
+                        "per_second": round(self.counts[stage] / elapsed, 1) if elapsed else 0.0
+                    }
+                    for stage in self.counts
+                }
+            }
+
+    def report(self):
+        snapshot = self.snapshot()
+        parts = [f"{stage}={values['count']} ({values['per_second']}/s, {values['seconds']}s busy)"
+                 for stage, values in snapshot["stages"].items()]
+        return f"[{snapshot['elapsed_seconds']}s] " + ", ".join(parts)
+
+
+# ----------------------
+# Pipeline
+# ----------------------
+def list_objects(s3, bucket_name, prefix="", stats=None):
+    # Yields every object in the bucket, following continuation tokens past 1000 keys.
+    pages = iter(s3.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix))
+    while True:
+        started = time.monotonic()
+        page = next(pages, None)
+        if page is None:
+            return
+        contents = page.get("Contents", [])
+        if stats:
+            stats.add("list", time.monotonic() - started, len(contents))
+        for obj in contents:
+            yield obj
+
+
+def recognise_object(bucket_name, obj, matcher, mark, limiter, manifest, stats):
+    image_name = obj["Key"]
+    stats.add("throttle", limiter.acquire(), 0)
+
+    started = time.monotonic()
+    face_matches = matcher.search({"S3Object": {"Bucket": bucket_name, "Name": image_name}}, max_faces=1)
+    stats.add("recognise", time.monotonic() - started)
+
+    user_id = None
+    if face_matches:
+        user_id = face_matches[0]["Face"]["ExternalImageId"]
+        # Each student is marked once per archive, however many photos they appear in
+        if manifest.claim_user(user_id):
+            started = time.monotonic()
+            try:
+                mark(user_id, "present")
+            except Exception:
+                manifest.release_user(user_id)
+                raise
+            stats.add("mark", time.monotonic() - started)
+        else:
+            stats.add("duplicate_user")
+    else:
+        stats.add("no_match")
+    manifest.record(image_name, obj.get("ETag"), user_id)
+    return user_id
+
+
+def run(s3, bucket_name, matcher, mark, workers=16, tps=0, manifest_path=None, prefix="",
+        report_every=30):
+    # Lists the bucket page by page and fans recognition out over `workers` threads,
+    # keeping at most workers * 4 objects in flight. Returns the final stage snapshot.
+    stats = StageStats()
+    limiter = TokenBucket(tps)
+    manifest = CheckpointManifest(manifest_path)
+    pending = set()
+    next_report = time.monotonic() + report_every
+
+    def collect(done_futures):
+        for future in done_futures:
+            try:
+                future.result()
+            except Exception as e:
+                stats.add("error")
+                logging.error(f"Error processing {future.key}: {str(e)}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for obj in list_objects(s3, bucket_name, prefix, stats):
+                if manifest.done(obj["Key"], obj.get("ETag")):
+                    stats.add("skipped")
+                    continue
+                future = executor.submit(recognise_object, bucket_name, obj, matcher, mark,
+                                         limiter, manifest, stats)
+                future.key = obj["Key"]
+                pending.add(future)
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                if time.monotonic() >= next_report:
+                    print(stats.report())
+                    next_report += report_every
+            collect(wait(pending).done)
+    finally:
+        manifest.close()
+    print(stats.report())
+    return stats.snapshot()
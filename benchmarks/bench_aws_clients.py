@@ -0,0 +1,75 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for name, value in (("AWS_ACCESS_KEY_ID", "bench"), ("AWS_SECRET_ACCESS_KEY", "bench"), ("AWS_DEFAULT_REGION", "ap-south-1")):
+    os.environ.setdefault(name, value)
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+import aws_clients
+import mark_attendance
+
+# ----------------------
+# Per-record cost of client creation vs the shared factory
+# ----------------------
+# Processes EVENTS attendance events through the batch marking path with every HTTP
+# request answered in-process (a before-send hook), so the numbers isolate client
+# creation and request-building overhead from network time. "before" builds a new
+# boto3 client per call, as mark_attendance.py used to; "after" runs the real
+# mark_attendance.mark_attendance on the shared factory clients.
+EVENTS = int(os.environ.get("BENCH_EVENTS", "10000"))
+
+
+class _Raw(io.BytesIO):
+    def stream(self, **kwargs):
+        yield self.getvalue()
+
+
+def fake_send(request, **kwargs):
+    operation = request.headers.get("X-Amz-Target", b"")
+    operation = operation.decode() if isinstance(operation, bytes) else operation
+    body = {}
+    if operation.endswith("GetItem"):
+        body = {"Item": {"name": {"S": "Bench Student"}, "present_count": {"N": "1"}, "absent_count": {"N": "0"}}}
+    payload = json.dumps(body).encode()
+    return AWSResponse(request.url, 200, {"Content-Type": "application/x-amz-json-1.0"}, _Raw(payload))
+
+
+def before(user_id):
+    # The old pattern: a fresh client for each of the four DynamoDB calls per event
+    for operation in ("get_item", "put_item", "get_item", "put_item"):
+        client = boto3.client("dynamodb", region_name="ap-south-1")
+        key = {"id": {"S": user_id}, "date": {"S": "2025-01-01"}}
+        if operation == "get_item":
+            client.get_item(TableName="attendance", Key=key)
+        else:
+            client.put_item(TableName="attendance", Item=dict(key, status={"S": "present"}))
+
+
+def after(user_id):
+    mark_attendance.mark_attendance(user_id, "present")
+
+
+def run(name, handler):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(EVENTS):
+            handler(f"S{index:05d}")
+    elapsed = time.perf_counter() - start
+    print(f"{name:<7} {elapsed:7.2f} s total, {elapsed / EVENTS * 1000:7.3f} ms per record")
+
+
+if __name__ == "__main__":
+    boto3.setup_default_session()
+    boto3.DEFAULT_SESSION.events.register("before-send.dynamodb", fake_send)
+    aws_clients.session.events.register("before-send.dynamodb", fake_send)
+
+    print(f"{EVENTS} attendance events, max_pool_connections={aws_clients.MAX_POOL_CONNECTIONS}")
+    run("before", before)
+    run("after", after)
@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_tracks import FaceTracker, IdentityResolver
+
+# ----------------------
+# Recognition calls per frame vs per track
+# ----------------------
+# PEOPLE synthetic faces walk across a 1280x720 view at staggered times over SECONDS of
+# 30 FPS video, with jittered boxes and occasional missed detections. Recognition sleeps
+# RECOGNITION_MS and answers with the person's ID. Per-frame recognition would call the
+# backend once per face per frame; the tracker should call it about once per person.
+PEOPLE = int(os.environ.get("BENCH_PEOPLE", "12"))
+SECONDS = int(os.environ.get("BENCH_SECONDS", "30"))
+RECOGNITION_MS = float(os.environ.get("BENCH_RECOGNITION_MS", "150"))
+FPS = 30
+MISS_RATE = 0.05
+
+
+def walkers(rng):
+    people = []
+    for person in range(PEOPLE):
+        start = rng.uniform(0, SECONDS * 0.7)
+        people.append({"id": f"S{person:05d}", "start": start, "duration": rng.uniform(4, 8),
+                       "y": rng.randrange(100, 500), "size": rng.randrange(120, 200)})
+    return people
+
+
+def boxes_at(people, t, rng):
+    boxes = []
+    for person in people:
+        progress = (t - person["start"]) / person["duration"]
+        if not 0 <= progress <= 1 or rng.random() < MISS_RATE:
+            continue
+        left = int(progress * (1280 - person["size"])) + rng.randrange(-4, 5)
+        top = person["y"] + rng.randrange(-4, 5)
+        boxes.append(((left, top, left + person["size"], top + person["size"]), person["id"]))
+    return boxes
+
+
+if __name__ == "__main__":
+    rng = random.Random(3)
+    people = walkers(rng)
+    marked = []
+
+    def recognise(person_id):
+        time.sleep(RECOGNITION_MS / 1000)
+        return person_id, f"Student {person_id}"
+
+    tracker = FaceTracker()
+    resolver = IdentityResolver(recognise, on_identified=lambda track: marked.append(track.identity))
+    face_frames = 0
+    start = time.perf_counter()
+    for frame in range(SECONDS * FPS):
+        detections = boxes_at(people, frame / FPS, rng)
+        face_frames += len(detections)
+        tracks = tracker.update([box for box, _ in detections])
+        owners = {box: person_id for box, person_id in detections}
+        for track in tracks:
+            if track.identity is None:
+                resolver.request(track, owners[track.box])
+    resolver.shutdown()
+    elapsed = time.perf_counter() - start
+
+    print(f"{PEOPLE} people, {SECONDS * FPS} frames, {face_frames} face detections in {elapsed:.2f} s")
+    print(f"per-frame recognition would make {face_frames} calls; tracked made {resolver.stats['requests']} "
+          f"({resolver.stats['requests'] / (SECONDS / 60):.0f}/min), tracks {tracker.stats}")
+    print(f"marked {len(marked)} identifications for {len(set(marked))} distinct students")
+    assert set(marked) == {person["id"] for person in people}, "someone was never identified"
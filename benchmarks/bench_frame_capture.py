@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from frame_capture import FrameCapture
+from frame_sources import open_source
+
+# ----------------------
+# Frame staleness: serial reads vs the capture ring buffer
+# ----------------------
+# FRAMES synthetic frames (the frame number is encoded in the pixels) are replayed at
+# SOURCE_FPS while the "processing" step sleeps PROCESS_MS per frame. The serial loop
+# reads frames in order, as a camera driver queue would deliver them, so lag builds up;
+# the capture thread always hands over the newest frame. Lag is how many frames the
+# processed frame is behind the source at processing time.
+FRAMES = int(os.environ.get("BENCH_FRAMES", "150"))
+SOURCE_FPS = float(os.environ.get("BENCH_SOURCE_FPS", "30"))
+PROCESS_MS = float(os.environ.get("BENCH_PROCESS_MS", "80"))
+
+
+def write_frames(path):
+    for index in range(FRAMES):
+        frame = np.full((120, 160, 3), index % 256, dtype=np.uint8)
+        cv2.imwrite(os.path.join(path, f"{index:05d}.png"), frame)
+
+
+def lag_of(frame, started):
+    expected = int((time.monotonic() - started) * SOURCE_FPS)
+    return max(0, expected - int(frame[0, 0, 0]))
+
+
+def serial(path):
+    source = open_source(path)
+    started = time.monotonic()
+    lags = []
+    while True:
+        # A driver queue delivers frames in order, never faster than the source produces them
+        wait = started + len(lags) / SOURCE_FPS - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        ok, frame = source.read()
+        if not ok or time.monotonic() - started > FRAMES / SOURCE_FPS:
+            break
+        lags.append(lag_of(frame, started))
+        time.sleep(PROCESS_MS / 1000)
+    return lags, {"processed": len(lags)}
+
+
+def threaded(path):
+    capture = FrameCapture(path, pace=True).start()
+    started = time.monotonic()
+    lags = []
+    while True:
+        ok, frame = capture.latest()
+        if not ok:
+            break
+        lags.append(lag_of(frame, started))
+        time.sleep(PROCESS_MS / 1000)
+    capture.release()
+    return lags, capture.snapshot_stats()
+
+
+if __name__ == "__main__":
+    path = tempfile.mkdtemp()
+    write_frames(path)
+    print(f"{FRAMES} frames at {SOURCE_FPS:.0f} FPS, {PROCESS_MS:.0f} ms processing per frame")
+    for name, loop in (("serial", serial), ("threaded", threaded)):
+        lags, stats = loop(path)
+        print(f"{name:<8} mean lag {sum(lags) / len(lags):5.1f} frames, max lag {max(lags):3d} frames, {stats}")
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+import liveness_detection
+from frame_sources import open_source
+
+# ----------------------
+# Liveness face location: full detection vs detect-every-N + tracking
+# ----------------------
+# Usage: python benchmarks/bench_liveness.py <video file or frame directory>
+# Needs dlib and the 68-point model (LIVENESS_PREDICTOR_PATH). Runs each mode headless
+# over the same frames and reports FPS. Accuracy is measured against full-frame
+# detection: mean IoU of the face boxes, mean landmark displacement in pixels, and the
+# share of frames where only one mode found a face.
+MODES = [("full", 1, 1.0), ("fast", liveness_detection.DETECT_EVERY, liveness_detection.DETECT_SCALE)]
+MAX_FRAMES = int(os.environ.get("BENCH_MAX_FRAMES", "600"))
+
+
+def iou(a, b):
+    left, top = max(a.left(), b.left()), max(a.top(), b.top())
+    right, bottom = min(a.right(), b.right()), min(a.bottom(), b.bottom())
+    inter = max(0, right - left) * max(0, bottom - top)
+    union = a.area() + b.area() - inter
+    return inter / union if union else 0.0
+
+
+def run_mode(source, detect_every, scale):
+    detector, predictor = liveness_detection.load_models()
+    locator = liveness_detection.FaceLocator(detector, detect_every, scale)
+    camera = open_source(source)
+    results = []
+    start = time.perf_counter()
+    while len(results) < MAX_FRAMES:
+        ret, frame = camera.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        face = locator.locate(gray)
+        landmarks = predictor(gray, face) if face is not None else None
+        points = [(p.x, p.y) for p in landmarks.parts()] if landmarks is not None else None
+        results.append((face, points))
+    elapsed = time.perf_counter() - start
+    camera.release()
+    return results, elapsed, locator.stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/bench_liveness.py <video file or frame directory>")
+        sys.exit(1)
+
+    liveness_detection.load_models()  # Exclude model loading from the timings
+    runs = {}
+    for name, detect_every, scale in MODES:
+        results, elapsed, stats = run_mode(sys.argv[1], detect_every, scale)
+        runs[name] = results
+        print(f"{name:<5} detect_every={detect_every} scale={scale}: {len(results)} frames, "
+              f"{len(results) / elapsed:6.1f} FPS, {stats}")
+
+    ious, displacements, disagreements = [], [], 0
+    for (full_face, full_points), (fast_face, fast_points) in zip(runs["full"], runs["fast"]):
+        if (full_face is None) != (fast_face is None):
+            disagreements += 1
+            continue
+        if full_face is None:
+            continue
+        ious.append(iou(full_face, fast_face))
+        displacements.append(sum(((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+                                 for (x1, y1), (x2, y2) in zip(full_points, fast_points)) / len(full_points))
+    frames = len(runs["full"])
+    if ious:
+        print(f"accuracy vs full: mean IoU {sum(ious) / len(ious):.3f}, "
+              f"mean landmark error {sum(displacements) / len(displacements):.1f} px, "
+              f"face found by one mode only on {disagreements / frames:.1%} of frames")
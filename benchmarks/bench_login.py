@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+
+import password_hashing
+
+# ----------------------
+# Login burst: 500 concurrent password checks
+# ----------------------
+# Simulates the start-of-term burst by running CONCURRENCY password verifications at
+# once from request-like threads. It compares checking inline on those threads (the old
+# /login behaviour) with dispatching to the bcrypt process pool, and reports throughput
+# and p50/p95/p99 latency for each.
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "500"))
+ROUNDS = int(os.environ.get("BENCH_BCRYPT_ROUNDS", "10"))
+REQUEST_THREADS = int(os.environ.get("BENCH_REQUEST_THREADS", "64"))
+
+
+def burst(check):
+    password = "correct horse battery staple"
+    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(ROUNDS)).decode()
+
+    def one_login(_):
+        start = time.perf_counter()
+        assert check(password, password_hash)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as request_threads:
+        latencies = list(request_threads.map(one_login, range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    return CONCURRENCY / elapsed, latencies
+
+
+def report(name, throughput, latencies):
+    print(f"{name:<8} {throughput:8.1f} logins/s   "
+          f"p50 {password_hashing.percentile(latencies, 0.50):8.1f} ms   "
+          f"p95 {password_hashing.percentile(latencies, 0.95):8.1f} ms   "
+          f"p99 {password_hashing.percentile(latencies, 0.99):8.1f} ms")
+
+
+if __name__ == "__main__":
+    print(f"{CONCURRENCY} logins, cost {ROUNDS}, {REQUEST_THREADS} request threads, "
+          f"{password_hashing.POOL_SIZE} pool workers")
+    report("inline", *burst(lambda p, h: bcrypt.checkpw(p.encode(), h.encode())))
+    password_hashing.verify_password("warm", bcrypt.hashpw(b"warm", bcrypt.gensalt(4)).decode())  # Start the pool
+    report("pool", *burst(password_hashing.verify_password))
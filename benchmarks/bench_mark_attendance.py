@@ -0,0 +1,76 @@
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+import app as attendance_app
+from data_version import DataVersion
+from fakes import FakeDynamoResource, FakeRekognition
+from face_matcher import RekognitionMatcher
+from student_directory import StudentDirectory
+
+# ----------------------
+# /mark_attendance latency for multi-face matches
+# ----------------------
+# Runs the real Flask route against in-process DynamoDB and Rekognition stand-ins with a
+# fixed per-call latency, and reports end-to-end latency and DynamoDB calls per request.
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "10")) / 1000
+RUNS = int(os.environ.get("BENCH_RUNS", "5"))
+MATCH_COUNTS = (1, 10, 50)
+
+
+def install_fakes(student_ids):
+    dynamodb = FakeDynamoResource(latency=LATENCY_SECONDS)
+    attendance_app.dynamodb = dynamodb
+    attendance_app.students_table = dynamodb.Table("Students-Table")
+    attendance_app.attendance_table = dynamodb.Table("attendance")
+    attendance_app.rollups_table = dynamodb.Table("attendance-rollups")
+    attendance_app.data_version = DataVersion(attendance_app.rollups_table, ttl_seconds=5)
+    attendance_app.response_cache.data_version = attendance_app.data_version
+    attendance_app.face_matcher = RekognitionMatcher(
+        FakeRekognition(latency=LATENCY_SECONDS, matches=student_ids), attendance_app.REKOGNITION_COLLECTION
+    )
+    attendance_app.send_sms = lambda phone_number, message: None
+    attendance_app.student_directory = StudentDirectory(attendance_app.students_table, dynamodb)
+
+    for student_id in student_ids:
+        attendance_app.students_table.items[(student_id, None)] = {
+            "id": student_id, "name": f"Student {student_id}", "phone_number": "9000000000"
+        }
+    return dynamodb
+
+
+def run(match_count):
+    student_ids = [f"S{i:05d}" for i in range(match_count)]
+    dynamodb = install_fakes(student_ids)
+    client = attendance_app.app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = student_ids[0]
+        session["role"] = "student"
+
+    timings = []
+    for _ in range(RUNS):
+        # Start each run from an empty attendance table so the last-hour check passes
+        attendance_app.attendance_table.items.clear()
+        dynamodb.reset_calls()
+        start = time.perf_counter()
+        response = client.post("/mark_attendance", data={
+            "lat": str(attendance_app.CAMPUS_LAT),
+            "lon": str(attendance_app.CAMPUS_LON),
+            "face_image": (io.BytesIO(b"frame"), "frame.jpg"),
+        }, content_type="multipart/form-data")
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+
+    return statistics.median(timings), sum(dynamodb.calls.values()), dict(dynamodb.calls)
+
+
+if __name__ == "__main__":
+    print(f"Per-call latency: {LATENCY_SECONDS * 1000:.1f} ms, runs per case: {RUNS}")
+    for match_count in MATCH_COUNTS:
+        median, total_calls, calls = run(match_count)
+        print(f"{match_count:>3} matches: {median * 1000:8.1f} ms median, {total_calls:>3} DynamoDB calls {calls}")
@@ -0,0 +1,83 @@
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from face_matcher import RekognitionMatcher
+from fakes import FakeRekognition
+from recognition_cache import CachedMatcher
+
+# ----------------------
+# Recognition cache on a resubmission-heavy workload
+# ----------------------
+# STUDENTS distinct synthetic frames; each is submitted once, then RESUBMITS more times
+# as either the identical bytes or a re-encoded copy at a different JPEG quality. Reports
+# Rekognition calls and wall time with and without the cache, and checks that distinct
+# frames never share a cache entry and that near-duplicates are never served across
+# callers.
+STUDENTS = int(os.environ.get("BENCH_STUDENTS", "200"))
+RESUBMITS = int(os.environ.get("BENCH_RESUBMITS", "3"))
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "20")) / 1000
+
+
+def synthetic_frame(seed, quality=90):
+    rng = random.Random(seed)
+    image = Image.new("RGB", (640, 480), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(600), rng.randrange(440)
+        draw.ellipse((x, y, x + rng.randrange(40, 200), y + rng.randrange(40, 200)),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def workload():
+    rng = random.Random(7)
+    requests = []
+    for student in range(STUDENTS):
+        requests.append((student, synthetic_frame(student)))
+        for _ in range(RESUBMITS):
+            if rng.random() < 0.5:
+                requests.append((student, synthetic_frame(student)))
+            else:
+                requests.append((student, synthetic_frame(student, quality=rng.choice([70, 80, 95]))))
+    return requests
+
+
+def run(name, matcher, rekognition, requests):
+    start = time.perf_counter()
+    for student, data in requests:
+        rekognition.matches = [f"S{student:05d}"]
+        matches = matcher.search({"Bytes": data}, max_faces=1, scope=f"S{student:05d}")
+        assert matches[0]["Face"]["ExternalImageId"] == f"S{student:05d}", "cache returned another student's match"
+    elapsed = time.perf_counter() - start
+    print(f"{name:<9} {elapsed:6.2f} s, {rekognition.calls['SearchFacesByImage']} Rekognition calls "
+          f"for {len(requests)} searches")
+
+
+if __name__ == "__main__":
+    requests = workload()
+
+    rekognition = FakeRekognition(latency=LATENCY_SECONDS)
+    run("uncached", RekognitionMatcher(rekognition, "bench"), rekognition, requests)
+
+    rekognition = FakeRekognition(latency=LATENCY_SECONDS)
+    cached = CachedMatcher(RekognitionMatcher(rekognition, "bench"))
+    run("cached", cached, rekognition, requests)
+    print(f"          {cached.snapshot_stats()}")
+    assert rekognition.calls["SearchFacesByImage"] == STUDENTS, "near-duplicate frames were not reused"
+    print("OK: one Rekognition call per distinct frame")
+
+    # A re-encoded copy of student 0's frame submitted by someone else must reach the
+    # backend, not reuse student 0's match
+    rekognition.matches = ["S99999"]
+    matches = cached.search({"Bytes": synthetic_frame(0, quality=75)}, max_faces=1, scope="S99999")
+    assert matches[0]["Face"]["ExternalImageId"] == "S99999", "near-duplicate hit crossed callers"
+    print("OK: near-duplicate hits stay within one caller")
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("NOTIFICATION_TRANSPORT", "memory")
+
+from jinja2 import ChoiceLoader, DictLoader
+
+import app as attendance_app
+import attendance_rollups
+from data_version import DataVersion
+from fakes import FakeDynamoResource
+
+# ----------------------
+# Dashboard polling between writes
+# ----------------------
+# Polls each cached endpoint POLLS times three ways: plain GETs, conditional GETs with
+# the returned ETag, and after a data-version bump. Between writes a conditional poll
+# must be a 304 and no poll may touch DynamoDB beyond the (TTL-cached) watermark read.
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "5")) / 1000
+POLLS = int(os.environ.get("BENCH_POLLS", "200"))
+DAYS = 365
+ENDPOINTS = ("/dashboard_data?range=weekly", "/teacher_dashboard", "/attendance_summary")
+
+# The page templates are deployed separately; these stand-ins render the same context
+STAND_IN_TEMPLATES = {
+    "teacher_dashboard.html": "{{ username }} {{ trend_labels|tojson }} {{ attendance_counts|tojson }}",
+    "attendance_summary.html": "{{ summary|tojson }}{% for r in detailed_today %}<tr><td>{{ r.name }}</td></tr>{% endfor %}",
+}
+
+
+def seed():
+    dynamodb = FakeDynamoResource()
+    attendance_app.dynamodb = dynamodb
+    attendance_app.attendance_table = dynamodb.Table("attendance")
+    attendance_app.rollups_table = dynamodb.Table(attendance_rollups.ROLLUPS_TABLE_NAME)
+    attendance_app.data_version = DataVersion(attendance_app.rollups_table, ttl_seconds=5)
+    attendance_app.response_cache.data_version = attendance_app.data_version
+    today = datetime.now(timezone.utc).date()
+    for offset in range(DAYS):
+        day = (today - timedelta(days=offset)).isoformat()
+        attendance_rollups.record_marks(attendance_app.rollups_table, day, present=40 + offset % 7)
+        for student in range(40 if offset < 30 else 0):
+            attendance_app.attendance_table.put_item(Item={
+                "id": f"S{student:05d}_{day}", "student_id": f"S{student:05d}", "name": f"Student {student}",
+                "timestamp": f"{day}T09:00:00", "date": day, "status": "Present"
+            })
+    attendance_app.data_version.bump()
+    dynamodb.latency = LATENCY_SECONDS
+    return dynamodb
+
+
+def poll(client, url, headers=None):
+    start = time.perf_counter()
+    response = client.get(url, headers=headers or {})
+    return response, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    dynamodb = seed()
+    attendance_app.app.jinja_loader = ChoiceLoader([attendance_app.app.jinja_loader, DictLoader(STAND_IN_TEMPLATES)])
+    client = attendance_app.app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = "T00001"
+        session["username"] = "teacher"
+        session["role"] = "teacher"
+
+    for url in ENDPOINTS:
+        dynamodb.reset_calls()
+        first, first_ms = poll(client, url)
+        assert first.status_code == 200, (url, first.status_code)
+        etag = first.headers["ETag"]
+        first_calls = sum(dynamodb.calls.values())
+
+        dynamodb.reset_calls()
+        plain = [poll(client, url) for _ in range(POLLS)]
+        assert all(r.get_data() == first.get_data() for r, _ in plain)
+        plain_calls = sum(dynamodb.calls.values())
+
+        conditional = [poll(client, url, {"If-None-Match": etag}) for _ in range(POLLS)]
+        assert all(r.status_code == 304 for r, _ in conditional), "expected 304 between writes"
+        conditional_calls = sum(dynamodb.calls.values()) - plain_calls
+
+        attendance_app.data_version.bump()
+        changed, changed_ms = poll(client, url, {"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag, "bump did not invalidate"
+
+        plain_ms = sorted(ms for _, ms in plain)[POLLS // 2]
+        conditional_ms = sorted(ms for _, ms in conditional)[POLLS // 2]
+        print(f"{url:30s} render {first_ms:7.1f} ms ({first_calls} DynamoDB calls) | "
+              f"cached p50 {plain_ms:5.2f} ms, 304 p50 {conditional_ms:5.2f} ms "
+              f"({plain_calls + conditional_calls} calls over {2 * POLLS} polls) | after bump {changed_ms:7.1f} ms")
+        assert plain_calls + conditional_calls == 0, "polls between writes read DynamoDB"
+
+    print("cache", attendance_app.response_cache.snapshot_stats())
+    print("OK: polls between writes are served without DynamoDB reads or rendering")
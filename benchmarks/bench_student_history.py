@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("NOTIFICATION_TRANSPORT", "memory")
+
+import app as attendance_app
+import attendance_rollups
+from fakes import FakeDynamoResource
+
+# ----------------------
+# Student dashboard reads vs history length
+# ----------------------
+# For histories of 1, 3 and 5 school years, times the dashboard's two reads (monthly
+# rollup item + first history page) and pages through /attendance_history to check
+# every record is returned exactly once.
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "5")) / 1000
+YEARS = (1, 3, 5)
+STUDENT_ID = "S00001"
+
+
+def seed(years):
+    dynamodb = FakeDynamoResource()
+    attendance_app.dynamodb = dynamodb
+    attendance_app.attendance_table = dynamodb.Table("attendance")
+    attendance_app.rollups_table = dynamodb.Table(attendance_rollups.ROLLUPS_TABLE_NAME)
+    day = date.today() - timedelta(days=365 * years)
+    records = 0
+    while day <= date.today():
+        if day.weekday() < 5:
+            stamp = f"{day.isoformat()}T09:00:00.000000+00:00"
+            attendance_app.attendance_table.put_item(Item={
+                "id": f"{STUDENT_ID}_{stamp}", "student_id": STUDENT_ID,
+                "timestamp": stamp, "date": day.isoformat(), "status": "Present"
+            })
+            attendance_rollups.record_student_mark(attendance_app.rollups_table, STUDENT_ID, day.isoformat())
+            records += 1
+        day += timedelta(days=1)
+    dynamodb.latency = LATENCY_SECONDS
+    return dynamodb, records
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    client = attendance_app.app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = STUDENT_ID
+        session["role"] = "student"
+
+    month = date.today().strftime("%Y-%m")
+    for years in YEARS:
+        dynamodb, records = seed(years)
+        count, count_ms = timed(lambda: attendance_rollups.student_month_count(attendance_app.rollups_table, STUDENT_ID, month))
+        (page, _), page_ms = timed(lambda: attendance_app.attendance_history_page(STUDENT_ID, attendance_app.HISTORY_PAGE_SIZE))
+        assert count == sum(1 for r in attendance_app.attendance_table.items.values() if r["date"].startswith(month))
+
+        seen, cursor = [], None
+        while True:
+            body = client.get("/attendance_history", query_string={"limit": 100, "cursor": cursor or ""}).get_json()
+            seen += [record["id"] for record in body["records"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == records, "history pages lost or repeated records"
+        print(f"{years} year(s), {records:5d} records: month count {count_ms:5.1f} ms + first page {page_ms:5.1f} ms "
+              f"({len(page)} rows); full history in {len(seen) // 100 + 1} pages")
+    print("OK: dashboard reads are independent of history length")
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+import dashboard
+import mark_attendance
+from fakes import FakeDynamoClient
+
+# ----------------------
+# Concurrency check for sharded class statistics
+# ----------------------
+# Fires MARKS parallel update_class_statistics calls from THREADS threads against the
+# in-process DynamoDB stand-in, then reads the totals back through
+# dashboard.get_class_statistics and checks they are exact.
+MARKS = int(os.environ.get("BENCH_MARKS", "5000"))
+THREADS = int(os.environ.get("BENCH_THREADS", "64"))
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "2")) / 1000
+
+
+if __name__ == "__main__":
+    client = FakeDynamoClient(latency=LATENCY_SECONDS)
+    mark_attendance.get_client = lambda *args, **kwargs: client
+    dashboard.get_client = lambda *args, **kwargs: client
+
+    statuses = [random.choice(["present", "absent"]) for _ in range(MARKS)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(mark_attendance.update_class_statistics, statuses))
+    elapsed = time.perf_counter() - start
+
+    date = time.strftime("%Y-%m-%d")
+    totals = dashboard.get_class_statistics(date)
+    expected = {"present": statuses.count("present"), "absent": statuses.count("absent")}
+    print(f"{MARKS} marks from {THREADS} threads in {elapsed:.2f} s ({MARKS / elapsed:.0f} marks/s)")
+    print(f"expected {expected}, read back {totals}, calls {dict(client.calls)}")
+    assert totals == expected, "class statistics lost updates"
+    print("OK: totals are exact")
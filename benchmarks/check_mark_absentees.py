@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+import class_statistics
+import fakes
+import mark_attendance
+from fakes import FakeDynamoClient
+
+# ----------------------
+# Bulk absentee marking check
+# ----------------------
+# Seeds STUDENTS users with PRESENT_RATIO of them already marked present (half by the
+# batch script, half through the web app), runs mark_absentees twice against the
+# in-process DynamoDB stand-in and checks that every remaining student is marked absent
+# exactly once and the second run writes nothing. BENCH_WITHOUT_DATE_INDEX=1 runs it
+# against a table without the date-index GSI (the filtered-scan fallback).
+STUDENTS = int(os.environ.get("BENCH_STUDENTS", "5000"))
+PRESENT_RATIO = float(os.environ.get("BENCH_PRESENT_RATIO", "0.3"))
+LATENCY_SECONDS = float(os.environ.get("BENCH_LATENCY_MS", "2")) / 1000
+DATE = "2025-01-15"
+WITHOUT_DATE_INDEX = os.environ.get("BENCH_WITHOUT_DATE_INDEX") == "1"
+
+
+if __name__ == "__main__":
+    if WITHOUT_DATE_INDEX:
+        del fakes.INDEXES["date-index"]
+    client = FakeDynamoClient()
+    mark_attendance.get_client = lambda *args, **kwargs: client
+    mark_attendance.get_resource = lambda *args, **kwargs: client.resource
+    users = client.resource.Table("Users")
+    attendance = client.resource.Table("attendance")
+    present = int(STUDENTS * PRESENT_RATIO)
+    for index in range(STUDENTS):
+        users.put_item(Item={"id": f"S{index:05d}", "name": f"Student {index}"})
+        if index < present // 2:
+            attendance.put_item(Item={"id": f"S{index:05d}", "date": DATE, "status": "present"})
+        elif index < present:
+            # Marked through the web app: id is "<student>_<timestamp>"
+            stamp = f"{DATE}T09:00:00.000000+00:00"
+            attendance.put_item(Item={"id": f"S{index:05d}_{stamp}", "student_id": f"S{index:05d}",
+                                      "timestamp": stamp, "date": DATE, "status": "Present"})
+    client.resource.latency = LATENCY_SECONDS
+    client.resource.reset_calls()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = mark_attendance.mark_absentees(DATE)
+    elapsed = time.perf_counter() - start
+    print(f"first run: {first} in {elapsed:.2f} s, calls {dict(client.calls)}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        second = mark_attendance.mark_absentees(DATE)
+    print(f"second run: {second}")
+
+    marked = [item for item in attendance.items.values() if item.get("date") == DATE]
+    absent = [item for item in marked if item.get("status") == "absent"]
+    assert first["marked_absent"] == STUDENTS - present == len(absent), "wrong absentee count"
+    assert second["marked_absent"] == 0, "re-run wrote duplicate absentees"
+    assert class_statistics.totals(client, DATE)["absent"] == STUDENTS - present, "absent total is off"
+    print("OK: absentees marked exactly once")
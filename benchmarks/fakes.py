@@ -0,0 +1,652 @@
+import copy
+import hashlib
+import io
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+# ----------------------
+# In-process DynamoDB stand-in
+# ----------------------
+# Implements the subset of the boto3 DynamoDB *resource* API used by this repo, with a
+# configurable per-call latency so round-trip savings show up in wall-clock time.
+# Every API call is counted in `calls`, keyed by operation name.
+
+# Key schema per table name: (hash key, range key or None). Unknown tables default to ("id", None).
+KEY_SCHEMAS = {
+    "attendance": ("id", "date"),
+    "attendance-rollups": ("kind", "period"),
+    "Students-Table": ("id", None),
+    "Teachers-Table": ("id", None),
+    "Users": ("id", None),
+}
+# Global secondary indexes: name -> (hash key, range key)
+INDEXES = {
+    "student_id-index": ("student_id", "date"),
+    "date-index": ("date", "id"),
+}
+
+
+def _number(value):
+    return Decimal(str(value)) if isinstance(value, (int, float)) else value
+
+
+def evaluate_condition(condition, item):
+    # Evaluate a boto3.dynamodb.conditions object against a plain item.
+    expression = condition.get_expression()
+    operator = expression["operator"]
+    values = expression["values"]
+
+    if operator == "AND":
+        return evaluate_condition(values[0], item) and evaluate_condition(values[1], item)
+    if operator == "OR":
+        return evaluate_condition(values[0], item) or evaluate_condition(values[1], item)
+    if operator == "NOT":
+        return not evaluate_condition(values[0], item)
+
+    name = values[0].name
+    present = name in item
+    actual = item.get(name)
+    if operator == "attribute_exists":
+        return present
+    if operator == "attribute_not_exists":
+        return not present
+    if not present:
+        return False
+    if operator == "=":
+        return actual == values[1]
+    if operator == "<>":
+        return actual != values[1]
+    if operator == "<":
+        return actual < values[1]
+    if operator == "<=":
+        return actual <= values[1]
+    if operator == ">":
+        return actual > values[1]
+    if operator == ">=":
+        return actual >= values[1]
+    if operator == "BETWEEN":
+        return values[1] <= actual <= values[2]
+    if operator == "begins_with":
+        return str(actual).startswith(values[1])
+    if operator == "contains":
+        return values[1] in actual
+    if operator == "IN":
+        return actual in values[1]
+    raise NotImplementedError(f"Unsupported condition operator {operator}")
+
+
+_CLAUSE = re.compile(r"\b(SET|ADD|REMOVE)\b", re.IGNORECASE)
+
+
+def apply_update(item, expression, names=None, values=None):
+    # Apply a SET/ADD/REMOVE UpdateExpression (simple paths only) to `item` in place.
+    names = names or {}
+    values = values or {}
+    parts = _CLAUSE.split(expression)
+    for clause, body in zip(parts[1::2], parts[2::2]):
+        clause = clause.upper()
+        for action in filter(None, (a.strip() for a in body.split(","))):
+            if clause == "SET":
+                path, operand = (p.strip() for p in action.split("=", 1))
+                path = names.get(path, path)
+                if "+" in operand:
+                    left, right = (o.strip() for o in operand.split("+", 1))
+                    left_value = item.get(names.get(left, left), 0) if not left.startswith(":") else values[left]
+                    item[path] = _number(left_value) + _number(values[right])
+                elif operand.startswith("if_not_exists"):
+                    inner = operand[operand.index("(") + 1:operand.rindex(")")]
+                    attr, default = (o.strip() for o in inner.split(","))
+                    item[path] = item.get(names.get(attr, attr), values[default])
+                else:
+                    item[path] = values[operand]
+            elif clause == "ADD":
+                path, operand = action.split()
+                path = names.get(path, path)
+                item[path] = _number(item.get(path, 0)) + _number(values[operand])
+            else:
+                item.pop(names.get(action, action), None)
+    return item
+
+
+def project(item, projection, names=None):
+    if not projection:
+        return item
+    names = names or {}
+    wanted = [names.get(p.strip(), p.strip()) for p in projection.split(",")]
+    return {k: v for k, v in item.items() if k in wanted}
+
+
+class ConditionalCheckFailed(Exception):
+    pass
+
+
+def key_equality(condition, attribute):
+    # (True, value) when the key condition pins `attribute` with "=", else (False, None)
+    expression = condition.get_expression()
+    if expression["operator"] == "=":
+        name, value = expression["values"]
+        if getattr(name, "name", None) == attribute:
+            return True, value
+    elif expression["operator"] == "AND":
+        for part in expression["values"]:
+            found = key_equality(part, attribute)
+            if found[0]:
+                return found
+    return False, None
+
+
+class TableItems(dict):
+    # Item storage keyed by (hash, range). Keeps per-attribute lookup indexes (built on
+    # first use, then maintained on every write) and the scan order, so queries and scan
+    # pages over a million items do not walk or re-sort the whole table on each call.
+    def __init__(self):
+        super().__init__()
+        self.indexes = {}  # attribute -> {value: {key: item}}
+        self._sorted_keys = None
+        self._ordered = {}  # (segment, total_segments) -> [item, ...]
+
+    def _unindex(self, key):
+        item = dict.get(self, key)
+        if item is not None:
+            for attribute, index in self.indexes.items():
+                bucket = index.get(item.get(attribute))
+                if bucket:
+                    bucket.pop(key, None)
+
+    def __setitem__(self, key, item):
+        if key in self:
+            self._unindex(key)
+        else:
+            self._sorted_keys = None
+        self._ordered = {}
+        dict.__setitem__(self, key, item)
+        for attribute, index in self.indexes.items():
+            if attribute in item:
+                index.setdefault(item[attribute], {})[key] = item
+
+    def __delitem__(self, key):
+        self._unindex(key)
+        dict.__delitem__(self, key)
+        self._sorted_keys = None
+        self._ordered = {}
+
+    def pop(self, key, *default):
+        if key in self:
+            item = dict.__getitem__(self, key)
+            del self[key]
+            return item
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def clear(self):
+        dict.clear(self)
+        self.indexes = {}
+        self._sorted_keys = None
+        self._ordered = {}
+
+    def update(self, *args, **kwargs):
+        for key, item in dict(*args, **kwargs).items():
+            self[key] = item
+
+    def setdefault(self, key, item=None):
+        if key not in self:
+            self[key] = item
+        return dict.__getitem__(self, key)
+
+    def lookup(self, attribute, value):
+        if attribute not in self.indexes:
+            index = {}
+            for key, item in dict.items(self):
+                if attribute in item:
+                    index.setdefault(item[attribute], {})[key] = item
+            self.indexes[attribute] = index
+        return list(self.indexes[attribute].get(value, {}).values())
+
+    def ordered(self, segment=None, total_segments=None):
+        cache_key = (segment, total_segments)
+        if cache_key not in self._ordered:
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(self, key=lambda k: (str(k[0]), str(k[1])))
+            items = [dict.__getitem__(self, k) for k in self._sorted_keys]
+            if total_segments:
+                items = [i for k, i in zip(self._sorted_keys, items) if hash(str(k[0])) % total_segments == segment]
+            self._ordered[cache_key] = items
+        return self._ordered[cache_key]
+
+
+class FakeTable:
+    def __init__(self, resource, name):
+        self.resource = resource
+        self.name = name
+        self.hash_key, self.range_key = KEY_SCHEMAS.get(name, ("id", None))
+        self.items = TableItems()
+        self.lock = threading.Lock()
+
+    # -- helpers --
+    def key_of(self, item):
+        return (item[self.hash_key], item.get(self.range_key) if self.range_key else None)
+
+    # -- API --
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        self.resource.record("PutItem")
+        with self.lock:
+            key = self.key_of(Item)
+            if ConditionExpression is not None and not evaluate_condition(ConditionExpression, self.items.get(key, {})):
+                raise ConditionalCheckFailed(self.name)
+            self.items[key] = copy.deepcopy(Item)
+        return {}
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self.resource.record("GetItem")
+        with self.lock:
+            item = self.items.get(self.key_of(Key))
+            if item is None:
+                return {}
+            return {"Item": project(copy.deepcopy(item), ProjectionExpression, ExpressionAttributeNames)}
+
+    def delete_item(self, Key, **kwargs):
+        self.resource.record("DeleteItem")
+        with self.lock:
+            self.items.pop(self.key_of(Key), None)
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None,
+                    ExpressionAttributeNames=None, ConditionExpression=None, ReturnValues=None, **kwargs):
+        self.resource.record("UpdateItem")
+        with self.lock:
+            key = self.key_of(Key)
+            existing = self.items.get(key)
+            if ConditionExpression is not None and not evaluate_condition(ConditionExpression, existing or {}):
+                raise ConditionalCheckFailed(self.name)
+            item = dict(existing) if existing is not None else dict(Key)
+            before = dict(item)
+            apply_update(item, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            self.items[key] = item
+            if ReturnValues == "UPDATED_NEW":
+                return {"Attributes": {k: v for k, v in item.items() if before.get(k) != v}}
+            if ReturnValues == "ALL_NEW":
+                return {"Attributes": copy.deepcopy(item)}
+            return {}
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None, Limit=None,
+              ScanIndexForward=True, ExclusiveStartKey=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, **kwargs):
+        self.resource.record("Query")
+        if IndexName and IndexName not in INDEXES:
+            raise ClientError({"Error": {"Code": "ValidationException",
+                                         "Message": f"The table does not have the specified index: {IndexName}"}},
+                              "Query")
+        hash_key, range_key = INDEXES[IndexName] if IndexName else (self.hash_key, self.range_key)
+        pinned, value = key_equality(KeyConditionExpression, hash_key)
+        with self.lock:
+            candidates = self.items.lookup(hash_key, value) if pinned else list(self.items.values())
+            matched = [i for i in candidates if evaluate_condition(KeyConditionExpression, i)]
+        matched.sort(key=lambda i: (str(i.get(range_key, "")), str(self.key_of(i))), reverse=not ScanIndexForward)
+        return self._page(matched, Limit, ExclusiveStartKey, FilterExpression, ProjectionExpression,
+                          ExpressionAttributeNames)
+
+    def scan(self, FilterExpression=None, Limit=None, ExclusiveStartKey=None, Segment=None, TotalSegments=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self.resource.record("Scan")
+        with self.lock:
+            items = self.items.ordered(Segment, TotalSegments) if TotalSegments else self.items.ordered()
+        return self._page(items, Limit or 1000, ExclusiveStartKey, FilterExpression, ProjectionExpression,
+                          ExpressionAttributeNames)
+
+    def _page(self, items, limit, start_key, filter_expression, projection, names):
+        start = start_key["_offset"] if start_key else 0
+        end = start + limit if limit else len(items)
+        page = items[start:end]
+        if filter_expression is not None:
+            page = [i for i in page if evaluate_condition(filter_expression, i)]
+        response = {"Items": [project(copy.deepcopy(i), projection, names) for i in page], "Count": len(page)}
+        if end < len(items):
+            response["LastEvaluatedKey"] = {"_offset": end}
+        return response
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return FakeBatchWriter(self)
+
+
+class FakeBatchWriter:
+    # Buffers puts/deletes and flushes them through BatchWriteItem, 25 at a time.
+    def __init__(self, table):
+        self.table = table
+        self.buffer = []
+
+    def put_item(self, Item):
+        self.buffer.append({"PutRequest": {"Item": Item}})
+        if len(self.buffer) >= 25:
+            self.flush()
+
+    def delete_item(self, Key):
+        self.buffer.append({"DeleteRequest": {"Key": Key}})
+        if len(self.buffer) >= 25:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.table.resource.batch_write_item(RequestItems={self.table.name: self.buffer})
+            self.buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+class FakeDynamoResource:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, operation):
+        with self.lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def Table(self, name):
+        with self.lock:
+            if name not in self.tables:
+                self.tables[name] = FakeTable(self, name)
+            return self.tables[name]
+
+    def batch_get_item(self, RequestItems):
+        self.record("BatchGetItem")
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            with table.lock:
+                found = [table.items.get(table.key_of(key)) for key in request["Keys"]]
+            responses[name] = [project(copy.deepcopy(i), request.get("ProjectionExpression"),
+                                       request.get("ExpressionAttributeNames")) for i in found if i]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems):
+        self.record("BatchWriteItem")
+        for name, requests in RequestItems.items():
+            table = self.Table(name)
+            with table.lock:
+                for request in requests:
+                    if "PutRequest" in request:
+                        item = request["PutRequest"]["Item"]
+                        table.items[table.key_of(item)] = copy.deepcopy(item)
+                    else:
+                        table.items.pop(table.key_of(request["DeleteRequest"]["Key"]), None)
+        return {"UnprocessedItems": {}}
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+
+# ----------------------
+# Rekognition stand-in
+# ----------------------
+class FakeRekognition:
+    # Every search returns `matches`, unless `match_image(Image) -> [student_id, ...]` is
+    # given to pick the matches per image (e.g. from the S3 object name).
+    def __init__(self, latency=0.0, matches=None, match_image=None):
+        self.latency = latency
+        self.matches = list(matches or [])
+        self.match_image = match_image
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def search_faces_by_image(self, CollectionId, Image, FaceMatchThreshold=80, MaxFaces=1, **kwargs):
+        with self._lock:
+            self.calls["SearchFacesByImage"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        matches = self.match_image(Image) if self.match_image else self.matches
+        return {"FaceMatches": [
+            {"Similarity": 99.0, "Face": {"FaceId": f"face-{student_id}", "ExternalImageId": student_id}}
+            for student_id in matches
+        ]}
+
+
+# ----------------------
+# SES stand-in
+# ----------------------
+class FakeSES:
+    # Accepts every message and keeps it in `sent`.
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sent = []
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def send_email(self, Source, Destination, Message, **kwargs):
+        with self._lock:
+            self.calls["SendEmail"] += 1
+            self.sent.append({"Source": Source, "Destination": Destination, "Message": Message})
+            message_id = f"message-{len(self.sent)}"
+        if self.latency:
+            time.sleep(self.latency)
+        return {"MessageId": message_id}
+
+
+# ----------------------
+# S3 stand-in
+# ----------------------
+class FakeS3:
+    # Object store with list_objects_v2 paging (1000 keys per page) and a paginator.
+    PAGE_SIZE = 1000
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.objects = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _record(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def put_object(self, Bucket, Key, Body=b"", **kwargs):
+        self._record("PutObject")
+        body = Body if isinstance(Body, bytes) else Body.read()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        with self._lock:
+            self.objects[(Bucket, Key)] = (body, etag)
+        return {"ETag": etag}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self._record("GetObject")
+        body, etag = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "ETag": etag, "ContentLength": len(body)}
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=None, **kwargs):
+        self._record("ListObjectsV2")
+        with self._lock:
+            keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        end = start + min(MaxKeys or self.PAGE_SIZE, self.PAGE_SIZE)
+        response = {"Contents": [
+            {"Key": key, "ETag": self.objects[(Bucket, key)][1], "Size": len(self.objects[(Bucket, key)][0])}
+            for key in keys[start:end]
+        ], "IsTruncated": end < len(keys)}
+        if end < len(keys):
+            response["NextContinuationToken"] = str(end)
+        return response
+
+    def get_paginator(self, operation):
+        return FakeS3Paginator(self)
+
+
+class FakeS3Paginator:
+    def __init__(self, s3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs):
+        while True:
+            page = self.s3.list_objects_v2(**kwargs)
+            yield page
+            if not page.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+# ----------------------
+# Low-level client stand-in
+# ----------------------
+# The batch scripts (mark_attendance.py, dashboard.py) use the typed low-level client
+# API with string expressions. FakeDynamoClient stores items in a FakeDynamoResource,
+# so both views share the same data and call counters.
+_CONDITION_PATTERNS = [
+    ("between", re.compile(r"\s*([#\w]+)\s+BETWEEN\s+(:\w+)\s+AND\s+(:\w+)\s*", re.IGNORECASE)),
+    ("function", re.compile(r"\s*(begins_with|contains)\(\s*([#\w]+)\s*,\s*(:\w+)\s*\)\s*")),
+    ("exists", re.compile(r"\s*(attribute_exists|attribute_not_exists)\(\s*([#\w]+)\s*\)\s*")),
+    ("compare", re.compile(r"\s*([#\w]+)\s*(=|<>|<=|>=|<|>)\s*(:\w+)\s*")),
+]
+
+
+def parse_condition(expression, names=None, values=None):
+    # Translate a string condition (clauses joined by AND) into a boto3 condition object.
+    from boto3.dynamodb.conditions import Attr
+
+    names = names or {}
+    values = values or {}
+    condition = None
+    remaining = expression
+    while remaining.strip():
+        for kind, pattern in _CONDITION_PATTERNS:
+            match = pattern.match(remaining)
+            if match:
+                break
+        else:
+            raise NotImplementedError(f"Unsupported condition: {remaining}")
+
+        if kind == "between":
+            clause = Attr(names.get(match[1], match[1])).between(values[match[2]], values[match[3]])
+        elif kind == "function":
+            attr = Attr(names.get(match[2], match[2]))
+            clause = attr.begins_with(values[match[3]]) if match[1] == "begins_with" else attr.contains(values[match[3]])
+        elif kind == "exists":
+            attr = Attr(names.get(match[2], match[2]))
+            clause = attr.exists() if match[1] == "attribute_exists" else attr.not_exists()
+        else:
+            attr = Attr(names.get(match[1], match[1]))
+            operator = {"=": attr.eq, "<>": attr.ne, "<": attr.lt, "<=": attr.lte, ">": attr.gt, ">=": attr.gte}[match[2]]
+            clause = operator(values[match[3]])
+
+        condition = clause if condition is None else condition & clause
+        remaining = remaining[match.end():]
+        connector = re.match(r"\s*AND\s+", remaining, re.IGNORECASE)
+        if connector:
+            remaining = remaining[connector.end():]
+    return condition
+
+
+class FakeDynamoClient:
+    def __init__(self, resource=None, latency=0.0):
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+        self.resource = resource or FakeDynamoResource(latency=latency)
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    @property
+    def calls(self):
+        return self.resource.calls
+
+    def _plain(self, typed):
+        return {k: self._deserializer.deserialize(v) for k, v in (typed or {}).items()}
+
+    def _typed(self, item):
+        return {k: self._serializer.serialize(v) for k, v in item.items()}
+
+    def _condition(self, expression, kwargs):
+        if not expression:
+            return None
+        return parse_condition(expression, kwargs.get("ExpressionAttributeNames"),
+                               self._plain(kwargs.get("ExpressionAttributeValues")))
+
+    def get_item(self, TableName, Key, **kwargs):
+        response = self.resource.Table(TableName).get_item(Key=self._plain(Key), **kwargs)
+        return {"Item": self._typed(response["Item"])} if "Item" in response else {}
+
+    def put_item(self, TableName, Item, **kwargs):
+        return self.resource.Table(TableName).put_item(Item=self._plain(Item))
+
+    def update_item(self, TableName, Key, UpdateExpression, ReturnValues=None, **kwargs):
+        response = self.resource.Table(TableName).update_item(
+            Key=self._plain(Key),
+            UpdateExpression=UpdateExpression,
+            ExpressionAttributeValues=self._plain(kwargs.get("ExpressionAttributeValues")),
+            ExpressionAttributeNames=kwargs.get("ExpressionAttributeNames"),
+            ConditionExpression=self._condition(kwargs.get("ConditionExpression"), kwargs),
+            ReturnValues=ReturnValues
+        )
+        if "Attributes" in response:
+            return {"Attributes": self._typed(response["Attributes"])}
+        return {}
+
+    def query(self, TableName, KeyConditionExpression, **kwargs):
+        response = self.resource.Table(TableName).query(
+            KeyConditionExpression=self._condition(KeyConditionExpression, kwargs),
+            FilterExpression=self._condition(kwargs.get("FilterExpression"), kwargs),
+            **{k: v for k, v in kwargs.items() if k in (
+                "IndexName", "Limit", "ScanIndexForward", "ExclusiveStartKey",
+                "ProjectionExpression", "ExpressionAttributeNames")}
+        )
+        return dict(response, Items=[self._typed(i) for i in response["Items"]])
+
+    def scan(self, TableName, **kwargs):
+        response = self.resource.Table(TableName).scan(
+            FilterExpression=self._condition(kwargs.get("FilterExpression"), kwargs),
+            **{k: v for k, v in kwargs.items() if k in (
+                "Limit", "ExclusiveStartKey", "Segment", "TotalSegments",
+                "ProjectionExpression", "ExpressionAttributeNames")}
+        )
+        return dict(response, Items=[self._typed(i) for i in response["Items"]])
+
+    def batch_get_item(self, RequestItems):
+        plain = {name: dict(request, Keys=[self._plain(k) for k in request["Keys"]])
+                 for name, request in RequestItems.items()}
+        response = self.resource.batch_get_item(RequestItems=plain)
+        return {"Responses": {name: [self._typed(i) for i in items] for name, items in response["Responses"].items()},
+                "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems):
+        plain = {}
+        for name, requests in RequestItems.items():
+            plain[name] = [
+                {"PutRequest": {"Item": self._plain(r["PutRequest"]["Item"])}} if "PutRequest" in r
+                else {"DeleteRequest": {"Key": self._plain(r["DeleteRequest"]["Key"])}}
+                for r in requests
+            ]
+        return self.resource.batch_write_item(RequestItems=plain)
+
+    def get_paginator(self, operation):
+        return FakePaginator(getattr(self, operation))
+
+
+class FakePaginator:
+    # Mirrors boto3's paginate(): follows LastEvaluatedKey. Pages are capped at PAGE_SIZE
+    # items to stand in for DynamoDB's 1 MB page limit.
+    PAGE_SIZE = 500
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def paginate(self, **kwargs):
+        kwargs.setdefault("Limit", self.PAGE_SIZE)
+        while True:
+            page = self.operation(**kwargs)
+            yield page
+            if not page.get("LastEvaluatedKey"):
+                return
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
@@ -0,0 +1,492 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+os.environ.setdefault("NOTIFICATION_TRANSPORT", "memory")
+os.environ.setdefault("NOTIFICATION_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "bench_notification_spool"))
+
+import app as attendance_app
+import attendance_rollups
+import mark_attendance
+from attendance_aggregation import AttendanceAggregator
+from data_version import DataVersion
+from face_matcher import RekognitionMatcher
+from fakes import FakeDynamoClient, FakeDynamoResource, FakeRekognition, FakeS3, FakeSES
+from student_directory import StudentDirectory
+
+# ----------------------
+# Offline Benchmark Suite
+# ----------------------
+# Runs the Flask routes in app.py and the batch functions in mark_attendance.py against
+# the in-process DynamoDB, S3, Rekognition and SES stand-ins in fakes.py, on a synthetic
+# school of --students students with --rows attendance records. Every stand-in sleeps
+# for a fixed per-call latency once the data is seeded. Each scenario reports
+# throughput, p50/p95/p99 latency and AWS calls, and the results are written as JSON.
+#
+#   python benchmarks/run_suite.py --scale small                  # 1k rows, 100 students
+#   python benchmarks/run_suite.py --scale large --latency-ms 5   # 1M rows, 50k students
+#   python benchmarks/run_suite.py --compare benchmarks/results/<base>.json
+#   python benchmarks/run_suite.py --compare base.json head.json
+#
+# The page templates are not part of this tree, so the suite covers the JSON, CSV and
+# form endpoints only.
+SCALES = {
+    "small": (1000, 100),
+    "medium": (100000, 5000),
+    "large": (1000000, 50000),
+}
+RESULTS_DIR = os.path.join(HERE, "results")
+CLASSES = 20
+PRESENT_RATIO = 0.85
+BUCKET = "bench-archive"
+
+
+# ----------------------
+# Fake AWS
+# ----------------------
+class FakeAWS:
+    def __init__(self):
+        self.dynamodb = FakeDynamoResource()
+        self.client = FakeDynamoClient(self.dynamodb)
+        self.s3 = FakeS3()
+        self.rekognition = FakeRekognition(match_image=self.match_image)
+        self.ses = FakeSES()
+
+    def match_image(self, image):
+        # Archive objects are "<student_id>/<n>.jpg"; uploaded bytes match `rekognition.matches`
+        if "S3Object" in image:
+            return [image["S3Object"]["Name"].split("/")[0]]
+        return self.rekognition.matches
+
+    def set_latency(self, latency, rekognition_latency):
+        self.dynamodb.latency = latency
+        self.s3.latency = latency
+        self.ses.latency = latency
+        self.rekognition.latency = rekognition_latency
+
+    def calls(self):
+        counts = Counter()
+        for service, counter in (("dynamodb", self.dynamodb.calls), ("s3", self.s3.calls),
+                                 ("rekognition", self.rekognition.calls), ("ses", self.ses.calls)):
+            for operation, count in list(counter.items()):
+                counts[f"{service}.{operation}"] += count
+        return counts
+
+    def client_for(self, service, *args, **kwargs):
+        return {"dynamodb": self.client, "s3": self.s3, "rekognition": self.rekognition, "ses": self.ses}[service]
+
+
+def install(aws):
+    dynamodb = aws.dynamodb
+    attendance_app.dynamodb = dynamodb
+    attendance_app.students_table = dynamodb.Table("Students-Table")
+    attendance_app.attendance_table = dynamodb.Table("attendance")
+    attendance_app.rollups_table = dynamodb.Table(attendance_rollups.ROLLUPS_TABLE_NAME)
+    attendance_app.data_version = DataVersion(attendance_app.rollups_table, ttl_seconds=5)
+    attendance_app.response_cache.data_version = attendance_app.data_version
+    attendance_app.student_directory = StudentDirectory(attendance_app.students_table, dynamodb)
+    attendance_app.face_matcher = RekognitionMatcher(aws.rekognition, attendance_app.REKOGNITION_COLLECTION)
+    attendance_app.send_sms = lambda phone_number, message: None
+    attendance_app.day_aggregator = AttendanceAggregator(attendance_app.day_aggregator.loader)
+    attendance_app.record_aggregator = AttendanceAggregator(attendance_app.record_aggregator.loader)
+
+    mark_attendance.get_client = aws.client_for
+    mark_attendance.get_resource = lambda *args, **kwargs: dynamodb
+
+
+# ----------------------
+# Synthetic Dataset
+# ----------------------
+def school_days(count, end=None):
+    # The `count` most recent weekdays before `end`, oldest first
+    day = (end or datetime.now(timezone.utc).date()) - timedelta(days=1)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def seed(aws, rows, students, rng):
+    # Items go straight into the table storage: no calls counted, no latency
+    student_ids = [f"S{i:05d}" for i in range(students)]
+    students_table = aws.dynamodb.Table("Students-Table")
+    users_table = aws.dynamodb.Table("Users")
+    attendance_table = aws.dynamodb.Table("attendance")
+    rollups_table = aws.dynamodb.Table(attendance_rollups.ROLLUPS_TABLE_NAME)
+    for index, student_id in enumerate(student_ids):
+        students_table.items[(student_id, None)] = {
+            "id": student_id, "name": f"Student {index}", "phone_number": "9000000000",
+            "class": f"CSE-{index % CLASSES}"
+        }
+        users_table.items[(student_id, None)] = {"id": student_id, "name": f"Student {index}"}
+
+    day_counts = defaultdict(int)
+    month_counts = defaultdict(int)
+    written = 0
+    for day in school_days(math.ceil(rows / students)):
+        stamp = f"{day}T09:00:00.000000+00:00"
+        for student_id in student_ids[:rows - written]:
+            present = rng.random() < PRESENT_RATIO
+            record_id = f"{student_id}_{stamp}"
+            attendance_table.items[(record_id, day)] = {
+                "id": record_id, "student_id": student_id, "timestamp": stamp, "date": day,
+                "status": "Present" if present else "Absent"
+            }
+            if present:
+                day_counts[day] += 1
+                month_counts[(student_id, day[:7])] += 1
+        written += min(students, rows - written)
+
+    for day, count in day_counts.items():
+        rollups_table.items[(attendance_rollups.DAY_KIND, day)] = {
+            "kind": attendance_rollups.DAY_KIND, "period": day, "present_count": count
+        }
+    for (student_id, month), count in month_counts.items():
+        kind = attendance_rollups.student_kind(student_id)
+        rollups_table.items[(kind, month)] = {"kind": kind, "period": month, "present_count": count}
+
+    # Build the stand-in's lookup indexes now, so the first timed query does not pay for them
+    for attribute in ("id", "student_id", "date"):
+        attendance_table.items.lookup(attribute, None)
+    rollups_table.items.lookup("kind", None)
+    return student_ids
+
+
+# ----------------------
+# Measurement
+# ----------------------
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+def measure(aws, operation, iterations, setup=None, items_per_iteration=1):
+    # Times `operation(i)` for each iteration; setup(i) runs untimed and its AWS calls
+    # are not counted
+    latencies = []
+    calls = Counter()
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        before = aws.calls()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            operation(i)
+        latencies.append(time.perf_counter() - start)
+        calls.update(aws.calls() - before)
+
+    elapsed = sum(latencies)
+    operations = iterations * items_per_iteration
+    total_calls = sum(calls.values())
+    ordered = sorted(latencies)
+    return {
+        "iterations": iterations,
+        "operations": operations,
+        "seconds": round(elapsed, 4),
+        "throughput": round(operations / elapsed, 2) if elapsed else None,
+        "latency_ms": {name: round(percentile(ordered, fraction) * 1000, 3)
+                       for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+        "aws_calls": dict(sorted(calls.items())),
+        "aws_calls_per_operation": round(total_calls / operations, 3) if operations else 0
+    }
+
+
+def expect(response, status=200):
+    assert response.status_code == status, (response.status_code, response.get_data()[:200])
+    return response
+
+
+def login(client, user_id, role, username=None):
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["role"] = role
+        session["username"] = username or user_id
+
+
+# ----------------------
+# Scenarios
+# ----------------------
+# Each scenario takes the suite context and returns a measure() summary.
+def scenario_dashboard_cold(ctx):
+    client = ctx["client"]
+    granularities = ("daily", "weekly", "monthly")
+    return measure(
+        ctx["aws"],
+        lambda i: expect(client.get(f"/dashboard_data?range={granularities[i % 3]}")),
+        ctx["requests"],
+        setup=lambda i: attendance_app.data_version.bump()  # A write between every poll
+    )
+
+
+def scenario_dashboard_poll(ctx):
+    client = ctx["client"]
+    etag = expect(client.get("/dashboard_data?range=weekly")).headers["ETag"]
+    return measure(
+        ctx["aws"],
+        lambda i: expect(client.get("/dashboard_data?range=weekly", headers={"If-None-Match": etag}), 304),
+        ctx["requests"]
+    )
+
+
+def scenario_dashboard_class(ctx):
+    client = ctx["client"]
+
+    def reset(i):
+        # Force a reload of the record columns (full scan) on every run
+        attendance_app.record_aggregator = AttendanceAggregator(attendance_app.record_aggregator.loader)
+        attendance_app.data_version.bump()
+
+    return measure(
+        ctx["aws"],
+        lambda i: expect(client.get(f"/dashboard_data?range=monthly&class=CSE-{i % CLASSES}")),
+        ctx["runs"], setup=reset
+    )
+
+
+def scenario_attendance_history(ctx):
+    client = ctx["client"]
+    student_ids = ctx["student_ids"]
+    rng = random.Random(3)
+    return measure(
+        ctx["aws"],
+        lambda i: expect(client.get("/attendance_history?limit=100")),
+        ctx["requests"],
+        setup=lambda i: login(client, rng.choice(student_ids), "student")
+    )
+
+
+def scenario_export_csv(ctx):
+    client = ctx["client"]
+    login(client, "T00001", "teacher")
+    return measure(
+        ctx["aws"],
+        lambda i: expect(client.get("/export_attendance")).get_data(),
+        ctx["runs"], items_per_iteration=ctx["rows"]
+    )
+
+
+def scenario_mark_route(ctx):
+    client = ctx["client"]
+    aws = ctx["aws"]
+    student_ids = ctx["student_ids"]
+
+    def setup(i):
+        student_id = student_ids[i % len(student_ids)]
+        aws.rekognition.matches = [student_id]
+        login(client, student_id, "student")
+
+    def post(i):
+        expect(client.post("/mark_attendance", data={
+            "lat": str(attendance_app.CAMPUS_LAT),
+            "lon": str(attendance_app.CAMPUS_LON),
+            "face_image": (io.BytesIO(b"frame"), "frame.jpg"),
+        }, content_type="multipart/form-data"))
+
+    try:
+        return measure(aws, post, min(ctx["requests"], len(student_ids)), setup=setup)
+    finally:
+        aws.rekognition.matches = []
+
+
+def scenario_mark_absentees(ctx):
+    aws = ctx["aws"]
+    student_ids = ctx["student_ids"]
+    attendance_table = aws.dynamodb.Table("attendance")
+    dates = [(date(2099, 1, 1) + timedelta(days=i)).isoformat() for i in range(ctx["runs"])]
+
+    def setup(i):
+        # A fresh day with 30% of the school already marked present
+        for student_id in student_ids[:int(len(student_ids) * 0.3)]:
+            attendance_table.items[(student_id, dates[i])] = {"id": student_id, "date": dates[i], "status": "present"}
+
+    return measure(aws, lambda i: mark_attendance.mark_absentees(dates[i]), ctx["runs"],
+                   setup=setup, items_per_iteration=len(student_ids))
+
+
+def scenario_batch_recognition(ctx):
+    aws = ctx["aws"]
+    images = ctx["images"]
+    if not any(bucket == BUCKET for bucket, _ in aws.s3.objects):
+        for index in range(images):
+            student_id = ctx["student_ids"][index % len(ctx["student_ids"])]
+            aws.s3.objects[(BUCKET, f"{student_id}/{index}.jpg")] = (b"jpeg", f'"{index:032x}"')
+    manifests = tempfile.mkdtemp(prefix="bench_manifest_")
+    return measure(
+        aws,
+        lambda i: mark_attendance.process_all_images(
+            BUCKET, attendance_app.REKOGNITION_COLLECTION, manifest_path=os.path.join(manifests, f"run{i}.jsonl")
+        ),
+        ctx["runs"], items_per_iteration=images
+    )
+
+
+def scenario_send_email(ctx):
+    return measure(
+        ctx["aws"],
+        lambda i: mark_attendance.send_email(f"student{i}@example.com", "Attendance", "You were marked absent."),
+        ctx["requests"]
+    )
+
+
+SCENARIOS = {
+    "dashboard_data.cold": scenario_dashboard_cold,
+    "dashboard_data.poll": scenario_dashboard_poll,
+    "dashboard_data.class": scenario_dashboard_class,
+    "attendance_history.page": scenario_attendance_history,
+    "export_attendance.csv": scenario_export_csv,
+    "mark_attendance.route": scenario_mark_route,
+    "mark_absentees": scenario_mark_absentees,
+    "process_all_images": scenario_batch_recognition,
+    "send_email": scenario_send_email,
+}
+
+
+# ----------------------
+# Runner
+# ----------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_suite(args):
+    rows, students = SCALES[args.scale]
+    rows = args.rows or rows
+    students = args.students or students
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. Choose from: {', '.join(SCENARIOS)}")
+
+    aws = FakeAWS()
+    install(aws)
+    mark_attendance.REKOGNITION_TPS = args.rekognition_tps
+    started = time.perf_counter()
+    student_ids = seed(aws, rows, students, random.Random(args.seed))
+    print(f"Seeded {rows} attendance rows for {students} students in {time.perf_counter() - started:.1f} s")
+    attendance_app.data_version.bump()
+    aws.set_latency(args.latency_ms / 1000, (args.rekognition_latency_ms if args.rekognition_latency_ms is not None
+                                             else args.latency_ms) / 1000)
+
+    ctx = {
+        "aws": aws, "client": attendance_app.app.test_client(), "student_ids": student_ids, "rows": rows,
+        "requests": args.requests, "runs": args.runs, "images": args.images or min(students * 2, 5000)
+    }
+    login(ctx["client"], "T00001", "teacher", "teacher")
+
+    results = {}
+    for name in names:
+        summary = SCENARIOS[name](ctx)
+        results[name] = summary
+        latency = summary["latency_ms"]
+        print(f"{name:26s} {summary['throughput'] or 0:>12,.1f} ops/s  p50 {latency['p50']:>9.2f}  "
+              f"p95 {latency['p95']:>9.2f}  p99 {latency['p99']:>9.2f} ms  "
+              f"{summary['aws_calls_per_operation']:>7} AWS calls/op")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "scale": args.scale, "rows": rows, "students": students,
+            "latency_ms": args.latency_ms, "rekognition_latency_ms": args.rekognition_latency_ms,
+            "requests": args.requests, "runs": args.runs, "seed": args.seed
+        },
+        "scenarios": results
+    }
+
+
+def compare(base, head, threshold):
+    # Flags scenarios whose throughput fell, or whose p95 or AWS calls per operation
+    # rose, by more than `threshold` (a fraction). Returns the regressions found.
+    regressions = []
+    print(f"base {base['meta']['commit']} ({base['meta']['scale']}) -> head {head['meta']['commit']} "
+          f"({head['meta']['scale']})")
+    for name, after in head["scenarios"].items():
+        before = base["scenarios"].get(name)
+        if before is None:
+            print(f"{name:26s} new scenario")
+            continue
+        checks = (
+            ("throughput", before["throughput"], after["throughput"], False),
+            ("p95 ms", before["latency_ms"]["p95"], after["latency_ms"]["p95"], True),
+            ("AWS calls/op", before["aws_calls_per_operation"], after["aws_calls_per_operation"], True),
+        )
+        parts = []
+        for label, old, new, higher_is_worse in checks:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > threshold if higher_is_worse else change < -threshold
+            parts.append(f"{label} {old:g} -> {new:g} ({change:+.1%}){' REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append((name, label, old, new))
+        print(f"{name:26s} " + "; ".join(parts))
+    return regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite against in-process AWS stand-ins")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--rows", type=int, help="attendance rows (overrides --scale)")
+    parser.add_argument("--students", type=int, help="students (overrides --scale)")
+    parser.add_argument("--images", type=int, help="archive images for process_all_images (default 2 per student, max 5000)")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="per-call latency of every stand-in")
+    parser.add_argument("--rekognition-latency-ms", type=float, help="per-call Rekognition latency (default --latency-ms)")
+    parser.add_argument("--rekognition-tps", type=float, default=0, help="batch pipeline TPS limit (0 = unthrottled)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per request-level scenario")
+    parser.add_argument("--runs", type=int, default=3, help="runs per batch scenario")
+    parser.add_argument("--scenarios", help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>-<scale>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="BASE [HEAD]: compare two results files, or BASE against a fresh run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold as a fraction")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes BASE or BASE HEAD")
+
+    if args.compare and len(args.compare) == 2:
+        head = load(args.compare[1])
+    else:
+        head = run_suite(args)
+        output = args.output or os.path.join(RESULTS_DIR, f"{head['meta']['commit']}-{args.scale}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(head, f, indent=2)
+        print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(load(args.compare[0]), head, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
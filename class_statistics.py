@@ -0,0 +1,43 @@
+import os
+import random
+
+from dynamo_batch import batch_get_items
+
+# ----------------------
+# Write-sharded class statistics
+# ----------------------
+# Daily present/absent totals live in CLASS_STATS_SHARDS items per day, keyed
+# id = "class-<date>#<shard>", date = <date>, in the attendance table. Each mark adds to
+# one random shard with an atomic UpdateItem ADD, so concurrent marks never lose updates
+# and the morning rush is spread over several partitions. Readers sum the shards (plus the
+# legacy single "class-<date>" item written before sharding).
+CLASS_STATS_SHARDS = int(os.environ.get("CLASS_STATS_SHARDS", "10"))
+TABLE_NAME = "attendance"
+
+
+def shard_keys(date, shards=CLASS_STATS_SHARDS):
+    keys = [{"id": {"S": f"class-{date}#{shard}"}, "date": {"S": date}} for shard in range(shards)]
+    keys.append({"id": {"S": f"class-{date}"}, "date": {"S": date}})  # Pre-sharding item
+    return keys
+
+
+def increment(dynamodb, date, status, count=1, shards=CLASS_STATS_SHARDS):
+    # Atomically add `count` to the present or absent total for `date` (low-level client).
+    counter = "present_count" if status == "present" else "absent_count"
+    shard = random.randrange(shards)
+    dynamodb.update_item(
+        TableName=TABLE_NAME,
+        Key={"id": {"S": f"class-{date}#{shard}"}, "date": {"S": date}},
+        UpdateExpression=f"ADD {counter} :n",
+        ExpressionAttributeValues={":n": {"N": str(count)}}
+    )
+
+
+def totals(dynamodb, date, shards=CLASS_STATS_SHARDS):
+    # Sum every shard for `date` with one BatchGetItem.
+    items = batch_get_items(dynamodb, TABLE_NAME, shard_keys(date, shards),
+                            projection="present_count, absent_count")
+    return {
+        "present": sum(int(item.get("present_count", {}).get("N", 0)) for item in items),
+        "absent": sum(int(item.get("absent_count", {}).get("N", 0)) for item in items)
+    }
@@ -1,31 +1,32 @@
-from flask import Flask, render_template
-import boto3
-from datetime import datetime
+from flask import Flask, render_template, request, Response
+from aws_clients import get_client, get_resource
+from boto3.dynamodb.conditions import Key, Attr
+import class_statistics
+from botocore.exceptions import ClientError
+from dynamo_scan import scan_pages, query_pages, build_projection, is_missing_index
+from datetime import datetime, timedelta
 import csv
-from openpyxl import Workbook
+import io
 import os
+import tempfile
+from openpyxl import Workbook
 
 app = Flask(__name__)
 
+EXPORT_FIELDS = ["id", "date", "status", "timestamp"]
+EXPORT_HEADER = ["ID", "Date", "Status", "Timestamp"]
+# Optional cap on exported rows (0 = no cap); ?max_rows= overrides it per request
+EXPORT_MAX_ROWS = int(os.environ.get("EXPORT_MAX_ROWS", "0"))
+EXCEL_SHEET_ROWS = 1048575  # Excel's row limit minus the header; longer exports roll onto a new sheet
+MAX_DATE_SHEETS = 366
+STREAM_CHUNK_BYTES = 64 * 1024
+
 # Function to fetch class-level statistics for a specific date
 def get_class_statistics(date):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")
     try:
-        response = dynamodb.query(
-            TableName="attendance",
-            KeyConditionExpression="id = :class_id",
-            ExpressionAttributeValues={
-                ":class_id": {"S": f"class-{date}"}
-            }
-        )
-        if response.get("Items", []):
-            item = response["Items"][0]
-            return {
-                "present": int(item.get("present_count", {}).get("N", 0)),
-                "absent": int(item.get("absent_count", {}).get("N", 0))
-            }
-        else:
-            return {"present": 0, "absent": 0}
+        # Sum the day's counter shards
+        return class_statistics.totals(dynamodb, date)
     except Exception as e:
         print(f"Error fetching class statistics: {str(e)}")
         return {"present": 0, "absent": 0}
@@ -43,67 +44,210 @@ def attendance_summary(date):
     stats = get_class_statistics(date)
     return render_template("dashboard.html", date=date, stats=stats)
 
+# ----------------------
+# Attendance Export
+# ----------------------
+# Both exports stream: records are read with a paginated, projected scan (or one date-index
+# query per day for per-date sheets), and rows are written as pages arrive. CSV goes
+# straight to the client; Excel is written by a write-only workbook into an anonymous
+# temporary file, which is streamed out in chunks and removed when the response closes.
+# Filters: ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&max_rows=N (and ?per_date=1 for Excel).
+
+# Per-date sheets read the attendance table's date-index GSI:
+#   IndexName "date-index", hash key "date" (S), range key "id" (S), projection ALL
+# Tables without it still export per-date sheets, from one filtered scan of the range.
+def attendance_table():
+    return get_resource("dynamodb", region_name="ap-south-1").Table("attendance")
+
+_date_index = None  # Whether date-index exists; probed once per process
+
+def has_date_index():
+    global _date_index
+    if _date_index is None:
+        try:
+            attendance_table().query(IndexName="date-index", KeyConditionExpression=Key("date").eq("0000-00-00"),
+                                     Limit=1)
+            _date_index = True
+        except ClientError as e:
+            if not is_missing_index(e):
+                raise
+            print("attendance table has no date-index; per-date exports fall back to a filtered scan")
+            _date_index = False
+    return _date_index
+
+def export_options():
+    # Raises ValueError for a malformed date or max_rows; the routes answer 400
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    for value in (start_date, end_date):
+        if value:
+            datetime.strptime(value, "%Y-%m-%d")
+    max_rows = int(request.args.get("max_rows", EXPORT_MAX_ROWS) or 0)
+    if max_rows < 0:
+        raise ValueError("max_rows must not be negative")
+    return start_date, end_date, max_rows
+
+def date_filter(start_date=None, end_date=None):
+    if start_date and end_date:
+        return Attr("date").between(start_date, end_date)
+    if start_date:
+        return Attr("date").gte(start_date)
+    if end_date:
+        return Attr("date").lte(end_date)
+    return None
+
+def record_row(record):
+    return [record.get(field, "unknown") for field in EXPORT_FIELDS]
+
+def attendance_rows(start_date=None, end_date=None):
+    # Attendance records only; class statistics items share the table but have no status
+    for page in scan_pages(attendance_table(), projection=EXPORT_FIELDS,
+                           filter_expression=date_filter(start_date, end_date)):
+        for record in page:
+            if "status" in record:
+                yield record_row(record)
+
+def attendance_rows_for_date(date):
+    projection, names = build_projection(EXPORT_FIELDS)
+    for page in query_pages(attendance_table(), IndexName="date-index",
+                            KeyConditionExpression=Key("date").eq(date),
+                            ProjectionExpression=projection, ExpressionAttributeNames=names):
+        for record in page:
+            if "status" in record:
+                yield record_row(record)
+
+def date_sheets_from_scan(start_date, end_date, dates):
+    # Fallback without date-index: one filtered scan of the range, grouped by day. The
+    # rows are held in memory until the workbook is written, so set max_rows for long
+    # ranges on such tables.
+    rows_by_date = {date: [] for date in dates}
+    for page in scan_pages(attendance_table(), projection=EXPORT_FIELDS,
+                           filter_expression=date_filter(start_date, end_date)):
+        for record in page:
+            if "status" in record and record.get("date") in rows_by_date:
+                rows_by_date[record["date"]].append(record_row(record))
+    return list(rows_by_date.items())
+
+def dates_between(start_date, end_date):
+    day = datetime.strptime(start_date, "%Y-%m-%d")
+    last = datetime.strptime(end_date, "%Y-%m-%d")
+    while day <= last:
+        yield day.strftime("%Y-%m-%d")
+        day += timedelta(days=1)
+
+def export_filename(extension):
+    return f"attendance_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.{extension}"
+
 # CSV export route
 @app.route("/export_csv")
 def export_csv():
     try:
-        export_attendance_to_csv()
-        return "CSV export successful. Check attendance.csv in your directory."
-    except Exception as e:
-        return f"Error exporting CSV: {str(e)}"
+        start_date, end_date, max_rows = export_options()
+    except ValueError as e:
+        return f"Invalid export parameters: {str(e)}", 400
+    return Response(
+        export_attendance_to_csv(attendance_rows(start_date, end_date), max_rows),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={export_filename('csv')}"}
+    )
 
 # Excel export route
 @app.route("/export_excel")
 def export_excel():
     try:
-        filename = export_attendance_to_excel()
-        return f"Excel export successful. Check the file at: {filename}"
-    except Exception as e:
-        return f"Error exporting Excel: {str(e)}"
+        start_date, end_date, max_rows = export_options()
+    except ValueError as e:
+        return f"Invalid export parameters: {str(e)}", 400
+    per_date = request.args.get("per_date") == "1"
+    if per_date:
+        if not (start_date and end_date):
+            return "Per-date sheets need both start_date and end_date.", 400
+        dates = list(dates_between(start_date, end_date))
+        if len(dates) > MAX_DATE_SHEETS:
+            return f"Per-date sheets are limited to {MAX_DATE_SHEETS} days.", 400
+        if has_date_index():
+            sheets = ((date, attendance_rows_for_date(date)) for date in dates)
+        else:
+            sheets = date_sheets_from_scan(start_date, end_date, dates)
+    else:
+        sheets = [("Attendance", attendance_rows(start_date, end_date))]
 
-# Function to export attendance data to a CSV file
-def export_attendance_to_csv():
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")
+    output = tempfile.TemporaryFile()  # Anonymous file; removed by the OS once closed
     try:
-        response = dynamodb.scan(TableName="attendance")
-        with open("attendance.csv", "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["ID", "Date", "Status", "Timestamp"])
-            for item in response.get("Items", []):
-                writer.writerow([
-                    item["id"]["S"],
-                    item["date"]["S"],
-                    item["status"]["S"],
-                    item["timestamp"]["S"]
-                ])
-        print("Attendance data exported to attendance.csv")
+        written, truncated = export_attendance_to_excel(sheets, output, max_rows)
     except Exception as e:
-        print(f"Error exporting attendance to CSV: {str(e)}")
+        output.close()
+        print(f"Error exporting attendance to Excel: {str(e)}")
+        return f"Error exporting Excel: {str(e)}", 500
+
+    size = output.tell()
+    output.seek(0)
+    return Response(
+        stream_file(output),
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename={export_filename('xlsx')}",
+            "Content-Length": str(size),
+            "X-Export-Rows": str(written),
+            "X-Export-Truncated": "1" if truncated else "0"
+        }
+    )
 
-# Updated function to export attendance data to an Excel file
-def export_attendance_to_excel():
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")
+def stream_file(handle, chunk_bytes=STREAM_CHUNK_BYTES):
     try:
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Attendance"
-        sheet.append(["ID", "Date", "Status", "Timestamp"])
-        response = dynamodb.scan(TableName="attendance")
-        for item in response.get("Items", []):
-            # Handle missing fields gracefully
-            id_field = item.get("id", {}).get("S", "unknown")
-            date_field = item.get("date", {}).get("S", "unknown")
-            status_field = item.get("status", {}).get("S", "unknown")
-            timestamp_field = item.get("timestamp", {}).get("S", "unknown")
-            sheet.append([id_field, date_field, status_field, timestamp_field])
-        # Save Excel file with timestamped filename
-        filename = os.path.join(os.getcwd(), f"attendance_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx")
-        workbook.save(filename)
-        print(f"Excel file successfully saved at: {filename}")
-        return filename
-    except Exception as e:
-        print(f"Error exporting attendance to Excel: {str(e)}")
-        raise
+        while True:
+            chunk = handle.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+# Stream attendance rows as CSV, yielding about STREAM_CHUNK_BYTES at a time
+def export_attendance_to_csv(rows, max_rows=0):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    written = 0
+    for row in rows:
+        if max_rows and written >= max_rows:
+            break
+        writer.writerow(row)
+        written += 1
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue().encode()
+
+# Write (sheet title, rows) pairs into `output` with a write-only workbook; rows are
+# flushed to disk as they are appended, so memory stays flat however long the export is.
+# Returns (rows written, whether max_rows cut the export short).
+def export_attendance_to_excel(sheets, output, max_rows=0):
+    workbook = Workbook(write_only=True)
+    written = 0
+    truncated = False
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(title=title)
+        sheet.append(EXPORT_HEADER)
+        sheet_rows = 0
+        for row in rows:
+            if max_rows and written >= max_rows:
+                truncated = True
+                break
+            if sheet_rows >= EXCEL_SHEET_ROWS:
+                sheet_rows = 0
+                sheet = workbook.create_sheet(title=f"{title} ({len(workbook.worksheets) + 1})"[:31])
+                sheet.append(EXPORT_HEADER)
+            sheet.append(row)
+            sheet_rows += 1
+            written += 1
+        if truncated:
+            break
+    if not workbook.worksheets:
+        workbook.create_sheet(title="Attendance").append(EXPORT_HEADER)
+    workbook.save(output)
+    return written, truncated
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+# ----------------------
+# Attendance Data Version
+# ----------------------
+# A single watermark item in the rollups table that advances whenever attendance is
+# written:
+#   kind = "meta", period = "data-version", version = N, updated_at = ISO-8601 UTC
+# Readers use it to key caches of derived data. Reads are cached for ttl_seconds, and a
+# bump from this process updates the cached value immediately, so other processes see a
+# write within ttl_seconds and this process sees its own writes at once.
+#
+# Every attendance write also bumps this one item, so it is a single hot partition key:
+# DynamoDB caps a key at about 1,000 writes/s, and bumps beyond that are throttled. A
+# throttled bump is logged and the write it follows still succeeds, but readers keep the
+# old version (and serve stale caches) until the next bump lands. Batch scripts bump once
+# per run, not per record, to stay well below the cap; if /mark_attendance ever nears it,
+# shard the item (e.g. period = "data-version#<n>", readers summing the shards) rather
+# than bumping more often.
+META_KIND = "meta"
+VERSION_PERIOD = "data-version"
+
+
+class DataVersion:
+    def __init__(self, rollups_table, ttl_seconds=5):
+        self.rollups_table = rollups_table
+        self.ttl_seconds = ttl_seconds
+        self._version = None
+        self._updated_at = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _key(self):
+        return {"kind": META_KIND, "period": VERSION_PERIOD}
+
+    def _store(self, item):
+        version = int(item.get("version", 0))
+        with self._lock:
+            # Never move backwards if a concurrent bump already stored a newer value
+            if self._version is None or version >= self._version:
+                self._version = version
+                self._updated_at = item.get("updated_at")
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return self._version, self._updated_at
+
+    def current(self):
+        # Returns (version, updated_at); updated_at is None until the first bump
+        with self._lock:
+            if self._version is not None and time.monotonic() < self._expires_at:
+                return self._version, self._updated_at
+        try:
+            item = self.rollups_table.get_item(Key=self._key()).get("Item", {})
+        except Exception as e:
+            logging.error("Failed to read attendance data version: %s", e)
+            with self._lock:
+                return self._version or 0, self._updated_at
+        return self._store(item)
+
+    def version(self):
+        return self.current()[0]
+
+    def bump(self):
+        # Advance the watermark after a write; failures are logged, never raised, so a
+        # write path is not failed by its cache bookkeeping.
+        updated_at = datetime.now(timezone.utc).isoformat()
+        try:
+            response = self.rollups_table.update_item(
+                Key=self._key(),
+                UpdateExpression="ADD version :one SET updated_at = :now",
+                ExpressionAttributeValues={":one": 1, ":now": updated_at},
+                ReturnValues="ALL_NEW"
+            )
+        except Exception as e:
+            logging.error("Failed to bump attendance data version: %s", e)
+            with self._lock:
+                self._expires_at = 0.0  # Re-read on next use
+            return None
+        return self._store(response.get("Attributes", {}))[0]
@@ -1,26 +1,73 @@
 import cv2
 import dlib
+import threading
+import time
+from frame_capture import FrameCapture
+from face_recognition_util import get_matcher
+from face_tracks import FaceTracker, IdentityResolver
 from mark_attendance import get_user_info, mark_attendance
 
-def display_id_and_mark_attendance():
-    try:
-        camera = cv2.VideoCapture(0)
-        predictor = dlib.shape_predictor("C:/Users/HP/Desktop/facial-recognition-backend/shape_predictor_68_face_landmarks.dat")
-        detector = dlib.get_frontal_face_detector()
+DETECT_SCALE = 0.5  # Detect on a half-size frame; kiosk faces are close to the camera
+FACE_MARGIN = 0.25  # Extra context around the face box sent for recognition
+
+# Crop one face (with margin) out of the frame and JPEG-encode it for recognition
+def crop_face(frame, box, margin=FACE_MARGIN):
+    left, top, right, bottom = box
+    pad_x, pad_y = int((right - left) * margin), int((bottom - top) * margin)
+    height, width = frame.shape[:2]
+    crop = frame[max(0, top - pad_y):min(height, bottom + pad_y), max(0, left - pad_x):min(width, right + pad_x)]
+    ok, encoded = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes() if ok else None
 
-        # Simulate recognized user ID (Replace with facial recognition logic)
-        user_id = "23241A0542"  # Example recognized user ID
-        user_name = get_user_info(user_id)  # Fetch user name from DynamoDB
+# Recognise a face crop; returns (user_id, user_name) or None
+def recognise_face(face_image):
+    if face_image is None:
+        return None
+    face_matches = get_matcher().search({"Bytes": face_image}, max_faces=1)
+    if not face_matches:
+        return None
+    user_id = face_matches[0]["Face"]["ExternalImageId"]
+    user_name = get_user_info(user_id)  # Fetch user name from DynamoDB
+    if user_name == "Unknown User" or user_name == "Error":
+        return None
+    return user_id, user_name
 
-        if user_name != "Unknown User":
-            mark_attendance(user_id)  # Log attendance
+def display_id_and_mark_attendance(source=0):
+    camera = None
+    marked_students = set()
+    marked_lock = threading.Lock()
+
+    # Runs on a recognition worker once a track is identified
+    def on_identified(track):
+        with marked_lock:
+            first_time = track.identity not in marked_students
+            marked_students.add(track.identity)
+        if first_time:
+            mark_attendance(track.identity, "present")  # Log attendance once per student
+        track.marked = True
+
+    tracker = FaceTracker()
+    resolver = IdentityResolver(recognise_face, on_identified)
+    started = time.monotonic()
+    try:
+        # Frames are read on a capture thread; the loop below always gets the newest one
+        camera = FrameCapture(source).start()
+        detector = dlib.get_frontal_face_detector()
 
         while True:
             ret, frame = camera.read()
+            if not ret:
+                break
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = detector(gray)
+            small = cv2.resize(gray, None, fx=DETECT_SCALE, fy=DETECT_SCALE, interpolation=cv2.INTER_AREA)
+            boxes = [
+                (int(face.left() / DETECT_SCALE), int(face.top() / DETECT_SCALE),
+                 int(face.right() / DETECT_SCALE), int(face.bottom() / DETECT_SCALE))
+                for face in detector(small)
+            ]
+            tracks = tracker.update(boxes)
 
-            if len(faces) == 0:
+            if len(tracks) == 0:
                 cv2.putText(frame, "No face detected. Please align your face.", (50, 50), 
                             cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
                 cv2.imshow("Attendance System", frame)
@@ -28,26 +75,33 @@ def display_id_and_mark_attendance():
                     break
                 continue
 
-            for face in faces:
-                landmarks = predictor(gray, face)
-
-                # Detect forehead region using facial landmarks
-                forehead_x = landmarks.part(21).x
-                forehead_y = landmarks.part(21).y - 30
+            for track in tracks:
+                # Recognition is requested once per new track and applied when it returns
+                if track.identity is None:
+                    resolver.request(track, crop_face(frame, track.box))
 
-                # Display the user's ID and name on their forehead
-                cv2.putText(frame, f"{user_name} ({user_id})", (forehead_x - 50, forehead_y),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+                # Display the track's ID, or the user's name and ID, above their face
+                left, top, right, bottom = track.box
+                colour = (0, 255, 0) if track.marked else (255, 255, 255)
+                cv2.rectangle(frame, (left, top), (right, bottom), colour, 2)
+                cv2.putText(frame, track.label(), (left, max(20, top - 10)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, colour, 2)
 
             cv2.imshow("Attendance System", frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
-        camera.release()
-        cv2.destroyAllWindows()
-
     except Exception as e:
         print(f"Error occurred: {str(e)}")
+    finally:
+        if camera is not None:
+            camera.release()
+            print(f"Capture stats: {camera.snapshot_stats()}")
+        resolver.shutdown()
+        cv2.destroyAllWindows()
+        minutes = max((time.monotonic() - started) / 60, 1 / 60)
+        print(f"Tracks: {tracker.stats}, recognition: {resolver.stats} "
+              f"({resolver.stats['requests'] / minutes:.1f} calls/min), marked {len(marked_students)} students")
 
 if __name__ == "__main__":
     display_id_and_mark_attendance()
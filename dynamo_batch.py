@@ -0,0 +1,66 @@
+import logging
+import random
+import time
+
+# ----------------------
+# Batch Limits
+# ----------------------
+# DynamoDB caps BatchGetItem at 100 keys and BatchWriteItem at 25 requests per call.
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+MAX_RETRIES = 8
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _backoff(attempt):
+    # Exponential backoff with full jitter, capped at ~2 seconds.
+    time.sleep(random.uniform(0, min(2.0, 0.05 * (2 ** attempt))))
+
+
+def batch_get_items(dynamodb, table_name, keys, projection=None, expression_attribute_names=None):
+    # Fetch many items with BatchGetItem, retrying UnprocessedKeys. Works with both the
+    # boto3 resource and client (keys must already be in the matching format).
+    items = []
+    for chunk in _chunks(list(keys), BATCH_GET_LIMIT):
+        request = {"Keys": chunk}
+        if projection:
+            request["ProjectionExpression"] = projection
+        if expression_attribute_names:
+            request["ExpressionAttributeNames"] = expression_attribute_names
+        pending = {table_name: request}
+
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            pending = response.get("UnprocessedKeys") or {}
+            if pending:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise RuntimeError(f"BatchGetItem on {table_name} left keys unprocessed after {MAX_RETRIES} retries")
+                _backoff(attempt)
+    return items
+
+
+def batch_write_items(dynamodb, table_name, requests):
+    # Send PutRequest/DeleteRequest entries with BatchWriteItem in chunks of 25, retrying
+    # UnprocessedItems. Returns the number of requests written.
+    written = 0
+    for chunk in _chunks(list(requests), BATCH_WRITE_LIMIT):
+        pending = {table_name: chunk}
+        attempt = 0
+        while pending:
+            response = dynamodb.batch_write_item(RequestItems=pending)
+            pending = response.get("UnprocessedItems") or {}
+            if pending:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    raise RuntimeError(f"BatchWriteItem on {table_name} left items unprocessed after {MAX_RETRIES} retries")
+                logging.info("Retrying %d unprocessed writes on %s", len(pending.get(table_name, [])), table_name)
+                _backoff(attempt)
+        written += len(chunk)
+    return written
@@ -0,0 +1,144 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------
+# Scan Configuration
+# ----------------------
+# Number of parallel scan segments (and worker threads) used for full-table reads.
+DEFAULT_SEGMENTS = int(os.environ.get("DYNAMO_SCAN_SEGMENTS", "8"))
+# How many pages may sit in memory waiting for the consumer before workers block.
+MAX_BUFFERED_PAGES = int(os.environ.get("DYNAMO_SCAN_BUFFERED_PAGES", "16"))
+
+_DONE = object()
+
+
+def build_projection(attributes):
+    # "date", "status" and "timestamp" are DynamoDB reserved words, so every projected
+    # attribute goes through an ExpressionAttributeNames placeholder.
+    names = {f"#proj{i}": attribute for i, attribute in enumerate(attributes)}
+    return ", ".join(names.keys()), names
+
+
+def _scan_kwargs(projection, filter_expression, expression_attribute_names,
+                 expression_attribute_values, page_size):
+    kwargs = {}
+    names = dict(expression_attribute_names or {})
+    if projection:
+        kwargs["ProjectionExpression"], projection_names = build_projection(projection)
+        names.update(projection_names)
+    if filter_expression is not None:
+        kwargs["FilterExpression"] = filter_expression
+    if names:
+        kwargs["ExpressionAttributeNames"] = names
+    if expression_attribute_values:
+        kwargs["ExpressionAttributeValues"] = dict(expression_attribute_values)
+    if page_size:
+        kwargs["Limit"] = page_size
+    return kwargs
+
+
+def _scan_segment(table, base_kwargs, segment, total_segments):
+    # Follow LastEvaluatedKey until this segment is exhausted, one page at a time.
+    kwargs = dict(base_kwargs)
+    if total_segments > 1:
+        kwargs["Segment"] = segment
+        kwargs["TotalSegments"] = total_segments
+    while True:
+        response = table.scan(**kwargs)
+        yield response.get("Items", [])
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def scan_pages(table, segments=None, projection=None, filter_expression=None,
+               expression_attribute_names=None, expression_attribute_values=None,
+               page_size=None):
+    # Yield every page of a full-table scan. With more than one segment the table is
+    # read by a thread pool using DynamoDB parallel scan; pages arrive in completion
+    # order, not key order. Only a bounded number of pages is buffered at a time, so
+    # callers that consume pages as they arrive keep memory flat.
+    segments = segments or DEFAULT_SEGMENTS
+    base_kwargs = _scan_kwargs(projection, filter_expression, expression_attribute_names,
+                               expression_attribute_values, page_size)
+
+    if segments <= 1:
+        yield from _scan_segment(table, base_kwargs, 0, 1)
+        return
+
+    pages = queue.Queue(maxsize=MAX_BUFFERED_PAGES)
+    stop = threading.Event()
+
+    def put(item):
+        # Block while the consumer is behind, but give up once it has gone away.
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(segment):
+        try:
+            for page in _scan_segment(table, base_kwargs, segment, segments):
+                if not put(page):
+                    return
+        except Exception as e:
+            logging.error("Scan of segment %s/%s failed: %s", segment, segments, e)
+            put(e)
+        finally:
+            put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=segments, thread_name_prefix="dynamo-scan")
+    try:
+        for segment in range(segments):
+            executor.submit(worker, segment)
+
+        finished = 0
+        while finished < segments:
+            page = pages.get()
+            if page is _DONE:
+                finished += 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        # Also reached when the consumer stops early (generator closed).
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def scan_items(table, **kwargs):
+    # Yield items one by one across all pages and segments.
+    for page in scan_pages(table, **kwargs):
+        yield from page
+
+
+def scan_all(table, **kwargs):
+    # Materialise a complete scan as a list.
+    return list(scan_items(table, **kwargs))
+
+
+def is_missing_index(error):
+    # True for the ValidationException DynamoDB raises when a query names a secondary
+    # index the table does not have, so callers can fall back to a filtered scan.
+    details = getattr(error, "response", {}).get("Error", {})
+    return details.get("Code") == "ValidationException" and "index" in details.get("Message", "").lower()
+
+
+def query_pages(table, **kwargs):
+    # Yield every page of a query, following LastEvaluatedKey.
+    kwargs = dict(kwargs)
+    while True:
+        response = table.query(**kwargs)
+        yield response.get("Items", [])
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
@@ -0,0 +1,81 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+
+# ----------------------
+# In-process Event Bus
+# ----------------------
+class EventBus:
+    # Publish/subscribe fan-out for attendance events. Each subscriber gets its own
+    # bounded queue; a subscriber that falls behind loses its oldest events rather than
+    # slowing down publishers.
+    def __init__(self, subscriber_queue_size=256):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type, data):
+        event = {"type": event_type, "data": data, "published_at": time.time()}
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.stats["published"] += 1
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Drop the oldest event to make room for the newest
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    pass
+                with self._lock:
+                    self.stats["dropped"] += 1
+                continue
+            with self._lock:
+                self.stats["delivered"] += 1
+        return len(subscribers)
+
+    def stream(self, heartbeat_seconds=15.0):
+        # Generator of Server-Sent Events text frames for one subscriber. Sends a comment
+        # line as a heartbeat so proxies keep idle connections open.
+        subscriber = self.subscribe()
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event["type"], event["data"])
+        except GeneratorExit:
+            pass
+        finally:
+            self.unsubscribe(subscriber)
+            logging.debug("SSE subscriber disconnected")
+
+
+def format_sse(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,372 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ----------------------
+# Matcher Interface
+# ----------------------
+# Every matcher takes a Rekognition-style image ({"Bytes": ...} or {"S3Object": {...}})
+# and returns matches in the Rekognition FaceMatches shape:
+#   [{"Similarity": 97.1, "Face": {"FaceId": ..., "ExternalImageId": student_id}}, ...]
+# so callers can switch backends without changing how they read results.
+
+
+class FaceMatcher(ABC):
+    @abstractmethod
+    def search(self, image, threshold=80, max_faces=10, scope=None):
+        # `scope` identifies the caller (e.g. the logged-in student) for result caches
+        # (recognition_cache.CachedMatcher); backends ignore it.
+        pass
+
+    @abstractmethod
+    def index(self, image, external_id):
+        # Enrol the face(s) in `image` under external_id; returns the indexed face records.
+        pass
+
+    @abstractmethod
+    def remove(self, external_id):
+        pass
+
+    def persist(self):
+        # Make enrolments durable; a no-op for backends that store faces remotely.
+        pass
+
+
+class RekognitionMatcher(FaceMatcher):
+    def __init__(self, rekognition, collection_id):
+        self.rekognition = rekognition
+        self.collection_id = collection_id
+
+    def search(self, image, threshold=80, max_faces=10, scope=None):
+        response = self.rekognition.search_faces_by_image(
+            CollectionId=self.collection_id,
+            Image=image,
+            FaceMatchThreshold=threshold,
+            MaxFaces=max_faces
+        )
+        return response.get("FaceMatches", [])
+
+    def index(self, image, external_id):
+        response = self.rekognition.index_faces(
+            CollectionId=self.collection_id,
+            Image=image,
+            ExternalImageId=external_id,  # Use student ID as ExternalImageId
+            DetectionAttributes=["DEFAULT"]
+        )
+        return response.get("FaceRecords", [])
+
+    def remove(self, external_id):
+        face_ids = []
+        kwargs = {"CollectionId": self.collection_id}
+        while True:
+            response = self.rekognition.list_faces(**kwargs)
+            face_ids += [f["FaceId"] for f in response.get("Faces", []) if f.get("ExternalImageId") == external_id]
+            if not response.get("NextToken"):
+                break
+            kwargs["NextToken"] = response["NextToken"]
+        if face_ids:
+            self.rekognition.delete_faces(CollectionId=self.collection_id, FaceIds=face_ids)
+        return len(face_ids)
+
+
+# ----------------------
+# Embedders
+# ----------------------
+class DlibEmbedder:
+    # 128-d face descriptors from dlib's ResNet model. Models are loaded on first use.
+    dim = 128
+
+    def __init__(self, predictor_path, model_path):
+        self.predictor_path = predictor_path
+        self.model_path = model_path
+        self._models = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._models is None:
+                import dlib
+
+                self._models = (
+                    dlib.get_frontal_face_detector(),
+                    dlib.shape_predictor(self.predictor_path),
+                    dlib.face_recognition_model_v1(self.model_path),
+                )
+            return self._models
+
+    def embed(self, image_bytes):
+        import cv2
+
+        detector, predictor, model = self._load()
+        frame = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode image")
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        faces = detector(rgb, 1)
+        return np.array([model.compute_face_descriptor(rgb, predictor(rgb, face)) for face in faces],
+                        dtype=np.float32).reshape(-1, self.dim)
+
+
+class HashEmbedder:
+    # Deterministic stand-in: identical bytes always give the identical embedding.
+    def __init__(self, dim=128):
+        self.dim = dim
+
+    def embed(self, image_bytes):
+        seed = int.from_bytes(hashlib.sha256(image_bytes).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal((1, self.dim)).astype(np.float32)
+
+
+def l2_normalise(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# ----------------------
+# Local Embedding Index
+# ----------------------
+# On disk, an index at `path` is a compacted snapshot, `<path>.npy` (embeddings) and
+# `<path>.ids.npy` (student ids), plus an append-only journal, `<path>.journal`, with one
+# JSON line per enrolment or removal since that snapshot. A registration appends one
+# line instead of rewriting the matrix. Every process sharing the path checks the files'
+# stat before searching and applies what other processes appended (or reloads after a
+# compaction), so a student registered in one worker is recognised in all of them.
+# `<path>.lock` serialises appends, compaction and reloads across processes.
+COMPACT_AFTER = int(os.environ.get("FACE_INDEX_COMPACT_AFTER", "1000"))  # Journal lines
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if not fcntl:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()  # Also releases flock
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    except FileNotFoundError:
+        return None
+
+
+class LocalEmbeddingMatcher(FaceMatcher):
+    # Cosine search over L2-normalised float32 embeddings. The snapshot is memory-mapped;
+    # journal entries live in an in-memory delta, and removals of snapshot rows are
+    # tombstoned until the next compaction.
+    def __init__(self, embedder, path, s3=None, compact_after=COMPACT_AFTER):
+        self.embedder = embedder
+        self.path = path
+        self.s3 = s3
+        self.compact_after = compact_after
+        self.journal_path = f"{path}.journal"
+        self._lock = threading.RLock()
+        with _FileLock(f"{path}.lock"):
+            self._load()
+
+    def _file_lock(self):
+        return _FileLock(f"{self.path}.lock")
+
+    # -- loading (callers hold the file lock) --
+    def _load(self):
+        matrix_path, ids_path = f"{self.path}.npy", f"{self.path}.ids.npy"
+        with self._lock:
+            if os.path.exists(matrix_path) and os.path.exists(ids_path):
+                self._base = np.load(matrix_path, mmap_mode="r")
+                self._base_ids = np.load(ids_path)
+            else:
+                self._base = np.zeros((0, self.embedder.dim), dtype=np.float32)
+                self._base_ids = np.array([], dtype=str)
+            self._snapshot_signature = _signature(ids_path)
+            self._base_alive = np.ones(len(self._base_ids), dtype=bool)
+            self._delta = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            self._delta_ids = []
+            self._journal_offset = 0
+            self._journal_lines = 0
+            self._journal_signature = None
+            self._apply_journal()
+        logging.info("Loaded %d face embeddings from %s", len(self), self.path)
+
+    def _apply_journal(self):
+        # Applies complete journal lines past the last offset read
+        try:
+            with open(self.journal_path, "rb") as file:
+                file.seek(self._journal_offset)
+                data = file.read()
+        except FileNotFoundError:
+            data = b""
+        end = data.rfind(b"\n") + 1  # A torn final line is left for the next read
+        added, added_ids = [], []
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            if entry["op"] == "add":
+                added.append(np.asarray(entry["vectors"], dtype=np.float32).reshape(-1, self.embedder.dim))
+                added_ids += [entry["id"]] * len(added[-1])
+            else:
+                if added:
+                    self._extend(added, added_ids)
+                    added, added_ids = [], []
+                self._drop(entry["id"])
+            self._journal_lines += 1
+        if added:
+            self._extend(added, added_ids)
+        self._journal_offset += end
+        self._journal_signature = _signature(self.journal_path)
+
+    def _extend(self, added, added_ids):
+        self._delta = np.vstack([self._delta] + added)
+        self._delta_ids += added_ids
+
+    def _drop(self, external_id):
+        removed = int((self._base_alive & (self._base_ids == external_id)).sum())
+        self._base_alive &= self._base_ids != external_id
+        keep = [i for i, face_id in enumerate(self._delta_ids) if face_id != external_id]
+        removed += len(self._delta_ids) - len(keep)
+        self._delta = self._delta[keep]
+        self._delta_ids = [self._delta_ids[i] for i in keep]
+        return removed
+
+    def refresh(self):
+        # Picks up journal appends and compactions from other processes; two stat calls
+        # when nothing changed.
+        if (_signature(f"{self.path}.ids.npy") == self._snapshot_signature
+                and _signature(self.journal_path) == self._journal_signature):
+            return
+        with self._file_lock(), self._lock:
+            if _signature(f"{self.path}.ids.npy") != self._snapshot_signature:
+                self._load()
+            else:
+                self._apply_journal()
+
+    def _append(self, entry):
+        # Journals one change and applies it (and anything other processes appended first)
+        with self._file_lock(), self._lock:
+            if _signature(f"{self.path}.ids.npy") != self._snapshot_signature:
+                self._load()
+            with open(self.journal_path, "ab") as file:
+                file.write(json.dumps(entry).encode() + b"\n")
+            self._apply_journal()
+
+    def __len__(self):
+        return int(self._base_alive.sum()) + len(self._delta_ids)
+
+    def _image_bytes(self, image):
+        if "Bytes" in image:
+            return image["Bytes"]
+        s3_object = image["S3Object"]
+        return self.s3.get_object(Bucket=s3_object["Bucket"], Key=s3_object["Name"])["Body"].read()
+
+    def add(self, embeddings, external_id):
+        embeddings = l2_normalise(embeddings).reshape(-1, self.embedder.dim)
+        if len(embeddings):
+            self._append({"op": "add", "id": external_id, "vectors": embeddings.tolist()})
+        return len(embeddings)
+
+    def remove(self, external_id):
+        self.refresh()
+        with self._lock:
+            present = int((self._base_alive & (self._base_ids == external_id)).sum()) + self._delta_ids.count(external_id)
+        if present:
+            self._append({"op": "remove", "id": external_id})
+        return present
+
+    def search_embeddings(self, probes, k=10):
+        # Batched top-k: returns, per probe, a list of (external_id, cosine) pairs.
+        self.refresh()
+        probes = l2_normalise(probes).reshape(-1, self.embedder.dim)
+        with self._lock:
+            base, base_ids, alive = self._base, self._base_ids, self._base_alive
+            delta, delta_ids = self._delta, list(self._delta_ids)
+        scores = np.hstack([probes @ base.T, probes @ delta.T]) if len(delta) else probes @ base.T
+        ids = np.concatenate([base_ids, np.array(delta_ids, dtype=str)])
+        if len(base):
+            scores[:, :len(base)][:, ~alive] = -np.inf
+
+        k = min(k, scores.shape[1])
+        results = []
+        for row in scores:
+            if k == 0:
+                results.append([])
+                continue
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(str(ids[i]), float(row[i])) for i in top if np.isfinite(row[i])])
+        return results
+
+    def search(self, image, threshold=80, max_faces=10, scope=None):
+        probes = self.embedder.embed(self._image_bytes(image))
+        if not len(probes):
+            return []
+        best = {}
+        for matches in self.search_embeddings(probes, k=max_faces):
+            for external_id, cosine in matches:
+                similarity = min(100.0, max(0.0, cosine) * 100)
+                if similarity >= threshold and similarity > best.get(external_id, -1):
+                    best[external_id] = similarity
+        ranked = sorted(best.items(), key=lambda pair: -pair[1])[:max_faces]
+        return [{"Similarity": similarity, "Face": {"FaceId": f"local-{external_id}", "ExternalImageId": external_id}}
+                for external_id, similarity in ranked]
+
+    def index(self, image, external_id):
+        embeddings = self.embedder.embed(self._image_bytes(image))
+        self.add(embeddings, external_id)
+        return [{"Face": {"FaceId": f"local-{external_id}", "ExternalImageId": external_id}} for _ in embeddings]
+
+    def persist(self):
+        # Enrolments are durable once journalled; this only compacts a long journal
+        if self._journal_lines >= self.compact_after:
+            self.snapshot()
+
+    def snapshot(self):
+        # Compact live rows into a new snapshot, written atomically, empty the journal and
+        # re-map. Other processes see the new snapshot's stat and reload.
+        with self._file_lock(), self._lock:
+            self._load()  # Everything journalled so far, by any process
+            matrix = np.vstack([np.asarray(self._base)[self._base_alive], self._delta]).astype(np.float32)
+            ids = np.concatenate([self._base_ids[self._base_alive], np.array(self._delta_ids, dtype=str)])
+            for suffix, array in ((".npy", matrix), (".ids.npy", ids)):
+                tmp_path = f"{self.path}.tmp{suffix}"
+                np.save(tmp_path, array)
+                os.replace(tmp_path, f"{self.path}{suffix}")
+            open(self.journal_path, "wb").close()
+            self._load()
+        return len(ids)
+
+
+def build_matcher(rekognition, collection_id, s3=None):
+    # FACE_MATCHER=local switches to the on-box index at FACE_INDEX_PATH, using dlib
+    # descriptors (FACE_EMBEDDER=hash gives the deterministic stand-in).
+    if os.environ.get("FACE_MATCHER", "rekognition") != "local":
+        return RekognitionMatcher(rekognition, collection_id)
+
+    if os.environ.get("FACE_EMBEDDER") == "hash":
+        embedder = HashEmbedder()
+    else:
+        embedder = DlibEmbedder(
+            os.environ.get("DLIB_SHAPE_PREDICTOR", "shape_predictor_68_face_landmarks.dat"),
+            os.environ.get("DLIB_FACE_MODEL", "dlib_face_recognition_resnet_model_v1.dat")
+        )
+    return LocalEmbeddingMatcher(embedder, os.environ.get("FACE_INDEX_PATH", "face_index"), s3=s3)
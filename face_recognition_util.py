@@ -1,24 +1,32 @@
-import boto3
+from aws_clients import get_client
 from datetime import datetime
+from face_matcher import build_matcher
+from recognition_cache import cached_matcher
+
+# One matcher (and recognition cache) per process, created on first use
+_matcher = None
+
+def get_matcher():
+    global _matcher
+    if _matcher is None:
+        rekognition = get_client("rekognition", region_name="ap-south-1")  # AWS region
+        _matcher = cached_matcher(build_matcher(rekognition, "students-collection"))  # Your Rekognition face collection ID
+    return _matcher
 
 # Function to recognize a face and mark attendance
 def recognize_face_and_mark_present(live_image_path):
-    rekognition = boto3.client("rekognition", region_name="ap-south-1")  # AWS region
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # AWS region
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # AWS region
     bucket_name = "ruthvik-bucket-mumbai"  # Replace with your S3 bucket name
     date = datetime.now().strftime("%Y-%m-%d")  # Attendance date
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current timestamp
 
     try:
-        # Search for matching faces in Rekognition
-        response = rekognition.search_faces_by_image(
-            CollectionId="students-collection",  # Your Rekognition face collection ID
-            Image={"Bytes": open(live_image_path, "rb").read()},
-            MaxFaces=1
-        )
+        # Search for matching faces (Rekognition, or the local index with FACE_MATCHER=local)
+        with open(live_image_path, "rb") as image_file:
+            face_matches = get_matcher().search({"Bytes": image_file.read()}, max_faces=1)
         
-        if response["FaceMatches"]:
-            roll_number = response["FaceMatches"][0]["Face"]["ExternalImageId"]  # Roll number as identifier
+        if face_matches:
+            roll_number = face_matches[0]["Face"]["ExternalImageId"]  # Roll number as identifier
             
             # Mark the student as present in DynamoDB
             dynamodb.put_item(
@@ -0,0 +1,142 @@
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------
+# Face Tracks
+# ----------------------
+# Faces are matched frame to frame by box overlap (IoU), so each person in view keeps a
+# stable track ID. Recognition runs once per track, asynchronously; the track carries its
+# identity from then on, so recognition calls scale with the people walking past rather
+# than with the frame rate.
+PENDING = "pending"
+UNKNOWN = "unknown"
+
+
+def iou(a, b):
+    # Boxes are (left, top, right, bottom)
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.missed = 0
+        self.hits = 1
+        self.identity = None  # None (not requested), PENDING, UNKNOWN or a student ID
+        self.name = None
+        self.attempts = 0
+        self.retry_at = 0.0
+        self.marked = False
+
+    def label(self):
+        if self.identity in (None, PENDING):
+            return f"#{self.id} identifying..."
+        if self.identity == UNKNOWN:
+            return f"#{self.id} unknown"
+        return f"{self.name} ({self.identity})"
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=0.3, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = {}
+        self._ids = itertools.count(1)
+        self.stats = {"tracks": 0, "expired": 0}
+
+    def update(self, boxes):
+        # Greedy IoU assignment of this frame's boxes to existing tracks. Returns the tracks
+        # seen in this frame; tracks unseen for more than max_missed frames are dropped.
+        pairs = sorted(
+            ((iou(track.box, box), track_id, index)
+             for track_id, track in self.tracks.items() for index, box in enumerate(boxes)),
+            reverse=True
+        )
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, track_id, index in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if track_id in matched_tracks or index in matched_boxes:
+                continue
+            track = self.tracks[track_id]
+            track.box, track.missed = boxes[index], 0
+            track.hits += 1
+            matched_tracks.add(track_id)
+            matched_boxes.add(index)
+
+        for track_id in list(self.tracks):
+            if track_id not in matched_tracks:
+                self.tracks[track_id].missed += 1
+                if self.tracks[track_id].missed > self.max_missed:
+                    del self.tracks[track_id]
+                    self.stats["expired"] += 1
+
+        visible = [self.tracks[track_id] for track_id in matched_tracks]
+        for index, box in enumerate(boxes):
+            if index not in matched_boxes:
+                track = Track(next(self._ids), box)
+                self.tracks[track.id] = track
+                self.stats["tracks"] += 1
+                visible.append(track)
+        return visible
+
+
+# ----------------------
+# Asynchronous Identity Resolution
+# ----------------------
+class IdentityResolver:
+    # Runs `recognise(face_image) -> (student_id, name) or None` in a small thread pool, at
+    # most once per track. Errors are retried after retry_seconds, up to max_attempts.
+    # `on_identified(track)` is called from the worker once a track gets a student ID.
+    def __init__(self, recognise, on_identified=None, workers=2, retry_seconds=2.0, max_attempts=3):
+        self.recognise = recognise
+        self.on_identified = on_identified
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="face-identity")
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "identified": 0, "unknown": 0, "errors": 0}
+
+    def request(self, track, face_image):
+        # Call every frame; it only submits for tracks that have no identity yet
+        now = time.monotonic()
+        with self._lock:
+            if track.identity is not None or now < track.retry_at or track.attempts >= self.max_attempts:
+                return False
+            track.identity = PENDING
+            track.attempts += 1
+            self.stats["requests"] += 1
+        self._executor.submit(self._resolve, track, face_image)
+        return True
+
+    def _resolve(self, track, face_image):
+        try:
+            result = self.recognise(face_image)
+        except Exception as e:
+            logging.error(f"Recognition failed for track {track.id}: {str(e)}")
+            with self._lock:
+                self.stats["errors"] += 1
+                track.identity = None
+                track.retry_at = time.monotonic() + self.retry_seconds
+            return
+
+        with self._lock:
+            if result is None:
+                track.identity = UNKNOWN
+                self.stats["unknown"] += 1
+                return
+            track.identity, track.name = result
+            self.stats["identified"] += 1
+        if self.on_identified:
+            self.on_identified(track)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
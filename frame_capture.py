@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from frame_sources import open_source, is_live
+
+# ----------------------
+# Threaded Frame Capture
+# ----------------------
+# A producer thread reads frames as fast as the source delivers them into a small ring
+# buffer; when the buffer is full the oldest frame is dropped. The processing loop calls
+# latest() and always works on the newest frame, so slow detection never leaves stale
+# frames queued in the camera driver.
+#
+# File and directory sources are paced at their native FPS by default (pace=True), so
+# they behave like a camera; pace=False reads them as fast as possible.
+
+
+class FrameCapture:
+    def __init__(self, source=0, buffer_size=2, pace=None):
+        self.source = source
+        self.capture = open_source(source)
+        self.frames = deque(maxlen=max(1, buffer_size))
+        self.pace = (not is_live(source)) if pace is None else pace
+        self.stats = {"captured": 0, "processed": 0, "dropped": 0}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="frame-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        interval = 0.0
+        if self.pace:
+            fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+            interval = 1.0 / fps
+        next_frame = time.monotonic()
+        while not self._stopped:
+            ok, frame = self.capture.read()
+            if not ok:
+                break
+            with self._condition:
+                if len(self.frames) == self.frames.maxlen:
+                    self.stats["dropped"] += 1
+                self.frames.append(frame)
+                self.stats["captured"] += 1
+                self._condition.notify_all()
+            if interval:
+                next_frame += interval
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def latest(self, timeout=5.0):
+        # Newest unseen frame as (ok, frame); older buffered frames are discarded and counted
+        # as dropped. Returns (False, None) once the source is exhausted or stopped.
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while not self.frames:
+                remaining = deadline - time.monotonic()
+                if self._stopped or remaining <= 0:
+                    return False, None
+                self._condition.wait(remaining)
+            frame = self.frames.pop()
+            self.stats["dropped"] += len(self.frames)
+            self.frames.clear()
+            self.stats["processed"] += 1
+            return True, frame
+
+    # cv2.VideoCapture-compatible surface for the existing loops
+    def read(self):
+        return self.latest()
+
+    def isOpened(self):
+        return not self._stopped or bool(self.frames)
+
+    def release(self):
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.capture.release()
+
+    def snapshot_stats(self):
+        with self._condition:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            return dict(
+                self.stats,
+                capture_fps=round(self.stats["captured"] / elapsed, 1) if elapsed else 0.0,
+                processing_fps=round(self.stats["processed"] / elapsed, 1) if elapsed else 0.0
+            )
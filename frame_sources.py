@@ -0,0 +1,58 @@
+import os
+
+import cv2
+
+# ----------------------
+# Frame Sources
+# ----------------------
+# Everything here exposes the cv2.VideoCapture subset the kiosk loops use:
+# read() -> (ok, frame), isOpened(), release() and get(cv2.CAP_PROP_FPS). A camera index
+# ("0") or a video file goes to cv2.VideoCapture; a directory is read as sorted image files,
+# so FPS and accuracy can be measured headless without a camera.
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class DirectorySource:
+    def __init__(self, path, fps=30.0):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.position = 0
+        self.fps = fps
+
+    def isOpened(self):
+        return self.position < len(self.paths)
+
+    def read(self):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        return 0.0
+
+    def release(self):
+        self.position = len(self.paths)
+
+
+def open_source(source=0):
+    # source: camera index (int or digit string), video file path, or frame directory
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return cv2.VideoCapture(int(source))
+    if os.path.isdir(source):
+        return DirectorySource(source)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Frame source not found: {source}")
+    return cv2.VideoCapture(source)
+
+
+def is_live(source):
+    return isinstance(source, int) or (isinstance(source, str) and source.isdigit())
@@ -0,0 +1,110 @@
+import json
+import logging
+import math
+
+import numpy as np
+from shapely import STRtree, contains_xy
+from shapely.geometry import Point, Polygon
+from shapely.prepared import prep
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # Great-circle distance in kilometres between two points given in degrees.
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+# ----------------------
+# Geofence Index
+# ----------------------
+class GeofenceIndex:
+    # Holds every campus zone, prepared once at startup. Zones are either circles
+    # (centre + radius, tested with the haversine distance) or polygons given as
+    # [lat, lon] vertices (tested with prepared geometry behind an STRtree; at building
+    # and campus scale a planar lon/lat point-in-polygon test is exact enough).
+    def __init__(self, zones):
+        self.circle_names = []
+        circles = []
+        self.polygon_names = []
+        polygons = []
+
+        for zone in zones:
+            name = zone.get("name", f"zone-{len(self.circle_names) + len(self.polygon_names)}")
+            if "polygon" in zone:
+                polygons.append(Polygon([(lon, lat) for lat, lon in zone["polygon"]]))
+                self.polygon_names.append(name)
+            else:
+                lat, lon = zone["center"]
+                circles.append((lat, lon, float(zone["radius_km"])))
+                self.circle_names.append(name)
+
+        self.circles = circles
+        # Radians and radii as arrays for the batch API
+        circle_array = np.array(circles, dtype=np.float64).reshape(-1, 3)
+        self._circle_lat = np.radians(circle_array[:, 0])
+        self._circle_lon = np.radians(circle_array[:, 1])
+        self._circle_radius = circle_array[:, 2]
+
+        self.polygons = polygons
+        self._prepared = [prep(polygon) for polygon in polygons]
+        self._tree = STRtree(polygons) if polygons else None
+
+    def zone_for(self, lat, lon):
+        # Name of the first zone containing the point, or None.
+        for (center_lat, center_lon, radius_km), name in zip(self.circles, self.circle_names):
+            # Cheap latitude reject before the trigonometry (1 degree of latitude ~ 111 km)
+            if abs(lat - center_lat) * 111.0 > radius_km:
+                continue
+            if haversine_km(lat, lon, center_lat, center_lon) <= radius_km:
+                return name
+
+        if self._tree is not None:
+            point = Point(lon, lat)
+            for index in self._tree.query(point):
+                if self._prepared[index].contains(point):
+                    return self.polygon_names[index]
+        return None
+
+    def contains(self, lat, lon):
+        return self.zone_for(lat, lon) is not None
+
+    def contains_many(self, lats, lons):
+        # Vectorised check for arrays of coordinates; returns a boolean array.
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        inside = np.zeros(lats.shape, dtype=bool)
+
+        if len(self.circles):
+            lat_r = np.radians(lats)[..., None]
+            lon_r = np.radians(lons)[..., None]
+            a = (np.sin((self._circle_lat - lat_r) / 2) ** 2
+                 + np.cos(lat_r) * np.cos(self._circle_lat) * np.sin((self._circle_lon - lon_r) / 2) ** 2)
+            distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+            inside |= (distance <= self._circle_radius).any(axis=-1)
+
+        for polygon in self.polygons:
+            remaining = ~inside
+            if remaining.any():
+                inside[remaining] = contains_xy(polygon, lons[remaining], lats[remaining])
+        return inside
+
+
+def load_geofence(path=None, default_center=None, default_radius_km=None):
+    # Build the index from a JSON list of zones, e.g.
+    #   [{"name": "Main campus", "center": [17.384, 78.456], "radius_km": 2.0},
+    #    {"name": "North block", "polygon": [[17.40, 78.46], [17.40, 78.47], [17.41, 78.47]]}]
+    # Falls back to a single circle around default_center when no file is configured.
+    zones = []
+    if path:
+        try:
+            with open(path) as file:
+                zones = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.error("Failed to load campus geofence from %s: %s", path, e)
+    if not zones and default_center:
+        zones = [{"name": "Main campus", "center": list(default_center), "radius_km": default_radius_km}]
+    logging.info("Loaded %d campus geofence zones", len(zones))
+    return GeofenceIndex(zones)
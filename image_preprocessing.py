@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# ----------------------
+# Upload Normalisation
+# ----------------------
+# Every uploaded face image is decoded once, rotated upright from its EXIF orientation,
+# optionally cropped to the detected face(s) and downscaled, then re-encoded as a JPEG
+# no larger than max_bytes before it is sent to S3 or Rekognition.
+DEFAULT_MAX_EDGE = 1280
+DEFAULT_MAX_BYTES = 500 * 1024
+DEFAULT_QUALITY = 85
+MIN_QUALITY = 40
+
+stats = {"images": 0, "bytes_in": 0, "bytes_out": 0, "elapsed_ms": 0.0, "fallbacks": 0}
+_stats_lock = threading.Lock()
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def _face_detector():
+    # dlib's frontal face detector, loaded once per process; None if dlib is unavailable.
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            try:
+                import dlib
+
+                _detector = dlib.get_frontal_face_detector()
+            except ImportError:
+                logging.warning("dlib is not installed; face cropping is disabled")
+                _detector = False
+        return _detector or None
+
+
+def _face_box(image, margin):
+    # Bounding box around every detected face, grown by `margin` of its size on each side.
+    detector = _face_detector()
+    if detector is None:
+        return None
+
+    import numpy as np
+
+    # Detect on a small copy; the box is scaled back to full size
+    probe = image.copy()
+    probe.thumbnail((640, 640))
+    scale = image.width / probe.width
+    faces = detector(np.asarray(probe.convert("L")), 0)
+    if not faces:
+        return None
+
+    left = min(f.left() for f in faces) * scale
+    top = min(f.top() for f in faces) * scale
+    right = max(f.right() for f in faces) * scale
+    bottom = max(f.bottom() for f in faces) * scale
+    pad_x, pad_y = (right - left) * margin, (bottom - top) * margin
+    return (
+        max(0, int(left - pad_x)),
+        max(0, int(top - pad_y)),
+        min(image.width, int(right + pad_x)),
+        min(image.height, int(bottom + pad_y)),
+    )
+
+
+def _encode_jpeg(image, max_bytes, quality):
+    # Step the quality down until the encoded image fits in max_bytes.
+    while True:
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG", quality=quality)
+        data = buffer.getvalue()
+        if len(data) <= max_bytes or quality <= MIN_QUALITY:
+            return data, quality
+        quality = max(MIN_QUALITY, quality - 10)
+
+
+def normalise_upload(data, max_edge=DEFAULT_MAX_EDGE, max_bytes=DEFAULT_MAX_BYTES,
+                     quality=DEFAULT_QUALITY, crop_faces=False, margin=0.4):
+    # Returns (bytes, report). If the image cannot be decoded the original bytes are
+    # returned unchanged, so callers can always fall through to the old behaviour.
+    # report["format"] is "JPEG" when the returned bytes are a JPEG and None when they
+    # are the untouched original, whose format the caller should keep.
+    start = time.perf_counter()
+    report = {"bytes_in": len(data), "bytes_out": len(data), "cropped": False, "resized": False, "rotated": False,
+              "format": None}
+    try:
+        image = Image.open(BytesIO(data))
+        original_format = image.format
+        # Let the JPEG decoder downscale by a power of two while decoding
+        image.draft("RGB", (max_edge, max_edge))
+
+        report["rotated"] = image.getexif().get(0x0112, 1) != 1  # EXIF Orientation tag
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+        if crop_faces:
+            box = _face_box(image, margin)
+            if box:
+                image = image.crop(box)
+                report["cropped"] = True
+
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=2.0)
+            report["resized"] = True
+
+        unchanged = not (report["rotated"] or report["cropped"] or report["resized"])
+        if unchanged and original_format == "JPEG" and len(data) <= max_bytes:
+            output = data  # Already small, upright JPEG: re-encoding would only lose quality
+        else:
+            # Rotated, cropped or resized images must be re-encoded even if that makes
+            # them bigger, so the bytes sent match the reported geometry
+            output, report["quality"] = _encode_jpeg(image, max_bytes, quality)
+        report["format"] = "JPEG"
+        report["width"], report["height"] = image.size
+    except Exception as e:
+        logging.warning("Upload normalisation skipped: %s", e)
+        output = data
+        with _stats_lock:
+            stats["fallbacks"] += 1
+
+    report["bytes_out"] = len(output)
+    report["bytes_saved"] = report["bytes_in"] - report["bytes_out"]
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    with _stats_lock:
+        stats["images"] += 1
+        stats["bytes_in"] += report["bytes_in"]
+        stats["bytes_out"] += report["bytes_out"]
+        stats["elapsed_ms"] += report["elapsed_ms"]
+    return output, report
+
+
+def snapshot_stats():
+    with _stats_lock:
+        result = dict(stats)
+    result["bytes_saved"] = result["bytes_in"] - result["bytes_out"]
+    result["avg_elapsed_ms"] = round(result["elapsed_ms"] / result["images"], 2) if result["images"] else 0.0
+    return result
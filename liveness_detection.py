@@ -1,75 +1,211 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
 import cv2
 import dlib
-import random
 
-def liveness_detection():
-    try:
-        camera = cv2.VideoCapture(0)
-        predictor = dlib.shape_predictor("C:/Users/HP/Desktop/facial-recognition-backend/shape_predictor_68_face_landmarks.dat")
-        detector = dlib.get_frontal_face_detector()
+from frame_capture import FrameCapture
+from frame_sources import open_source
+
+# ----------------------
+# Detection Settings
+# ----------------------
+# Fast mode runs the HOG detector on a frame downscaled by LIVENESS_DETECT_SCALE once every
+# LIVENESS_DETECT_EVERY frames and follows the face with a correlation tracker in between.
+# LIVENESS_DETECT_EVERY=1 and LIVENESS_DETECT_SCALE=1 give the original full-frame
+# detection on every frame. At scale 0.5 the smallest detectable face is about 160 px wide.
+PREDICTOR_PATH = os.environ.get(
+    "LIVENESS_PREDICTOR_PATH",
+    "C:/Users/HP/Desktop/facial-recognition-backend/shape_predictor_68_face_landmarks.dat"
+)
+DETECT_EVERY = int(os.environ.get("LIVENESS_DETECT_EVERY", "5"))
+DETECT_SCALE = float(os.environ.get("LIVENESS_DETECT_SCALE", "0.5"))
+TRACK_MIN_QUALITY = float(os.environ.get("LIVENESS_TRACK_MIN_QUALITY", "7"))  # Redetect below this PSR
+CHALLENGES = ["smile", "freeze", "turn"]
+FREEZE_THRESHOLD = 50  # Number of frames to remain still
+# Fewest frames in which each challenge can be completed; a shorter sequence cannot pass
+CHALLENGE_MIN_FRAMES = {"smile": 1, "freeze": FREEZE_THRESHOLD, "turn": 2}
+
+_models = None
+_models_lock = threading.Lock()
+
+
+def load_models(predictor_path=PREDICTOR_PATH):
+    # The detector and the ~100 MB landmark model are loaded once per process
+    global _models
+    with _models_lock:
+        if _models is None:
+            _models = (dlib.get_frontal_face_detector(), dlib.shape_predictor(predictor_path))
+        return _models
+
+
+# ----------------------
+# Face Locator
+# ----------------------
+class FaceLocator:
+    # Returns the main (largest) face box for each frame, detecting on a downscaled copy
+    # every `detect_every` frames and tracking the box in between.
+    def __init__(self, detector, detect_every=DETECT_EVERY, scale=DETECT_SCALE, min_quality=TRACK_MIN_QUALITY):
+        self.detector = detector
+        self.detect_every = max(1, detect_every)
+        self.scale = scale
+        self.min_quality = min_quality
+        self.tracker = None
+        self.tracked_frames = 0
+        self.stats = {"frames": 0, "detections": 0, "tracked": 0, "track_lost": 0}
+
+    def detect(self, gray):
+        self.stats["detections"] += 1
+        self.tracker = None
+        small = gray
+        if self.scale != 1:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        faces = self.detector(small)
+        if len(faces) == 0:
+            return None
+
+        face = max(faces, key=lambda rect: rect.area())
+        face = dlib.rectangle(int(face.left() / self.scale), int(face.top() / self.scale),
+                              int(face.right() / self.scale), int(face.bottom() / self.scale))
+        if self.detect_every > 1:
+            self.tracker = dlib.correlation_tracker()
+            self.tracker.start_track(gray, face)
+            self.tracked_frames = 0
+        return face
+
+    def locate(self, gray):
+        self.stats["frames"] += 1
+        if self.tracker is not None and self.tracked_frames < self.detect_every - 1:
+            quality = self.tracker.update(gray)
+            if quality >= self.min_quality:
+                self.tracked_frames += 1
+                self.stats["tracked"] += 1
+                position = self.tracker.get_position()
+                return dlib.rectangle(int(position.left()), int(position.top()),
+                                      int(position.right()), int(position.bottom()))
+            self.stats["track_lost"] += 1
+        return self.detect(gray)
 
-        # Randomly select a challenge
-        challenge = random.choice(["smile", "freeze", "turn"])
-        print(f"Challenge: {challenge.capitalize()}.")
 
-        freeze_frames = 0
-        freeze_threshold = 50  # Number of frames to remain still
+# ----------------------
+# Liveness Session
+# ----------------------
+class LivenessSession:
+    # Challenge state for one liveness attempt. Feed frames to process(); it returns the
+    # result message once the challenge is completed and None until then.
+    def __init__(self, challenge=None, detect_every=DETECT_EVERY, scale=DETECT_SCALE, predictor_path=PREDICTOR_PATH):
+        detector, self.predictor = load_models(predictor_path)
+        self.locator = FaceLocator(detector, detect_every, scale)
+        self.challenge = challenge or random.choice(CHALLENGES)  # Randomly select a challenge
+        self.freeze_frames = 0
+        self.face = None
+        self.landmarks = None
+        self.result = None
 
+    def process(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.face = self.locator.locate(gray)
+        if self.face is None:
+            self.landmarks = None
+            return None
+
+        # Landmarks only inside the located face box
+        self.landmarks = self.predictor(gray, self.face)
+
+        if self.challenge == "freeze":
+            self.freeze_frames += 1
+            if self.freeze_frames >= FREEZE_THRESHOLD:
+                self.result = "Liveness confirmed: Freeze challenge completed."
+        elif self.challenge == "smile":  # Replace with actual smile detection logic
+            self.result = "Liveness confirmed: Smile challenge completed."
+        elif self.challenge == "turn":  # Replace with actual head turn detection logic
+            self.result = "Liveness confirmed: Turn challenge completed."
+        return self.result
+
+    def annotate(self, frame):
+        # Instructions and status text, drawn only when the frame is displayed
+        if self.face is None:
+            cv2.putText(frame, "No face detected. Please align your face.", (50, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+            return frame
+
+        instructions = {"smile": "Please smile.", "freeze": "Please hold still.", "turn": "Turn your head left or right."}
+        cv2.putText(frame, instructions[self.challenge], (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        if self.result:
+            completed = {"smile": "Smile detected!", "freeze": "Freeze challenge completed!", "turn": "Turn detected!"}
+            cv2.putText(frame, completed[self.challenge], (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        return frame
+
+
+def liveness_detection(source=0, challenge=None, detect_every=DETECT_EVERY, scale=DETECT_SCALE,
+                       display=True, max_frames=None, stats=None, threaded=True):
+    # source: camera index, video file or frame directory (see frame_sources.open_source).
+    # display=False runs headless; pass a dict as `stats` to receive frame counts and FPS.
+    # threaded=True reads frames on a capture thread and always analyses the newest one
+    # (files are replayed at their native FPS); threaded=False analyses every frame in order.
+    camera = None
+    try:
+        camera = FrameCapture(source).start() if threaded else open_source(source)
+        session = LivenessSession(challenge, detect_every, scale)
+        print(f"Challenge: {session.challenge.capitalize()}.")
+
+        result = "Liveness failed: Challenge not completed."
+        frames = 0
+        started = time.perf_counter()
         while True:
             ret, frame = camera.read()
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = detector(gray)
+            if not ret:
+                break
+            frames += 1
+            completed = session.process(frame)
 
-            if len(faces) == 0:
-                cv2.putText(frame, "No face detected. Please align your face.", (50, 50), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-                cv2.imshow("Liveness Detection", frame)
+            if display:
+                cv2.imshow("Liveness Detection", session.annotate(frame))
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
-                continue
-
-            for face in faces:
-                landmarks = predictor(gray, face)
-
-                # Display instructions based on the challenge
-                if challenge == "smile":
-                    cv2.putText(frame, "Please smile.", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-
-                elif challenge == "freeze":
-                    cv2.putText(frame, "Please hold still.", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-                    freeze_frames += 1
-                    if freeze_frames >= freeze_threshold:
-                        cv2.putText(frame, "Freeze challenge completed!", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                        camera.release()
-                        cv2.destroyAllWindows()
-                        return f"Liveness confirmed: Freeze challenge completed."
-
-                elif challenge == "turn":
-                    cv2.putText(frame, "Turn your head left or right.", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
-
-                # Check challenge completion
-                if challenge == "smile":  # Replace with actual smile detection logic
-                    cv2.putText(frame, "Smile detected!", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                    camera.release()
-                    cv2.destroyAllWindows()
-                    return f"Liveness confirmed: Smile challenge completed."
-
-                elif challenge == "turn":  # Replace with actual head turn detection logic
-                    cv2.putText(frame, "Turn detected!", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-                    camera.release()
-                    cv2.destroyAllWindows()
-                    return f"Liveness confirmed: Turn challenge completed."
-
-            cv2.imshow("Liveness Detection", frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if completed:
+                result = completed
+                break
+            if max_frames and frames >= max_frames:
                 break
 
-        camera.release()
-        cv2.destroyAllWindows()
-        return "Liveness failed: Challenge not completed."
+        if stats is not None:
+            elapsed = time.perf_counter() - started
+            stats.update(session.locator.stats, seconds=round(elapsed, 3),
+                         fps=round(frames / elapsed, 1) if elapsed else 0.0)
+            if threaded:
+                stats["capture"] = camera.snapshot_stats()
+        return result
 
     except Exception as e:
         return f"Liveness detection failed: {str(e)}"
+    finally:
+        if camera is not None:
+            camera.release()
+        if display:
+            cv2.destroyAllWindows()
+
 
 if __name__ == "__main__":
-    print(liveness_detection())
+    parser = argparse.ArgumentParser(description="Challenge-based liveness check")
+    parser.add_argument("--source", default="0", help="Camera index, video file or frame directory")
+    parser.add_argument("--challenge", choices=CHALLENGES)
+    parser.add_argument("--detect-every", type=int, default=DETECT_EVERY)
+    parser.add_argument("--scale", type=float, default=DETECT_SCALE)
+    parser.add_argument("--headless", action="store_true", help="Do not open a preview window")
+    parser.add_argument("--max-frames", type=int)
+    parser.add_argument("--stats", action="store_true", help="Print frame statistics to stderr")
+    parser.add_argument("--no-capture-thread", action="store_true", help="Analyse every frame in order")
+    args = parser.parse_args()
+
+    run_stats = {}
+    print(liveness_detection(args.source, args.challenge, args.detect_every, args.scale,
+                             display=not args.headless, max_frames=args.max_frames, stats=run_stats,
+                             threaded=not args.no_capture_thread))
+    if args.stats:
+        print(json.dumps(run_stats), file=sys.stderr)
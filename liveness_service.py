@@ -0,0 +1,167 @@
+import base64
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from flask import Flask, request, jsonify
+
+import liveness_detection
+
+# ----------------------
+# Liveness Service
+# ----------------------
+# Long-lived replacement for spawning `python liveness_detection.py` per request. Each
+# worker process loads the detector and landmark model once (pool initializer) and keeps
+# them resident, so a request pays only for decoding and analysing its frames.
+#
+#   GET  /liveness/challenge
+#   -> {"nonce": "...", "challenge": "freeze", "min_frames": 50, "expires_in": 120}
+#   POST /liveness  {"frames": [<base64 JPEG/PNG>, ...], "nonce": "..."}
+#   -> {"result": "Liveness confirmed: ...", "confirmed": true, "challenge": ..., "frames": N, ...}
+#   GET  /health
+#
+# The challenge is issued before capture so the client can show it to the user; the
+# nonce is single-use and names the challenge the frames are checked against.
+LIVENESS_HOST = os.environ.get("LIVENESS_HOST", "127.0.0.1")
+LIVENESS_PORT = int(os.environ.get("LIVENESS_PORT", "5001"))
+LIVENESS_WORKERS = int(os.environ.get("LIVENESS_WORKERS", str(os.cpu_count() or 2)))
+MAX_FRAMES = int(os.environ.get("LIVENESS_MAX_FRAMES", "120"))
+CHALLENGE_TTL_SECONDS = int(os.environ.get("LIVENESS_CHALLENGE_TTL_SECONDS", "120"))
+
+app = Flask(__name__)
+logging.basicConfig(level=logging.INFO)
+
+_pool = None
+_pool_lock = threading.Lock()
+stats = {"requests": 0, "confirmed": 0, "failed": 0, "errors": 0, "frames": 0, "analysis_ms": 0.0}
+_stats_lock = threading.Lock()
+_challenges = {}  # nonce -> (challenge, expires_at)
+_challenges_lock = threading.Lock()
+
+
+# ----------------------
+# Worker-side functions (run inside the process pool)
+# ----------------------
+def _warm():
+    liveness_detection.load_models()
+
+
+def _analyse(encoded_frames, challenge):
+    started = time.perf_counter()
+    session = liveness_detection.LivenessSession(challenge)
+    result = None
+    analysed = 0
+    for data in encoded_frames:
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            continue
+        analysed += 1
+        result = session.process(frame)
+        if result:
+            break
+    return {
+        "result": result or "Liveness failed: Challenge not completed.",
+        "confirmed": bool(result),
+        "challenge": session.challenge,
+        "frames": analysed,
+        "analysis_ms": round((time.perf_counter() - started) * 1000, 1),
+        "locator": session.locator.stats
+    }
+
+
+def executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=LIVENESS_WORKERS, initializer=_warm)
+        return _pool
+
+
+# ----------------------
+# Challenges
+# ----------------------
+def issue_challenge():
+    nonce = secrets.token_urlsafe(16)
+    challenge = secrets.choice(liveness_detection.CHALLENGES)
+    now = time.monotonic()
+    with _challenges_lock:
+        for expired in [n for n, (_, expires_at) in _challenges.items() if expires_at <= now]:
+            del _challenges[expired]
+        _challenges[nonce] = (challenge, now + CHALLENGE_TTL_SECONDS)
+    return nonce, challenge
+
+
+def redeem_challenge(nonce):
+    # Single use: a nonce is consumed whether or not the attempt passes
+    with _challenges_lock:
+        entry = _challenges.pop(nonce, None)
+    if entry is None or entry[1] <= time.monotonic():
+        return None
+    return entry[0]
+
+
+# ----------------------
+# Routes
+# ----------------------
+@app.route("/health", methods=["GET"])
+def health():
+    with _stats_lock:
+        return jsonify(dict(stats, workers=LIVENESS_WORKERS))
+
+
+@app.route("/liveness/challenge", methods=["GET"])
+def liveness_challenge():
+    nonce, challenge = issue_challenge()
+    return jsonify({"nonce": nonce, "challenge": challenge,
+                    "min_frames": liveness_detection.CHALLENGE_MIN_FRAMES[challenge],
+                    "expires_in": CHALLENGE_TTL_SECONDS})
+
+
+@app.route("/liveness", methods=["POST"])
+def liveness():
+    payload = request.get_json(silent=True) or {}
+    frames = payload.get("frames") or []
+    if not frames:
+        return jsonify({"message": "No frames provided."}), 400
+    if len(frames) > MAX_FRAMES:
+        return jsonify({"message": f"At most {MAX_FRAMES} frames per request."}), 400
+    challenge = redeem_challenge(payload.get("nonce"))
+    if challenge is None:
+        return jsonify({"message": "Unknown or expired challenge; request a new one from /liveness/challenge."}), 400
+    min_frames = liveness_detection.CHALLENGE_MIN_FRAMES[challenge]
+    if len(frames) < min_frames:
+        return jsonify({"message": f"The {challenge} challenge needs at least {min_frames} frames, got {len(frames)}."}), 400
+
+    try:
+        encoded_frames = [base64.b64decode(frame) for frame in frames]
+    except (ValueError, TypeError):
+        return jsonify({"message": "Frames must be base64-encoded images."}), 400
+
+    try:
+        outcome = executor().submit(_analyse, encoded_frames, challenge).result()
+    except Exception as e:
+        logging.error("Liveness analysis failed: %s", e, exc_info=True)
+        with _stats_lock:
+            stats["requests"] += 1
+            stats["errors"] += 1
+        return jsonify({"message": "Liveness detection failed", "details": str(e)}), 500
+
+    with _stats_lock:
+        stats["requests"] += 1
+        stats["confirmed" if outcome["confirmed"] else "failed"] += 1
+        stats["frames"] += outcome["frames"]
+        stats["analysis_ms"] = round(stats["analysis_ms"] + outcome["analysis_ms"], 1)
+    return jsonify(outcome)
+
+
+if __name__ == "__main__":
+    # Start the workers (and load the models) before accepting requests
+    for future in [executor().submit(_warm) for _ in range(LIVENESS_WORKERS)]:
+        future.result()
+    logging.info("Liveness service ready with %d workers on %s:%d", LIVENESS_WORKERS, LIVENESS_HOST, LIVENESS_PORT)
+    app.run(host=LIVENESS_HOST, port=LIVENESS_PORT, threaded=True)
@@ -1,13 +1,22 @@
-import boto3
+from aws_clients import get_client, get_resource
 import logging
+import os
+from face_matcher import build_matcher, RekognitionMatcher
+import batch_recognition
+import class_statistics
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dynamo_batch import batch_write_items, BATCH_WRITE_LIMIT
+from dynamo_scan import is_missing_index
+from botocore.exceptions import ClientError
+from data_version import DataVersion
 
 # Set up logging
 logging.basicConfig(filename="errors.log", level=logging.ERROR)
 
 # Function to query user info from DynamoDB (validation step)
 def get_user_info(user_id):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # AWS region
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # AWS region
     try:
         response = dynamodb.get_item(
             TableName="Users",  # Replace with your Users table name
@@ -23,7 +32,7 @@ def get_user_info(user_id):
 
 # Function to mark individual student attendance
 def mark_individual_attendance(roll_number, status):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # AWS region
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # AWS region
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current timestamp
     date = datetime.now().strftime("%Y-%m-%d")  # Attendance date
 
@@ -44,59 +53,27 @@ def mark_individual_attendance(roll_number, status):
         print(f"Error marking individual attendance: {str(e)}")
 
 # Function to update class-level attendance statistics
-def update_class_statistics(status):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # AWS region
+def update_class_statistics(status, count=1):
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # AWS region
     date = datetime.now().strftime("%Y-%m-%d")  # Attendance date
 
     try:
-        # Fetch existing class-level record
-        response = dynamodb.get_item(
-            TableName="attendance",
-            Key={
-                "id": {"S": f"class-{date}"},
-                "date": {"S": date}
-            }
-        )
-
-        # Check if the record exists and update counts accordingly
-        if "Item" in response:
-            present_count = int(response["Item"]["present_count"]["N"])
-            absent_count = int(response["Item"]["absent_count"]["N"])
-            
-            if status == "present":
-                present_count += 1
-            else:
-                absent_count += 1
-
-            # Update the class-level record
-            dynamodb.put_item(
-                TableName="attendance",
-                Item={
-                    "id": {"S": f"class-{date}"},
-                    "date": {"S": date},
-                    "present_count": {"N": str(present_count)},
-                    "absent_count": {"N": str(absent_count)}
-                }
-            )
-        else:
-            # Initialize class-level record if not exists
-            dynamodb.put_item(
-                TableName="attendance",
-                Item={
-                    "id": {"S": f"class-{date}"},
-                    "date": {"S": date},
-                    "present_count": {"N": "1" if status == "present" else "0"},
-                    "absent_count": {"N": "1" if status == "absent" else "0"}
-                }
-            )
+        # Atomic ADD on one of the day's counter shards (no read, no lost updates)
+        class_statistics.increment(dynamodb, date, status, count)
         print(f"Class statistics updated for {date}.")
     except Exception as e:
         logging.error(f"Error updating class statistics for {date}: {str(e)}")
         print(f"Error updating class statistics: {str(e)}")
 
-# Combined function to handle attendance marking
-def mark_attendance(user_id, status):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # AWS region
+# Advance the attendance data version so cached dashboards and aggregates refresh
+def bump_data_version():
+    rollups_table = get_resource("dynamodb", region_name="ap-south-1").Table("attendance-rollups")
+    return DataVersion(rollups_table).bump()
+
+# Combined function to handle attendance marking. Batch callers pass bump_version=False
+# and bump once when the batch is done.
+def mark_attendance(user_id, status, bump_version=True):
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # AWS region
     
     # Validate user existence
     user_name = get_user_info(user_id)
@@ -110,66 +87,133 @@ def mark_attendance(user_id, status):
     # Update class-level statistics
     update_class_statistics(status)
 
-def mark_absentees():
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")
-    date = datetime.now().strftime("%Y-%m-%d")
+    if bump_version:
+        bump_data_version()
+
+def marked_student_ids(dynamodb, date):
+    # Students with any attendance record for `date` (present, or absent from an earlier
+    # run), read page by page from the date-index GSI (hash key "date", range key "id",
+    # projection ALL). Tables without the index fall back to a filtered scan. Web app
+    # marks use id = "<student>_<timestamp>" with the student in student_id; batch marks use id.
+    marked = set()
+    request = {
+        "TableName": "attendance",
+        "ProjectionExpression": "id, student_id",
+        "ExpressionAttributeNames": {"#d": "date"},
+        "ExpressionAttributeValues": {":d": {"S": date}}
+    }
+    try:
+        for page in dynamodb.get_paginator("query").paginate(IndexName="date-index", KeyConditionExpression="#d = :d",
+                                                              **request):
+            marked.update(item.get("student_id", item["id"])["S"] for item in page.get("Items", []))
+    except ClientError as e:
+        if not is_missing_index(e):
+            raise
+        print(f"attendance table has no date-index; scanning for {date} instead")
+        marked.clear()
+        for page in dynamodb.get_paginator("scan").paginate(FilterExpression="#d = :d", **request):
+            marked.update(item.get("student_id", item["id"])["S"] for item in page.get("Items", []))
+    return marked
+
+def write_absent_chunk(dynamodb, date, roll_numbers):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    written = batch_write_items(dynamodb, "attendance", [
+        {"PutRequest": {"Item": {
+            "id": {"S": roll_number},
+            "date": {"S": date},
+            "status": {"S": "absent"},
+            "timestamp": {"S": timestamp}
+        }}}
+        for roll_number in roll_numbers
+    ])
+    class_statistics.increment(dynamodb, date, "absent", written)
+    return written
+
+def mark_absentees(date=None, workers=8, progress_every=1000):
+    # Streams the Users table page by page and writes absent records in BatchWriteItem
+    # chunks of 25 across a thread pool. Anyone who already has a record for the date is
+    # skipped, so the job is idempotent and a re-run after a crash resumes where it stopped.
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    summary = {"date": date, "students": 0, "already_marked": 0, "marked_absent": 0, "failed": 0}
     
     try:
-        # Fetch all students from the Users table
-        users_response = dynamodb.scan(TableName="Users")
-        all_students = [item["id"]["S"] for item in users_response["Items"]]
-        
-        # Fetch students already marked as present
-        attendance_response = dynamodb.scan(
-            TableName="attendance",
-            FilterExpression="date = :d AND status = :s",
-            ExpressionAttributeValues={
-                ":d": {"S": date},
-                ":s": {"S": "present"}
-            }
-        )
-        present_students = [item["id"]["S"] for item in attendance_response["Items"]]
-        
-        # Find absentees by subtracting present students from all students
-        absentees = set(all_students) - set(present_students)
-        for roll_number in absentees:
-            dynamodb.put_item(
-                TableName="attendance",
-                Item={
-                    "id": {"S": roll_number},
-                    "date": {"S": date},
-                    "status": {"S": "absent"},
-                    "timestamp": {"S": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-                }
-            )
-            print(f"Marked absent: {roll_number}")
+        # Students already marked for today (present or absent)
+        marked = marked_student_ids(dynamodb, date)
+        print(f"{len(marked)} students already marked for {date}")
+
+        pending = {}  # future -> number of students in its chunk
+        chunk = []
+        next_report = progress_every
+
+        def collect(done_futures):
+            for future in done_futures:
+                size = pending.pop(future)
+                try:
+                    summary["marked_absent"] += future.result()
+                except Exception as e:
+                    summary["failed"] += size
+                    logging.error(f"Error writing absentee batch for {date}: {str(e)}")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            paginator = dynamodb.get_paginator("scan")
+            for page in paginator.paginate(TableName="Users", ProjectionExpression="id"):
+                for item in page.get("Items", []):
+                    summary["students"] += 1
+                    roll_number = item["id"]["S"]
+                    if roll_number in marked:
+                        summary["already_marked"] += 1
+                        continue
+                    chunk.append(roll_number)
+                    if len(chunk) == BATCH_WRITE_LIMIT:
+                        pending[executor.submit(write_absent_chunk, dynamodb, date, chunk)] = len(chunk)
+                        chunk = []
+
+                # Keep at most a few batches in flight so memory stays flat
+                if len(pending) >= workers * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                if summary["students"] >= next_report:
+                    print(f"Progress: {summary['students']} students scanned, {summary['marked_absent']} marked absent")
+                    next_report += progress_every
+
+            if chunk:
+                pending[executor.submit(write_absent_chunk, dynamodb, date, chunk)] = len(chunk)
+            collect(wait(pending).done)
+
+        print(f"Marked {summary['marked_absent']} absent out of {summary['students']} students for {date} "
+              f"({summary['already_marked']} already marked, {summary['failed']} failed)")
     except Exception as e:
         print(f"Error marking absentees: {str(e)}")
-
-def process_all_images(bucket_name, collection_id):
-    rekognition = boto3.client("rekognition", region_name="ap-south-1")
-    s3 = boto3.client("s3")
-
-    # List all images in the S3 bucket
-    response = s3.list_objects_v2(Bucket=bucket_name)
-    for obj in response.get("Contents", []):
-        image_name = obj["Key"]
-        try:
-            response = rekognition.search_faces_by_image(
-                CollectionId=collection_id,
-                Image={"S3Object": {"Bucket": bucket_name, "Name": image_name}},
-                MaxFaces=1
-            )
-            if response["FaceMatches"]:
-                user_id = response["FaceMatches"][0]["Face"]["ExternalImageId"]
-                mark_attendance(user_id, "present")
-            else:
-                print(f"No face match for {image_name}")
-        except Exception as e:
-            print(f"Error processing {image_name}: {str(e)}")
+    if summary["marked_absent"]:
+        bump_data_version()
+    return summary
+
+# Batch recognition settings (SearchFacesByImage TPS quota applies to Rekognition only)
+RECOGNITION_WORKERS = int(os.environ.get("RECOGNITION_WORKERS", "16"))
+REKOGNITION_TPS = float(os.environ.get("REKOGNITION_TPS", "50"))
+RECOGNITION_MANIFEST = os.environ.get("RECOGNITION_MANIFEST", "recognition_manifest.jsonl")
+
+def process_all_images(bucket_name, collection_id, prefix="", manifest_path=RECOGNITION_MANIFEST):
+    rekognition = get_client("rekognition", region_name="ap-south-1")
+    s3 = get_client("s3")
+    matcher = build_matcher(rekognition, collection_id, s3)
+    tps = REKOGNITION_TPS if isinstance(matcher, RekognitionMatcher) else 0
+
+    # Paginated listing -> bounded worker pool -> mark; resumable via the manifest.
+    # The data version is bumped once at the end (also after a failed run, since some
+    # marks may already have been written).
+    try:
+        return batch_recognition.run(
+            s3, bucket_name.strip(), matcher,
+            lambda user_id, status: mark_attendance(user_id, status, bump_version=False),
+            workers=RECOGNITION_WORKERS, tps=tps, manifest_path=manifest_path, prefix=prefix
+        )
+    finally:
+        bump_data_version()
 
 def send_email(student_email, subject, body):
-    ses = boto3.client("ses", region_name="ap-south-1")
+    ses = get_client("ses", region_name="ap-south-1")
     try:
         response = ses.send_email(
             Source="your-email@example.com",
@@ -184,7 +228,7 @@ def send_email(student_email, subject, body):
         print(f"Error sending email: {str(e)}")
 
 def send_sms(phone_number, message):
-    sns = boto3.client("sns", region_name="ap-south-1")
+    sns = get_client("sns", region_name="ap-south-1")
     try:
         response = sns.publish(
             PhoneNumber=phone_number,
@@ -194,4 +238,5 @@ def send_sms(phone_number, message):
     except Exception as e:
         print(f"Error sending SMS: {str(e)}")
 
-process_all_images("ruthvik-bucket-mumbai ", "students-collection")
+if __name__ == "__main__":
+    process_all_images("ruthvik-bucket-mumbai ", "students-collection")
@@ -0,0 +1,293 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ----------------------
+# Transports
+# ----------------------
+class TwilioTransport:
+    # Sends SMS through Twilio. Credentials are loaded (by start(), from the dispatcher's
+    # start) and the client is built once, then shared by every dispatcher worker.
+    def __init__(self):
+        self.account_sid = self.auth_token = self.from_number = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = os.getenv("TWILIO_PHONE_NUMBER")  # Or Messaging Service SID if using one
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from twilio.rest import Client
+
+                if not (self.account_sid and self.auth_token and self.from_number):
+                    raise RuntimeError("Twilio credentials are missing. Ensure that .env is correctly configured.")
+                self._client = Client(self.account_sid, self.auth_token)
+            return self._client
+
+    def send(self, phone_number, message):
+        response = self.client().messages.create(to=phone_number, from_=self.from_number, body=message)
+        return response.sid
+
+
+class InMemoryTransport:
+    # Records messages instead of sending them; `fail_times` makes the first N sends raise.
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def start(self):
+        pass
+
+    def send(self, phone_number, message):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("Simulated transport failure")
+            self.sent.append((phone_number, message))
+            return f"fake-{len(self.sent)}"
+
+
+# ----------------------
+# Spool Ownership
+# ----------------------
+# Every process spools into its own directory, spool_dir/<owner>/, and holds an exclusive
+# lock on spool_dir/<owner>.lock while it runs. The OS releases the lock when the process
+# exits, however it exits, so a free lock marks a spool whose sender is gone.
+def _try_lock(file):
+    try:
+        if fcntl:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _still_linked(file, path):
+    # False if another process removed the lock file between our open and lock
+    try:
+        return os.path.samestat(os.fstat(file.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+# ----------------------
+# Dispatcher
+# ----------------------
+class NotificationDispatcher:
+    # Delivers messages on background workers. Every message is written to this
+    # process's spool directory before it is queued and removed once it is delivered (or
+    # gives up). start() replays only spools left by processes that have exited, claiming
+    # each entry with an atomic rename into its own spool first, so a message is replayed
+    # by one process and never while its original sender is still working on it.
+    def __init__(self, transport, workers=2, queue_size=1000, max_attempts=5,
+                 base_delay=1.0, spool_dir=None):
+        self.transport = transport
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.spool_dir = spool_dir
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"enqueued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0}
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._own_dir = None
+        self._lock_file = None
+        self._spool_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # -- spool --
+    def _open_spool(self):
+        # Creates and locks this process's spool on first use
+        with self._spool_lock:
+            if self._own_dir is None:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                while True:
+                    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                    lock_path = os.path.join(self.spool_dir, f"{owner}.lock")
+                    lock_file = open(lock_path, "a")
+                    if _try_lock(lock_file) and _still_linked(lock_file, lock_path):
+                        break
+                    lock_file.close()
+                own_dir = os.path.join(self.spool_dir, owner)
+                os.makedirs(own_dir, exist_ok=True)
+                self._lock_file, self._own_dir = lock_file, own_dir
+            return self._own_dir
+
+    def _spool_path(self, message_id):
+        return os.path.join(self._open_spool(), f"{message_id}.json")
+
+    def _spool(self, entry):
+        if not self.spool_dir:
+            return
+        path = self._spool_path(entry["id"])
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)  # Atomic, so a crash never leaves a half-written entry
+
+    def _unspool(self, entry):
+        if not self.spool_dir:
+            return
+        try:
+            os.remove(self._spool_path(entry["id"]))
+        except FileNotFoundError:
+            pass
+
+    def _claim(self, source_dir):
+        # Moves every entry in source_dir into this process's spool. A rename either
+        # succeeds or finds the entry already claimed by another process.
+        own_dir = self._open_spool()
+        claimed = []
+        for name in os.listdir(source_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(own_dir, name)
+            try:
+                os.rename(os.path.join(source_dir, name), path)
+            except FileNotFoundError:
+                continue
+            claimed.append(path)
+        return claimed
+
+    def _claim_abandoned(self):
+        own_dir = self._open_spool()
+        paths = self._claim(self.spool_dir)  # Entries from the old single-directory layout
+        for name in os.listdir(self.spool_dir):
+            lock_path = os.path.join(self.spool_dir, name)
+            if not name.endswith(".lock") or lock_path == self._lock_file.name:
+                continue
+            try:
+                lock_file = open(lock_path, "a")
+            except OSError:
+                continue
+            try:
+                if not _try_lock(lock_file):
+                    continue  # Its process is still running and sending these itself
+                owner_dir = lock_path[:-len(".lock")]
+                if os.path.isdir(owner_dir) and owner_dir != own_dir:
+                    paths += self._claim(owner_dir)
+                    try:
+                        os.rmdir(owner_dir)
+                    except OSError:
+                        pass
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+            finally:
+                lock_file.close()
+        return paths
+
+    def _replay_spool(self):
+        if not self.spool_dir:
+            return 0
+        paths = self._claim_abandoned()
+        replayed = 0
+        for path in sorted(paths, key=os.path.getmtime):
+            try:
+                with open(path) as file:
+                    entry = json.load(file)
+                self.queue.put_nowait(entry)
+                replayed += 1
+            except queue.Full:
+                # Left in this process's spool, for whichever process starts after it exits
+                logging.warning("Notification queue full; %d spooled messages wait for the next restart",
+                                len(paths) - replayed)
+                break
+            except (OSError, ValueError) as e:
+                logging.error("Skipping unreadable spooled notification %s: %s", path, e)
+        return replayed
+
+    # -- lifecycle --
+    def start(self):
+        self.transport.start()
+        replayed = self._replay_spool()
+        if replayed:
+            logging.info("Replaying %d spooled notifications", replayed)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"notifier-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=5.0):
+        # Let queued messages drain, then stop the workers. Undelivered messages stay spooled.
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def enqueue(self, phone_number, message):
+        # Returns as soon as the message is spooled and queued; False if the queue is full.
+        entry = {"id": uuid.uuid4().hex, "to": phone_number, "body": message, "attempts": 0}
+        self._spool(entry)
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # Still on disk, so it is picked up on the next start()
+            logging.warning("Notification queue full; message to %s left in spool", phone_number)
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                entry = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                self._deliver(entry)
+            finally:
+                self.queue.task_done()
+
+    def _deliver(self, entry):
+        while True:
+            entry["attempts"] += 1
+            try:
+                sid = self.transport.send(entry["to"], entry["body"])
+                logging.info(f"SMS sent successfully to {entry['to']}. Message SID: {sid}")
+                self._count("sent")
+                self._unspool(entry)
+                return
+            except Exception as e:
+                if entry["attempts"] >= self.max_attempts or self._stopping.is_set():
+                    logging.error(f"Failed to send SMS to {entry['to']} after {entry['attempts']} attempts: {e}")
+                    self._count("failed")
+                    if entry["attempts"] >= self.max_attempts:
+                        self._unspool(entry)
+                    return
+                # Exponential backoff with jitter before the next attempt
+                delay = self.base_delay * (2 ** (entry["attempts"] - 1))
+                logging.warning(f"SMS to {entry['to']} failed (attempt {entry['attempts']}), retrying in {delay:.1f}s: {e}")
+                self._count("retried")
+                self._spool(entry)
+                time.sleep(delay * random.uniform(0.5, 1.0))
@@ -0,0 +1,172 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# ----------------------
+# Configuration
+# ----------------------
+# BCRYPT_ROUNDS sets the work factor for new hashes. With BCRYPT_TARGET_MS set, the work
+# factor is instead auto-tuned at startup (tune(), called from the app's entry point) to
+# the highest cost whose hash time stays within that latency budget on this machine.
+# Stored hashes are only upgraded, never downgraded, so hosts that tune to different
+# costs do not rewrite each other's hashes.
+DEFAULT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+TARGET_MS = os.environ.get("BCRYPT_TARGET_MS")
+MIN_ROUNDS, MAX_ROUNDS = 10, 15
+# Each web server process has its own pool, so by default the CPUs are split across the
+# WEB_CONCURRENCY processes (gunicorn's worker count) and capped at a few per process.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+POOL_SIZE = int(os.environ.get("BCRYPT_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // WEB_CONCURRENCY)))))
+# forkserver starts workers from a clean process, so the app's threads and boto3 clients
+# are not forked into them; spawn where forkserver is unavailable (Windows)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_rounds = None
+
+# Recent verification latencies (queueing + hashing), for percentile reporting
+_latencies = deque(maxlen=5000)
+_stats = {"verified": 0, "failed": 0, "hashed": 0, "rehashed": 0}
+_stats_lock = threading.Lock()
+
+
+# ----------------------
+# Worker-side functions (run inside the process pool)
+# ----------------------
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+
+def _time_rounds(rounds):
+    start = time.perf_counter()
+    bcrypt.hashpw(b"autotune-probe", bcrypt.gensalt(rounds))
+    return (time.perf_counter() - start) * 1000
+
+
+# ----------------------
+# Pool and work factor
+# ----------------------
+def _executor():
+    # Created lazily and per process, so pre-forking servers don't share a pool
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=POOL_SIZE, mp_context=multiprocessing.get_context(START_METHOD))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def autotune(target_ms):
+    # Highest cost in [MIN_ROUNDS, MAX_ROUNDS] whose hash time fits the budget. Each step
+    # doubles the cost, so we stop at the first one that exceeds it.
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = _executor().submit(_time_rounds, rounds).result()
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    logging.info("bcrypt work factor auto-tuned to %d for a %.0f ms budget", chosen, target_ms)
+    return chosen
+
+
+def tune():
+    # Settle the work factor (running the autotune probes if configured) before serving
+    global _rounds
+    if _rounds is None:
+        _rounds = autotune(float(TARGET_MS)) if TARGET_MS else DEFAULT_ROUNDS
+    return _rounds
+
+
+def current_rounds():
+    # tune() has normally run at startup; scripts that import this module tune on first use
+    return _rounds if _rounds is not None else tune()
+
+
+def hash_rounds(password_hash):
+    # Cost encoded in a bcrypt hash, e.g. 12 for "$2b$12$..."
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    rounds = hash_rounds(password_hash)
+    return rounds is None or rounds < current_rounds()
+
+
+# ----------------------
+# Public API
+# ----------------------
+def hash_password(password):
+    result = _executor().submit(_hash, password.encode(), current_rounds()).result().decode()
+    with _stats_lock:
+        _stats["hashed"] += 1
+    return result
+
+
+def verify_password(password, password_hash):
+    start = time.perf_counter()
+    ok = _executor().submit(_check, password.encode(), password_hash.encode()).result()
+    with _stats_lock:
+        _latencies.append((time.perf_counter() - start) * 1000)
+        _stats["verified" if ok else "failed"] += 1
+    return ok
+
+
+def rehash_in_background(password, on_done, executor):
+    # Hash with the current work factor off the request path and pass the new hash to
+    # on_done(new_hash) on `executor` (a thread pool). Used to upgrade stored hashes after
+    # a successful login. Done callbacks run on the process pool's result thread, so the
+    # (slow) store write is handed off rather than delaying every other pending result.
+    future = _executor().submit(_hash, password.encode(), current_rounds())
+
+    def store(new_hash):
+        try:
+            on_done(new_hash)
+            with _stats_lock:
+                _stats["rehashed"] += 1
+        except Exception as e:
+            logging.error("Failed to upgrade password hash: %s", e)
+
+    def done(completed):
+        try:
+            executor.submit(store, completed.result().decode())
+        except Exception as e:
+            logging.error("Failed to upgrade password hash: %s", e)
+
+    future.add_done_callback(done)
+    return future
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def snapshot_stats():
+    with _stats_lock:
+        latencies = list(_latencies)
+        result = dict(_stats)
+    result.update({
+        "rounds": _rounds,
+        "workers": POOL_SIZE,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    })
+    return result
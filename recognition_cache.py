@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image
+
+from face_matcher import FaceMatcher
+
+# ----------------------
+# Recognition Result Cache
+# ----------------------
+# Wraps any FaceMatcher. Searches on raw image bytes are cached under the SHA-256 of the
+# bytes; on an exact miss, a 64-bit difference hash (dHash) finds near-duplicate frames
+# (a resubmitted photo that was re-encoded or slightly cropped). A near hit is only
+# served to the same caller `scope` that stored it (e.g. the same logged-in student):
+# two different people at the same kiosk framing can land a few bits apart, so a
+# perceptual match must never decide identity across callers. Without a scope only
+# exact hits are served.
+#
+# Only searches that matched someone are cached. index()/remove() clear this process's
+# cache, but other workers never see that, so a "no match" is not kept around to hide a
+# student registered in another process. Entries expire after ttl_seconds and the oldest
+# are evicted past max_entries. S3Object searches are passed straight through.
+
+
+def difference_hash(data, size=8):
+    # 64-bit dHash: compare neighbouring pixels of a 9x8 greyscale thumbnail
+    image = Image.open(BytesIO(data))
+    image.draft("L", (size * 8, size * 8))  # JPEG decode at reduced scale
+    pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class CachedMatcher(FaceMatcher):
+    def __init__(self, matcher, ttl_seconds=300, max_entries=1024, max_distance=4):
+        self.matcher = matcher
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        # (sha256, threshold, max_faces) -> (expires_at, dhash, matches, scope)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    # -- internal --
+    def _perceptual(self, data):
+        try:
+            return difference_hash(data)
+        except Exception as e:
+            logging.warning("Could not compute perceptual hash: %s", e)
+            return None
+
+    def _near(self, dhash, threshold, max_faces, scope, now):
+        best, best_distance = None, self.max_distance + 1
+        for (digest, entry_threshold, entry_max_faces), entry in self._entries.items():
+            expires_at, entry_hash, _, entry_scope = entry
+            if (entry_hash is None or expires_at < now or entry_scope != scope
+                    or entry_threshold != threshold or entry_max_faces != max_faces):
+                continue
+            distance = hamming(dhash, entry_hash)
+            if distance < best_distance:
+                best, best_distance = (digest, entry_threshold, entry_max_faces), distance
+        return best
+
+    def _lookup(self, key, data, threshold, max_faces, scope, now):
+        # Returns (matches, dhash); matches is None on a miss
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry[2], entry[1]
+        dhash = self._perceptual(data)
+        if dhash is not None and scope is not None:
+            with self._lock:
+                near_key = self._near(dhash, threshold, max_faces, scope, now)
+                if near_key is not None:
+                    self._entries.move_to_end(near_key)
+                    self.stats["near_hits"] += 1
+                    return self._entries[near_key][2], dhash
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, dhash
+
+    def _store(self, key, dhash, matches, scope, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, dhash, matches, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    # -- FaceMatcher API --
+    def search(self, image, threshold=80, max_faces=10, scope=None):
+        if "Bytes" not in image:
+            return self.matcher.search(image, threshold=threshold, max_faces=max_faces)
+
+        data = image["Bytes"]
+        key = (hashlib.sha256(data).hexdigest(), threshold, max_faces)
+        now = time.monotonic()
+        matches, dhash = self._lookup(key, data, threshold, max_faces, scope, now)
+        if matches is not None:
+            return [dict(match) for match in matches]
+
+        matches = self.matcher.search(image, threshold=threshold, max_faces=max_faces)
+        if matches:
+            self._store(key, dhash, matches, scope, now)
+        return matches
+
+    def index(self, image, external_id):
+        records = self.matcher.index(image, external_id)
+        self.invalidate()
+        return records
+
+    def remove(self, external_id):
+        removed = self.matcher.remove(external_id)
+        self.invalidate()
+        return removed
+
+    def persist(self):
+        return self.matcher.persist()
+
+    def invalidate(self):
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.stats["invalidations"] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["near_hits"]
+            lookups = hits + self.stats["misses"]
+            return dict(self.stats, size=len(self._entries), saved_calls=hits,
+                        hit_rate=round(hits / lookups, 4) if lookups else 0.0)
+
+
+def cached_matcher(matcher):
+    # RECOGNITION_CACHE=0 disables the cache; the other settings come from the environment.
+    if os.environ.get("RECOGNITION_CACHE", "1") == "0":
+        return matcher
+    return CachedMatcher(
+        matcher,
+        ttl_seconds=int(os.environ.get("RECOGNITION_CACHE_TTL_SECONDS", "300")),
+        max_entries=int(os.environ.get("RECOGNITION_CACHE_MAX_ENTRIES", "1024")),
+        max_distance=int(os.environ.get("RECOGNITION_CACHE_MAX_DISTANCE", "4"))
+    )
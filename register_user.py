@@ -1,8 +1,8 @@
-import boto3
+from aws_clients import get_client
 
 # Function to upload face to S3
 def upload_face_to_s3(file_path, user_id):
-    s3 = boto3.client("s3", region_name="ap-south-1")  # Replace with your AWS region
+    s3 = get_client("s3", region_name="ap-south-1")  # Replace with your AWS region
     bucket_name = "ruthvik-bucket-mumbai"  # Your S3 bucket name
     
     try:
@@ -17,7 +17,7 @@ def upload_face_to_s3(file_path, user_id):
 
 # Function to register user in DynamoDB
 def register_user_in_dynamodb(user_id, name, s3_url):
-    dynamodb = boto3.client("dynamodb", region_name="ap-south-1")  # Replace with your AWS region
+    dynamodb = get_client("dynamodb", region_name="ap-south-1")  # Replace with your AWS region
     try:
         dynamodb.put_item(
             TableName="student-attendance",  # Replace with your DynamoDB table name
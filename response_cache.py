@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request, make_response
+
+# ----------------------
+# Conditional-GET Response Cache
+# ----------------------
+# Rendered bodies are cached per (endpoint, query parameters, vary values) and tagged
+# with the attendance data version. The ETag is derived from the key and the version, so
+# a matching If-None-Match gets a 304 before the view runs. A miss on the client side but
+# a hit here replays the stored body. There is no Last-Modified/If-Modified-Since: the
+# watermark time says nothing about the vary values (e.g. "today" on the summary), so it
+# would keep answering 304 after they change. The ETag covers both. Either way, repeated polls between writes cost no DynamoDB read (beyond the
+# TTL-cached watermark) and no template rendering.
+#
+# Call respond() after any auth checks, so cached bodies are only served to callers the
+# view would have served.
+
+
+class ResponseCache:
+    def __init__(self, data_version, max_entries=256, max_age=0):
+        self.data_version = data_version
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (version, body, status, headers)
+        self._lock = threading.Lock()
+        self.stats = {"not_modified": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def _key(self, vary):
+        params = tuple(sorted(request.args.items(multi=True)))
+        return (request.endpoint, params, tuple(vary))
+
+    def _conditional(self, response, etag):
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = f"private, max-age={self.max_age}, must-revalidate"
+        return response
+
+    def respond(self, render, vary=()):
+        # render() -> any Flask view return value; only 200 responses are cached
+        version = self.data_version.version()
+        key = self._key(vary)
+        etag = hashlib.sha1(repr((key, version)).encode()).hexdigest()[:24]
+
+        if etag in request.if_none_match:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return self._conditional(make_response("", 304), etag)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+        if entry is not None and entry[0] == version:
+            _, body, status, headers = entry
+            return self._conditional(make_response(body, status, headers), etag)
+
+        started = time.perf_counter()
+        response = make_response(render())
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = (version, response.get_data(), response.status_code,
+                                  {"Content-Type": response.headers.get("Content-Type")})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        response.headers["X-Render-Time-Ms"] = f"{(time.perf_counter() - started) * 1000:.1f}"
+        return self._conditional(response, etag)
+
+    def snapshot_stats(self):
+        with self._lock:
+            requests = self.stats["not_modified"] + self.stats["hits"] + self.stats["misses"]
+            served = self.stats["not_modified"] + self.stats["hits"]
+            return dict(self.stats, size=len(self._entries),
+                        hit_rate=round(served / requests, 4) if requests else 0.0)
@@ -2,7 +2,6 @@ const express = require('express');
 const fs = require('fs');
 const bcrypt = require('bcrypt');
 const jwt = require('jsonwebtoken');
-const { exec } = require('child_process');
 const { RekognitionClient, CompareFacesCommand } = require('@aws-sdk/client-rekognition');
 require('dotenv').config();
 
@@ -14,6 +13,8 @@ const JWT_SECRET = process.env.JWT_SECRET;
 const AWS_REGION = process.env.AWS_REGION;
 const AWS_ACCESS_KEY = process.env.AWS_ACCESS_KEY;
 const AWS_SECRET_KEY = process.env.AWS_SECRET_KEY;
+const LIVENESS_SERVICE_URL = process.env.LIVENESS_SERVICE_URL || 'http://127.0.0.1:5001';
+const LIVENESS_TIMEOUT_MS = parseInt(process.env.LIVENESS_TIMEOUT_MS || '15000', 10);
 
 // AWS Rekognition client configuration
 const rekognition = new RekognitionClient({
@@ -71,79 +72,128 @@ const authenticateToken = (req, res, next) => {
     });
 };
 
-// Liveness Detection + Attendance Logging
-app.post('/log-attendance', authenticateToken, (req, res) => {
-    exec('python liveness_detection.py', async (error, stdout, stderr) => {
-        if (error) {
-            console.error('Liveness detection error:', error);
-            return res.status(500).json({ error: 'Liveness detection failed', details: error.message });
+// Liveness Challenge
+// Fetched before capture so the client can show the prompt ({ nonce, challenge, min_frames });
+// the nonce is sent back with the frames to /log-attendance.
+app.get('/liveness/challenge', authenticateToken, async (req, res) => {
+    try {
+        const response = await fetch(`${LIVENESS_SERVICE_URL}/liveness/challenge`, {
+            signal: AbortSignal.timeout(LIVENESS_TIMEOUT_MS),
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
         }
+        res.json(await response.json());
+    } catch (error) {
+        console.error('Liveness challenge error:', error);
+        res.status(502).json({ error: 'Failed to get a liveness challenge', details: error.message });
+    }
+});
+
+// Liveness Detection + Attendance Logging
+// Liveness runs in the resident Python service (liveness_service.py) rather than a new
+// interpreter per request, so models are already loaded when frames arrive.
+app.post('/log-attendance', authenticateToken, async (req, res) => {
+    // Frames for the liveness challenge; a lone image is checked when no sequence is sent
+    const frames = Array.isArray(req.body.frames) && req.body.frames.length > 0
+        ? req.body.frames
+        : [req.body.image].filter(Boolean);
+    if (frames.length === 0) {
+        return res.status(400).json({ error: 'Send frames or an image for the liveness check' });
+    }
+    const { nonce } = req.body; // From GET /liveness/challenge
+    if (!nonce) {
+        return res.status(400).json({ error: 'Request a challenge from /liveness/challenge first' });
+    }
 
-        if (!stdout.trim().includes('Liveness confirmed')) {
-            return res.status(400).json({ error: 'Liveness check failed' });
+    let liveness;
+    try {
+        const response = await fetch(`${LIVENESS_SERVICE_URL}/liveness`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ frames, nonce }),
+            signal: AbortSignal.timeout(LIVENESS_TIMEOUT_MS), // A hung service must not hang the request
+        });
+        liveness = await response.json();
+        if (response.status === 400) {
+            // Expired nonce or too few frames for the challenge
+            return res.status(400).json({ error: liveness.message });
         }
+        if (!response.ok) {
+            throw new Error(liveness.details || liveness.message || `HTTP ${response.status}`);
+        }
+    } catch (error) {
+        console.error('Liveness detection error:', error);
+        if (error.name === 'TimeoutError') {
+            return res.status(504).json({ error: 'Liveness detection timed out' });
+        }
+        return res.status(500).json({ error: 'Liveness detection failed', details: error.message });
+    }
 
-        console.log('Liveness confirmed:', stdout.trim());
+    if (!liveness.confirmed) {
+        return res.status(400).json({ error: 'Liveness check failed' });
+    }
 
-        const { image } = req.body; // Base64 image data
-        const referenceImagePath = "C:/Users/HP/Desktop/facial-recognition-backend/ruthvik.jpg";
+    console.log('Liveness confirmed:', liveness.result);
 
-        let referenceImage;
-        try {
-            referenceImage = fs.readFileSync(referenceImagePath);
-        } catch (fileError) {
-            console.error("Error reading reference image:", fileError);
-            return res.status(500).json({ error: "Failed to read reference image", details: fileError.message });
-        }
+    const { image } = req.body; // Base64 image data
+    const referenceImagePath = "C:/Users/HP/Desktop/facial-recognition-backend/ruthvik.jpg";
 
-        // Defensive checks
-        if (!image || Buffer.from(image, 'base64').length === 0) {
-            console.error("Source image is undefined or invalid!");
-            return res.status(400).json({ error: "Invalid source image" });
-        }
-        if (!referenceImage || referenceImage.length === 0) {
-            console.error("Reference image is undefined or invalid!");
-            return res.status(400).json({ error: "Invalid reference image" });
-        }
+    let referenceImage;
+    try {
+        referenceImage = fs.readFileSync(referenceImagePath);
+    } catch (fileError) {
+        console.error("Error reading reference image:", fileError);
+        return res.status(500).json({ error: "Failed to read reference image", details: fileError.message });
+    }
 
-        // Debug logs
-        console.log("Source Image Bytes Length:", Buffer.from(image, 'base64').length);
-        console.log("Reference Image Bytes Length:", referenceImage.length);
+    // Defensive checks
+    if (!image || Buffer.from(image, 'base64').length === 0) {
+        console.error("Source image is undefined or invalid!");
+        return res.status(400).json({ error: "Invalid source image" });
+    }
+    if (!referenceImage || referenceImage.length === 0) {
+        console.error("Reference image is undefined or invalid!");
+        return res.status(400).json({ error: "Invalid reference image" });
+    }
 
-        const params = {
-            SourceImage: { Bytes: Buffer.from(image, 'base64') },
-            TargetImage: { Bytes: referenceImage }
-        };
+    // Debug logs
+    console.log("Source Image Bytes Length:", Buffer.from(image, 'base64').length);
+    console.log("Reference Image Bytes Length:", referenceImage.length);
+
+    const params = {
+        SourceImage: { Bytes: Buffer.from(image, 'base64') },
+        TargetImage: { Bytes: referenceImage }
+    };
+
+    try {
+        const command = new CompareFacesCommand(params);
+        const rekognitionResult = await rekognition.send(command);
 
-        try {
-            const command = new CompareFacesCommand(params);
-            const rekognitionResult = await rekognition.send(command);
-
-            if (!rekognitionResult.FaceMatches || rekognitionResult.FaceMatches.length === 0) {
-                return res.status(400).json({ error: 'Face not recognized' });
-            }
-
-            const { username } = req.user;
-            const timestamp = new Date();
-            const logEntry = {
-                timestamp,
-                username,
-                liveness_result: stdout.trim(),
-                recognitionDetails: rekognitionResult.FaceMatches,
-            };
-
-            fs.appendFileSync('attendance_logs.json', JSON.stringify(logEntry) + '\n');
-
-            res.json({
-                message: `Attendance logged successfully for ${username}`,
-                timestamp,
-                recognitionDetails: rekognitionResult.FaceMatches,
-            });
-        } catch (rekognitionError) {
-            console.error('AWS Rekognition error:', rekognitionError);
-            res.status(500).json({ error: 'AWS Rekognition failed', details: rekognitionError.message });
+        if (!rekognitionResult.FaceMatches || rekognitionResult.FaceMatches.length === 0) {
+            return res.status(400).json({ error: 'Face not recognized' });
         }
-    });
+
+        const { username } = req.user;
+        const timestamp = new Date();
+        const logEntry = {
+            timestamp,
+            username,
+            liveness_result: liveness.result,
+            recognitionDetails: rekognitionResult.FaceMatches,
+        };
+
+        fs.appendFileSync('attendance_logs.json', JSON.stringify(logEntry) + '\n');
+
+        res.json({
+            message: `Attendance logged successfully for ${username}`,
+            timestamp,
+            recognitionDetails: rekognitionResult.FaceMatches,
+        });
+    } catch (rekognitionError) {
+        console.error('AWS Rekognition error:', rekognitionError);
+        res.status(500).json({ error: 'AWS Rekognition failed', details: rekognitionError.message });
+    }
 });
 
 // Start server
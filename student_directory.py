@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from dynamo_batch import batch_get_items
+from dynamo_scan import scan_items, build_projection
+
+# Profile attributes kept in memory. Password hashes are deliberately never cached.
+PROFILE_FIELDS = ["id", "name", "username", "email", "class", "phone_number"]
+
+_MISSING = object()
+
+
+# ----------------------
+# Student Directory Cache
+# ----------------------
+class StudentDirectory:
+    # Process-level cache of student profiles with a TTL per entry and LRU eviction once
+    # max_entries is reached. Unknown IDs are cached too (as negative entries) so a bad
+    # ExternalImageId does not hit DynamoDB on every request, but only for
+    # negative_ttl_seconds: a student registered through another process is found once
+    # that short window passes.
+    def __init__(self, students_table, dynamodb, ttl_seconds=300, max_entries=50000, negative_ttl_seconds=10):
+        self.students_table = students_table
+        self.dynamodb = dynamodb
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries = OrderedDict()  # student_id -> (expires_at, profile or _MISSING)
+        self._folded = {}  # student_id.lower() -> student_id, for case-insensitive lookups
+        self._folded_at = float("-inf")  # When warm() last listed every student
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    # -- internal --
+    def _store(self, student_id, profile, now):
+        ttl_seconds = self.negative_ttl_seconds if profile is _MISSING else self.ttl_seconds
+        self._entries[student_id] = (now + ttl_seconds, profile)
+        if profile is not _MISSING:
+            self._folded[student_id.lower()] = student_id
+        self._entries.move_to_end(student_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _lookup(self, student_id, now):
+        entry = self._entries.get(student_id)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at < now:
+            del self._entries[student_id]
+            return None
+        self._entries.move_to_end(student_id)
+        return entry
+
+    def _fetch(self, student_ids):
+        projection, names = build_projection(PROFILE_FIELDS)
+        items = batch_get_items(self.dynamodb, self.students_table.name,
+                                [{"id": student_id} for student_id in student_ids],
+                                projection=projection, expression_attribute_names=names)
+        return {item["id"]: item for item in items}
+
+    # -- public API --
+    def warm(self):
+        # Load every profile with a projected parallel scan.
+        loaded = 0
+        now = time.monotonic()
+        for item in scan_items(self.students_table, projection=PROFILE_FIELDS):
+            with self._lock:
+                self._store(item["id"], item, now)
+            loaded += 1
+            if loaded >= self.max_entries:
+                break
+        with self._lock:
+            self._folded_at = now
+        logging.info("Student directory warmed with %d profiles", loaded)
+        return loaded
+
+    def warm_in_background(self):
+        def run():
+            try:
+                self.warm()
+            except Exception as e:
+                logging.error("Failed to warm student directory: %s", e)
+
+        thread = threading.Thread(target=run, name="student-directory-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, student_id):
+        return self.get_many([student_id]).get(student_id)
+
+    def get_many(self, student_ids, ignore_case=False):
+        # Return {student_id: profile} for the IDs that exist; misses are fetched together
+        # with one BatchGetItem. With ignore_case, IDs that do not exist exactly are also
+        # matched case-insensitively ("s001" finds "S001"), as attendance records written
+        # before IDs were normalised need.
+        student_ids = list(student_ids)
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for student_id in dict.fromkeys(student_ids):
+                entry = self._lookup(student_id, now)
+                if entry is None:
+                    self.stats["misses"] += 1
+                    missing.append(student_id)
+                else:
+                    self.stats["hits"] += 1
+                    if entry[1] is not _MISSING:
+                        found[student_id] = entry[1]
+
+        if missing:
+            fetched = self._fetch(missing)
+            with self._lock:
+                for student_id in missing:
+                    profile = fetched.get(student_id, _MISSING)
+                    self._store(student_id, profile, now)
+                    if profile is not _MISSING:
+                        found[student_id] = profile
+        if ignore_case:
+            unresolved = [student_id for student_id in dict.fromkeys(student_ids) if student_id not in found]
+            if unresolved:
+                found.update(self._get_folded(unresolved))
+        return found
+
+    def _get_folded(self, student_ids):
+        # Resolve IDs through the lower-cased index of known students. An ID the index
+        # does not know triggers a full listing (warm()), at most once per TTL.
+        with self._lock:
+            unknown = any(student_id.lower() not in self._folded for student_id in student_ids)
+            stale = time.monotonic() - self._folded_at > self.ttl_seconds
+        if unknown and stale:
+            self.warm()
+        with self._lock:
+            canonical = {student_id: self._folded.get(student_id.lower()) for student_id in student_ids}
+        profiles = self.get_many(stored_id for stored_id in canonical.values() if stored_id)
+        return {student_id: profiles[stored_id] for student_id, stored_id in canonical.items() if stored_id in profiles}
+
+    def put(self, item):
+        # Write-through from the registration path.
+        profile = {field: item[field] for field in PROFILE_FIELDS if field in item}
+        with self._lock:
+            self._store(profile["id"], profile, time.monotonic())
+
+    def invalidate(self, student_id):
+        with self._lock:
+            if self._entries.pop(student_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, size=len(self._entries),
+                        hit_rate=round(self.stats["hits"] / lookups, 4) if lookups else 0.0)
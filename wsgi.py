@@ -0,0 +1,4 @@
+from app import app, start_background_services
+
+# WSGI entry point, e.g. `gunicorn wsgi:app`
+start_background_services()